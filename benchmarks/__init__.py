@@ -0,0 +1,4 @@
+"""Benchmark suite of the gitignore-builder package.
+
+Run it with ``python -m benchmarks --help`` from the project root.
+"""
@@ -0,0 +1,147 @@
+"""This module defines the CLI entry point of the benchmark suite."""
+import json
+import logging
+import time
+from pathlib import Path
+
+import click
+
+from benchmarks.suite import DEFAULT_DEDUP_SIZES
+from benchmarks.suite import BenchmarkConfig
+from benchmarks.suite import format_summary
+from benchmarks.suite import run_benchmarks
+from benchmarks.synthetic import SyntheticConfig
+
+DEFAULT_RESULTS_DIR = Path("benchmark-results")
+
+_defaults = SyntheticConfig()
+
+
+@click.command(context_settings={"show_default": True})
+@click.option("--templates", type=click.IntRange(min=1), default=_defaults.templates)
+@click.option("--recipes", type=click.IntRange(min=1), default=_defaults.recipes)
+@click.option(
+    "--templates-per-recipe",
+    type=click.IntRange(min=1),
+    default=_defaults.templates_per_recipe,
+)
+@click.option(
+    "--template-lines", type=click.IntRange(min=1), default=_defaults.template_lines
+)
+@click.option(
+    "--overlap",
+    type=click.FloatRange(min=0, max=1),
+    default=_defaults.overlap,
+    help="Ratio of the template rules duplicated between the templates.",
+)
+@click.option(
+    "--toptal-ratio",
+    type=click.FloatRange(min=0, max=1),
+    default=_defaults.toptal_ratio,
+    help="Ratio of the templates served by the toptal-like API.",
+)
+@click.option("--seed", type=int, default=_defaults.seed)
+@click.option(
+    "--latency",
+    type=click.FloatRange(min=0),
+    default=BenchmarkConfig().latency,
+    metavar="SECONDS",
+    help="Delay of each response of the local HTTP server.",
+)
+@click.option("--builds", type=click.IntRange(min=1), default=BenchmarkConfig().builds)
+@click.option(
+    "-j", "--jobs", type=click.IntRange(min=1), default=BenchmarkConfig().jobs
+)
+@click.option("--coalesce/--no-coalesce", default=True)
+@click.option(
+    "--dedup-size",
+    "dedup_sizes",
+    type=click.IntRange(min=1),
+    multiple=True,
+    default=DEFAULT_DEDUP_SIZES,
+    help="Number of lines of the dedup benchmark (can be repeated).",
+)
+@click.option(
+    "--matcher-rules",
+    type=click.IntRange(min=1),
+    default=BenchmarkConfig().matcher_rules,
+    help="Number of rules compiled by the matcher benchmark.",
+)
+@click.option(
+    "--matcher-paths",
+    type=click.IntRange(min=1),
+    default=BenchmarkConfig().matcher_paths,
+    help="Number of paths matched by the compiled matcher.",
+)
+@click.option(
+    "--matcher-naive-paths",
+    type=click.IntRange(min=1),
+    default=BenchmarkConfig().matcher_naive_paths,
+    help="Number of paths matched by the naive per-rule fnmatch loop.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="The JSON results file [default: timestamped file in "
+    f"'{DEFAULT_RESULTS_DIR}' directory].",
+)
+def main(
+    templates,
+    recipes,
+    templates_per_recipe,
+    template_lines,
+    overlap,
+    toptal_ratio,
+    seed,
+    latency,
+    builds,
+    jobs,
+    coalesce,
+    dedup_sizes,
+    matcher_rules,
+    matcher_paths,
+    matcher_naive_paths,
+    output,
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Benchmark the builds against local HTTP server of synthetic templates.
+
+    The results are saved as JSON, so runs can be compared over time.
+    """
+
+    logging.basicConfig(level=logging.WARNING)
+
+    config = BenchmarkConfig(
+        synthetic=SyntheticConfig(
+            templates=templates,
+            recipes=recipes,
+            templates_per_recipe=templates_per_recipe,
+            template_lines=template_lines,
+            overlap=overlap,
+            toptal_ratio=toptal_ratio,
+            seed=seed,
+        ),
+        latency=latency,
+        builds=builds,
+        jobs=jobs,
+        coalesce=coalesce,
+        dedup_sizes=tuple(sorted(dedup_sizes)),
+        matcher_rules=matcher_rules,
+        matcher_paths=matcher_paths,
+        matcher_naive_paths=matcher_naive_paths,
+    )
+    report = run_benchmarks(config)
+
+    if output is None:
+        timestamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        output = DEFAULT_RESULTS_DIR / f"{timestamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for line in format_summary(report):
+        click.echo(line)
+    click.echo(f"Results saved to: '{output}'")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,143 @@
+"""This module defines local HTTP server that stands-in for the remote sources.
+
+The server generates the synthetic templates (see ``synthetic``) on demand:
+
+* ``/github/<name>.gitignore`` - raw template file, like github.com serves
+* ``/toptal/api/<name>,<name>,...`` - templates listing, like toptal.com serves
+"""
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict
+from typing import Optional
+
+from benchmarks.synthetic import GITHUB_PATH
+from benchmarks.synthetic import TOPTAL_PATH
+from benchmarks.synthetic import SyntheticConfig
+from benchmarks.synthetic import generate_template
+from benchmarks.synthetic import generate_toptal_response
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+
+class TemplateServer:
+    """Threaded HTTP/1.1 server of synthetic templates.
+
+    Runs in a background thread. Use as context manager.
+
+    Attributes:
+        config: The parameters of the served templates.
+        latency: Delay (in seconds) before sending each response.
+        requests: Number of requests received so far.
+        connections: Number of client connections accepted so far.
+        bytes_sent: Number of response body bytes sent so far.
+    """
+
+    def __init__(self, config: SyntheticConfig, latency: float = 0.0):
+        self.config = config
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.bytes_sent = 0
+        self.base_url: Optional[str] = None
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "TemplateServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        host, port = self._server.server_address[:2]
+        self.base_url = f"http://{host}:{port}"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        _log.debug("TemplateServer - serving at: '%s'", self.base_url)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def url(self, path: str) -> str:
+        """Returns absolute URL for the given path."""
+
+        return self.base_url + path
+
+    def reset_counters(self):
+        """Resets the number of received requests, connections and sent bytes."""
+
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.bytes_sent = 0
+
+    def get_body(self, path: str) -> Optional[bytes]:
+        """Returns the response body for the path, None if there is no such."""
+
+        body = self._bodies.get(path)
+        if body is None:
+            text = self._generate_text(path)
+            if text is None:
+                return None
+            body = text.encode("utf-8")
+            self._bodies[path] = body
+        return body
+
+    def _generate_text(self, path: str) -> Optional[str]:
+        if path.startswith(GITHUB_PATH) and path.endswith(".gitignore"):
+            name = path[len(GITHUB_PATH) : -len(".gitignore")]
+            return generate_template(self.config, name)
+        if path.startswith(TOPTAL_PATH):
+            names = path[len(TOPTAL_PATH) :].split(",")
+            if all(names):
+                return generate_toptal_response(self.config, names)
+        return None
+
+    def _count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def _count(self, sent: int):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += sent
+
+
+def _make_handler(server: TemplateServer):
+    class TemplateRequestHandler(BaseHTTPRequestHandler):
+        """Serves the templates of the server, counting the connections and bytes."""
+
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            server._count_connection()  # pylint: disable=protected-access
+
+        def do_GET(self):  # noqa: N802 pylint: disable=invalid-name
+            if server.latency:
+                threading.Event().wait(server.latency)
+
+            body = server.get_body(self.path)
+            if body is None:
+                self.send_response(404)
+                body = b"Not Found"
+            else:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            server._count(len(body))  # pylint: disable=protected-access
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            _log.debug("TemplateServer - %s", format % args)
+
+    return TemplateRequestHandler
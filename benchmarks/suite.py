@@ -0,0 +1,391 @@
+"""This module defines the benchmarks and collects their results.
+
+The builds are measured against the local ``TemplateServer``, with the HTTP
+cache disabled and the in-process memo cleared before each build, so every
+build actually downloads its sources.
+"""
+import fnmatch
+import io
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Sequence
+from typing import Tuple
+
+from benchmarks.server import TemplateServer
+from benchmarks.synthetic import TOPTAL_PATH
+from benchmarks.synthetic import SyntheticConfig
+from benchmarks.synthetic import generate_catalog
+from benchmarks.synthetic import generate_ignore_rules
+from benchmarks.synthetic import generate_paths
+from benchmarks.synthetic import generate_rules
+from gitignore_builder import builder
+from gitignore_builder import datamodel
+from gitignore_builder import io_util
+from gitignore_builder import planner
+from gitignore_builder.__about__ import __version__
+from gitignore_builder.matcher import compile_rules
+
+DEFAULT_DEDUP_SIZES = (1_000, 10_000, 100_000)
+
+
+class BenchmarkConfig(NamedTuple):
+    """Parameters of the benchmark run.
+
+    Attributes:
+        synthetic: The parameters of the generated templates and catalogs.
+        latency: Delay (in seconds) of each response of the local server.
+        builds: Number of recipes built, each one measured separately.
+        jobs: Max number of concurrent downloads of each build.
+        coalesce: Fetch all toptal-like API URLs of a build with single request.
+        dedup_sizes: Numbers of lines deduplicated by the dedup benchmark.
+        matcher_rules: Number of rules compiled by the matcher benchmark.
+        matcher_paths: Number of paths matched by the compiled matcher.
+        matcher_naive_paths: Number of paths matched by the naive loop.
+    """
+
+    synthetic: SyntheticConfig = SyntheticConfig()
+    latency: float = 0.005
+    builds: int = 20
+    jobs: int = io_util.DEFAULT_JOBS
+    coalesce: bool = True
+    dedup_sizes: Tuple[int, ...] = DEFAULT_DEDUP_SIZES
+    matcher_rules: int = 1_000
+    matcher_paths: int = 100_000
+    matcher_naive_paths: int = 1_000
+
+
+def compute_percentile(sorted_samples: Sequence[float], percent: float) -> float:
+    """Returns the nearest-rank percentile of the (sorted) samples."""
+
+    if not sorted_samples:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_samples))
+    return sorted_samples[max(rank, 1) - 1]
+
+
+def summarize_timings(samples: Sequence[float]) -> Dict[str, float]:
+    """Returns the count, total, mean, min, max and percentiles of timings."""
+
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "total": total,
+        "mean": total / len(ordered) if ordered else 0.0,
+        "min": ordered[0] if ordered else 0.0,
+        "max": ordered[-1] if ordered else 0.0,
+        "p50": compute_percentile(ordered, 50),
+        "p90": compute_percentile(ordered, 90),
+        "p99": compute_percentile(ordered, 99),
+    }
+
+
+def measure_peak_memory(func: Callable[[], Any]) -> Tuple[Any, int]:
+    """Calls the function and returns its result and peak of allocated bytes."""
+
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def compute_scaling_exponent(sizes: Sequence[int], timings: Sequence[float]) -> float:
+    """Returns the exponent ``k`` of the fitted ``time ~ size ** k`` relation.
+
+    The exponent is about 1.0 for linear and about 2.0 for quadratic scaling.
+    """
+
+    if len(sizes) < 2 or timings[0] <= 0 or timings[-1] <= 0:
+        return 0.0
+    return math.log(timings[-1] / timings[0]) / math.log(sizes[-1] / sizes[0])
+
+
+def benchmark_build(config: BenchmarkConfig, server: TemplateServer) -> Dict:
+    """Measures ``build_gitignore_contents`` of the sampled recipes.
+
+    The HTTP session is kept between the builds, so the reported number of
+    connections shows how many of them the builds have reused.
+    """
+
+    index = datamodel.get_recipe_urls_index()
+    names = list(index)[: config.builds]
+    options = builder.BuildOptions(fetch=io_util.FetchOptions(use_cache=False))
+
+    def build(name: str) -> str:
+        io_util.clear_memo()
+        # keep the progress bar out of the benchmark output
+        with redirect_stdout(io.StringIO()):
+            return builder.build_gitignore_contents(
+                index[name], config.jobs, config.coalesce, options
+            )
+
+    timings = []
+    lines = 0
+    size = 0
+    server.reset_counters()
+    for name in names:
+        started = time.perf_counter()
+        text = build(name)
+        timings.append(time.perf_counter() - started)
+        lines += text.count("\n") + 1
+        size += len(text.encode("utf-8"))
+    requests, bytes_sent = server.requests, server.bytes_sent
+    connections = server.connections
+
+    peak = 0
+    for name in names:
+        peak = max(peak, measure_peak_memory(lambda name=name: build(name))[1])
+
+    total = sum(timings)
+    return {
+        "builds": len(names),
+        "urls": sum(len(index[name]) for name in names),
+        "requests": requests,
+        "connections": connections,
+        "connections_per_build": connections / len(names) if names else 0.0,
+        "bytes_received": bytes_sent,
+        "latency": summarize_timings(timings),
+        "throughput": {
+            "builds_per_second": len(names) / total if total else 0.0,
+            "lines_per_second": lines / total if total else 0.0,
+            "bytes_per_second": size / total if total else 0.0,
+        },
+        "peak_memory_bytes": peak,
+    }
+
+
+def benchmark_dedup(sizes: Sequence[int], overlap: float, seed: int) -> Dict:
+    """Measures the dedup of growing numbers of lines by ``LineAccumulator``."""
+
+    results = []
+    timings = []
+    for size in sizes:
+        rules = list(generate_rules(size, overlap, "dedup", f"{seed}:dedup:{size}"))
+        lines = builder.LineAccumulator()
+        started = time.perf_counter()
+        for rule in rules:
+            builder.append_line(lines, rule)
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        results.append(
+            {
+                "lines": size,
+                "kept": len(lines),
+                "seconds": elapsed,
+                "ns_per_line": elapsed / size * 1e9 if size else 0.0,
+            }
+        )
+
+    return {
+        "overlap": overlap,
+        "sizes": results,
+        "scaling_exponent": compute_scaling_exponent(sizes, timings),
+    }
+
+
+def match_naively(rules: Sequence[str], path: str, is_dir: bool = False) -> bool:
+    """Returns True if the path is ignored, looping over the rules with fnmatch.
+
+    The baseline of the compiled matcher, checking each rule against the path
+    and each of its parent directories. Unlike in git, the ``*`` of fnmatch
+    matches "/" as well, so the results may differ for some wildcard rules.
+    """
+
+    parts = path.split("/")
+    for depth in range(1, len(parts) + 1):
+        sub_path = "/".join(parts[:depth])
+        sub_is_dir = is_dir or depth < len(parts)
+        ignored = False
+        for rule in rules:
+            negated = rule.startswith("!")
+            pattern = rule[1:] if negated else rule
+            if pattern.endswith("/"):
+                if not sub_is_dir:
+                    continue
+                pattern = pattern[:-1]
+            if "/" in pattern:
+                matched = fnmatch.fnmatchcase(sub_path, pattern.lstrip("/"))
+            else:
+                matched = fnmatch.fnmatchcase(parts[depth - 1], pattern)
+            if matched:
+                ignored = not negated
+        if ignored:
+            return True
+    return False
+
+
+def benchmark_matcher(rules: int, paths: int, naive_paths: int, seed: int) -> Dict:
+    """Measures ``matcher.IgnoreMatcher`` against the naive per-rule fnmatch loop."""
+
+    samples = generate_paths(paths, rules, f"{seed}:matcher")
+    rules = generate_ignore_rules(rules, f"{seed}:matcher")
+
+    started = time.perf_counter()
+    matcher = compile_rules(rules)
+    compile_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    single = [matcher.match(path) for path in samples]
+    match_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = list(matcher.match_many(samples))
+    batch_seconds = time.perf_counter() - started
+
+    naive_samples = samples[:naive_paths]
+    started = time.perf_counter()
+    naive = [match_naively(rules, path) for path in naive_samples]
+    naive_seconds = time.perf_counter() - started
+
+    match_ns = match_seconds / len(samples) * 1e9 if samples else 0.0
+    batch_ns = batch_seconds / len(samples) * 1e9 if samples else 0.0
+    naive_ns = naive_seconds / len(naive_samples) * 1e9 if naive_samples else 0.0
+    agreeing = sum(1 for result, other in zip(single, naive) if result == other)
+    return {
+        "rules": len(matcher),
+        "wildcard_rules": matcher.wildcards,
+        "paths": len(samples),
+        "ignored": sum(batch),
+        "batch_agrees": batch == single,
+        "compile_seconds": compile_seconds,
+        "match_ns_per_path": match_ns,
+        "match_many_ns_per_path": batch_ns,
+        "naive_paths": len(naive_samples),
+        "naive_ns_per_path": naive_ns,
+        "naive_agreement": agreeing / len(naive) if naive else 1.0,
+        "speedup": naive_ns / match_ns if match_ns else 0.0,
+    }
+
+
+def benchmark_catalog(templates: Dict, recipes: Dict, seed: int) -> Dict:
+    """Measures loading of the catalogs and resolution of the recipe URLs."""
+
+    started = time.perf_counter()
+    datamodel.set_templates(templates)
+    datamodel.set_recipes(recipes)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    datamodel.get_recipe_urls_index()
+    index_seconds = time.perf_counter() - started
+
+    names = list(recipes)
+    random.Random(seed).shuffle(names)
+    timings = []
+    for name in names:
+        started = time.perf_counter()
+        datamodel.get_recipe_urls(name)
+        timings.append(time.perf_counter() - started)
+
+    datamodel.set_recipes(recipes)
+    _, peak = measure_peak_memory(datamodel.get_recipe_urls_index)
+
+    total = sum(timings)
+    return {
+        "templates": len(templates),
+        "recipes": len(recipes),
+        "load_seconds": load_seconds,
+        "index_seconds": index_seconds,
+        "index_peak_memory_bytes": peak,
+        "lookup_latency": summarize_timings(timings),
+        "lookups_per_second": len(timings) / total if total else 0.0,
+    }
+
+
+def run_benchmarks(config: BenchmarkConfig) -> Dict:
+    """Runs all the benchmarks and returns their results along with metadata."""
+
+    synthetic = config.synthetic
+    toptal_api_url = planner.get_toptal_api_url()
+    catalog = datamodel.get_catalog()
+    datamodel.set_catalog(None)
+    saved_recipes, saved_templates = datamodel.get_recipes(), datamodel.get_templates()
+
+    try:
+        with TemplateServer(synthetic, config.latency) as server:
+            # the toptal-like API URLs of the local server get coalesced as well
+            planner.set_toptal_api_url(server.url(TOPTAL_PATH))
+            templates, recipes = generate_catalog(synthetic, server.base_url)
+            results = {
+                "catalog": benchmark_catalog(templates, recipes, synthetic.seed),
+                "build": benchmark_build(config, server),
+                "dedup": benchmark_dedup(
+                    config.dedup_sizes, synthetic.overlap, synthetic.seed
+                ),
+                "matcher": benchmark_matcher(
+                    config.matcher_rules,
+                    config.matcher_paths,
+                    config.matcher_naive_paths,
+                    synthetic.seed,
+                ),
+            }
+    finally:
+        planner.set_toptal_api_url(toptal_api_url)
+        datamodel.set_templates(saved_templates)
+        datamodel.set_recipes(saved_recipes)
+        datamodel.set_catalog(catalog)
+        io_util.clear_memo()
+        io_util.close_session()
+
+    return {
+        "meta": get_metadata(config),
+        "results": results,
+    }
+
+
+def get_metadata(config: BenchmarkConfig) -> Dict:
+    """Returns the description of the benchmark run and its environment."""
+
+    params = config._asdict()
+    params["synthetic"] = config.synthetic._asdict()
+    params["dedup_sizes"] = list(config.dedup_sizes)
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "version": __version__,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": params,
+    }
+
+
+def format_summary(report: Dict) -> List[str]:
+    """Returns human-readable lines summarizing the benchmark results."""
+
+    results = report["results"]
+    build, dedup, catalog = results["build"], results["dedup"], results["catalog"]
+    matcher = results["matcher"]
+    latency = build["latency"]
+    return [
+        f"build: {build['builds']} builds, "
+        f"p50={latency['p50'] * 1e3:.1f}ms, p90={latency['p90'] * 1e3:.1f}ms, "
+        f"p99={latency['p99'] * 1e3:.1f}ms, "
+        f"{build['throughput']['lines_per_second']:.0f} lines/s, "
+        f"peak memory={build['peak_memory_bytes'] / 1024:.0f}KiB",
+        f"dedup: scaling exponent={dedup['scaling_exponent']:.2f}, "
+        + ", ".join(
+            f"{size['lines']} lines: {size['ns_per_line']:.0f}ns/line"
+            for size in dedup["sizes"]
+        ),
+        f"catalog: {catalog['templates']} templates, {catalog['recipes']} recipes, "
+        f"load={catalog['load_seconds'] * 1e3:.1f}ms, "
+        f"index={catalog['index_seconds'] * 1e3:.1f}ms, "
+        f"{catalog['lookups_per_second']:.0f} lookups/s",
+        f"matcher: {matcher['rules']} rules ({matcher['wildcard_rules']} wildcard), "
+        f"match={matcher['match_ns_per_path']:.0f}ns/path, "
+        f"match_many={matcher['match_many_ns_per_path']:.0f}ns/path, "
+        f"naive fnmatch loop={matcher['naive_ns_per_path']:.0f}ns/path, "
+        f"speedup={matcher['speedup']:.0f}x",
+    ]
@@ -0,0 +1,194 @@
+"""This module generates synthetic .gitignore templates and catalogs.
+
+All the generated data is deterministic for given parameters (and seed), so
+the results of different benchmark runs can be compared.
+"""
+import random
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Tuple
+
+GITHUB_PATH = "/github/"
+
+TOPTAL_PATH = "/toptal/api/"
+
+
+class SyntheticConfig(NamedTuple):
+    """Parameters of the generated templates and catalogs.
+
+    Attributes:
+        templates: Number of templates in the catalog.
+        recipes: Number of recipes in the catalog.
+        templates_per_recipe: Number of templates used by each recipe.
+        template_lines: Number of lines of each template.
+        overlap: Ratio (0..1) of the template rules drawn from pool shared
+            by all templates, i.e. rules duplicated between the templates.
+        toptal_ratio: Ratio (0..1) of the templates served by the toptal-like
+            API (the rest are served as github-like raw files).
+        seed: Seed of the random generators.
+    """
+
+    templates: int = 2000
+    recipes: int = 1000
+    templates_per_recipe: int = 8
+    template_lines: int = 200
+    overlap: float = 0.5
+    toptal_ratio: float = 0.5
+    seed: int = 0
+
+
+def get_template_name(index: int) -> str:
+    """Returns the name of the template with the given index."""
+
+    return f"synthetic-{index:05d}"
+
+
+def get_recipe_name(index: int) -> str:
+    """Returns the name of the recipe with the given index."""
+
+    return f"recipe-{index:05d}"
+
+
+def is_toptal_template(config: SyntheticConfig, index: int) -> bool:
+    """Returns True if the template is served by the toptal-like API."""
+
+    return index < round(config.templates * config.toptal_ratio)
+
+
+def generate_rules(count: int, overlap: float, prefix: str, seed: str) -> Iterable[str]:
+    """Yields rules, the ``overlap`` ratio of which is shared between prefixes."""
+
+    rng = random.Random(seed)
+    for number in range(count):
+        if rng.random() < overlap:
+            yield f"shared/rule-{rng.randrange(count):05d}"
+        else:
+            yield f"{prefix}/rule-{number:05d}"
+
+
+def generate_template(config: SyntheticConfig, name: str) -> str:
+    """Returns the text of the template with the given name.
+
+    Every tenth line is a comment or an empty line, like in real templates.
+    """
+
+    lines = [f"# Synthetic template: {name}"]
+    rules = generate_rules(
+        config.template_lines - 1, config.overlap, name, f"{config.seed}:{name}"
+    )
+    for number, rule in enumerate(rules, start=1):
+        if number % 20 == 0:
+            lines.append("")
+        elif number % 10 == 0:
+            lines.append(f"# group {number // 10}")
+        else:
+            lines.append(rule)
+    return "\n".join(lines)
+
+
+def generate_toptal_response(config: SyntheticConfig, names: List[str]) -> str:
+    """Returns the toptal-like API response listing the given templates."""
+
+    listing = ",".join(names)
+    lines = [f"# Created by {TOPTAL_PATH}{listing}", f"# Edit at {listing}"]
+    for name in names:
+        lines.extend(["", f"### {name} ###", generate_template(config, name)])
+    lines.extend(["", f"# End of {TOPTAL_PATH}{listing}", ""])
+    return "\n".join(lines)
+
+
+def generate_catalog(
+    config: SyntheticConfig, base_url: str
+) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+    """Returns the templates and recipes data served from the base URL.
+
+    Returns:
+        Tuple of the templates data (mapping of template name to URLs) and
+        the recipes data (mapping of recipe name to template names).
+    """
+
+    templates = {}
+    for index in range(config.templates):
+        name = get_template_name(index)
+        if is_toptal_template(config, index):
+            templates[name] = [f"{base_url}{TOPTAL_PATH}{name}"]
+        else:
+            templates[name] = [f"{base_url}{GITHUB_PATH}{name}.gitignore"]
+
+    rng = random.Random(config.seed)
+    names = list(templates)
+    count = min(config.templates_per_recipe, len(names))
+    recipes = {
+        get_recipe_name(index): rng.sample(names, count)
+        for index in range(config.recipes)
+    }
+    return templates, recipes
+
+
+def generate_ignore_rules(count: int, seed: str) -> List[str]:
+    """Returns mix of rules of all kinds, like the rules of merged templates.
+
+    About a third of the rules are literal names, a third are extensions
+    and the rest are anchored paths, wildcard rules and few negations.
+    """
+
+    rng = random.Random(seed)
+    rules = []
+    for number in range(count):
+        kind = rng.random()
+        if kind < 0.3:
+            rules.append(rng.choice((f"name-{number}", f"dir-{number}/")))
+        elif kind < 0.6:
+            rules.append(f"*.ext{number}")
+        elif kind < 0.75:
+            rules.append(rng.choice((f"/build-{number}/", f"src/gen-{number}/out")))
+        elif kind < 0.95:
+            rules.append(
+                rng.choice(
+                    (
+                        f"cache-{number}-*.tmp",
+                        f"**/logs-{number}/*.log",
+                        f"*.py[co]{number}",
+                        f"src/**/tmp-{number}?",
+                    )
+                )
+            )
+        else:
+            rules.append(f"!keep-{number}.ext{rng.randrange(count)}")
+    return rules
+
+
+def generate_paths(count: int, names: int, seed: str) -> List[str]:
+    """Returns relative file paths, some of them matching the generated rules.
+
+    Args:
+        count: Number of the paths.
+        names: Number of the generated rules, used in the names of the paths.
+        seed: Seed of the random generator.
+    """
+
+    rng = random.Random(seed)
+    dirs = ["src", "lib", "docs", "tests", "pkg"]
+    dirs.extend(
+        f"{prefix}-{rng.randrange(names)}"
+        for prefix in ("dir", "build", "logs", "gen", "other")
+        for _ in range(20)
+    )
+    paths = []
+    for _ in range(count):
+        folders = [rng.choice(dirs) for _ in range(rng.randrange(1, 5))]
+        number = rng.randrange(names)
+        name = rng.choice(
+            (
+                f"name-{number}",
+                f"file.ext{number}",
+                f"keep-{number}.ext{number}",
+                f"cache-{number}-x.tmp",
+                f"module.py{number}",
+                f"main-{number}.c",
+            )
+        )
+        paths.append("/".join(folders + [name]))
+    return paths
@@ -0,0 +1,224 @@
+"""This module defines analysis of .gitignore rules against a project tree.
+
+The tree is walked like git walks it (without descending into the ignored
+directories) and each path is attributed to the rule deciding if it is
+ignored - the last rule matching it (see ``IgnoreMatcher.find_rule``).
+The rules with zero hits decide nothing in the tree, so they can be pruned
+without changing which of its paths are ignored.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from gitignore_builder.builder import LineAccumulator
+from gitignore_builder.builder import append_line
+from gitignore_builder.builder import parse_source_sections
+from gitignore_builder.io_util import DEFAULT_JOBS
+from gitignore_builder.matcher import IgnoreMatcher
+from gitignore_builder.matcher import Rule
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+SKIPPED_DIRS = frozenset({".git"})
+
+
+class RuleHits(NamedTuple):
+    """Number of the paths of the tree decided by the rule.
+
+    Attributes:
+        rule: The compiled rule (``rule.line`` is its 0-based line number).
+        hits: Number of the paths whose last matching rule is this one.
+        url: Source URL of the section of the rule, None if not in section.
+    """
+
+    rule: Rule
+    hits: int
+    url: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the rule hits as JSON-serializable dict."""
+
+        return {
+            "line": self.rule.line + 1,
+            "rule": self.rule.pattern,
+            "hits": self.hits,
+            "url": self.url,
+        }
+
+
+class TreeAnalysis:
+    """Hits of each .gitignore rule over the paths of a project tree.
+
+    Attributes:
+        lines: The analyzed .gitignore lines.
+        rules: The hits of each compiled rule, in order.
+        paths: Number of the walked paths (the ignored ones included).
+        ignored: Number of the ignored paths (their contents are not walked).
+        seconds: Duration of the walk.
+    """
+
+    def __init__(
+        self,
+        lines: List[str],
+        rules: List[RuleHits],
+        paths: int,
+        ignored: int,
+        seconds: float,
+    ):
+        self.lines = lines
+        self.rules = rules
+        self.paths = paths
+        self.ignored = ignored
+        self.seconds = seconds
+
+    def get_dead_rules(self) -> List[RuleHits]:
+        """Returns the rules with zero hits, in order."""
+
+        return [rule_hits for rule_hits in self.rules if not rule_hits.hits]
+
+    def prune(self) -> str:
+        """Returns the analyzed contents without the rules with zero hits.
+
+        The lines are re-appended like by the builder (see
+        ``builder.append_line``), so no runs of empty lines are left behind.
+        The lines of rules which could not be compiled are kept.
+        """
+
+        dead = {rule_hits.rule.line for rule_hits in self.get_dead_rules()}
+        lines = LineAccumulator()
+        for number, line in enumerate(self.lines):
+            if number not in dead:
+                append_line(lines, line)
+        return lines.to_text()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the analysis as JSON-serializable dict."""
+
+        return {
+            "seconds": self.seconds,
+            "paths": self.paths,
+            "ignored": self.ignored,
+            "dead_rules": len(self.get_dead_rules()),
+            "rules": [rule_hits.to_dict() for rule_hits in self.rules],
+        }
+
+    def format_json(self) -> str:
+        """Returns the analysis formatted as JSON text."""
+
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_text(self, dead_only: bool = False) -> str:
+        """Returns the analysis formatted as human-readable table.
+
+        Args:
+            dead_only: List only the rules with zero hits.
+        """
+
+        lines = [f"{'hits':>8} {'line':>6}  rule"]
+        for rule_hits in self.get_dead_rules() if dead_only else self.rules:
+            lines.append(
+                f"{rule_hits.hits:>8} {rule_hits.rule.line + 1:>6}  "
+                f"{rule_hits.rule.pattern}"
+            )
+
+        sources: Dict[str, List[int]] = {}
+        for rule_hits in self.rules:
+            if rule_hits.url is not None:
+                counts = sources.setdefault(rule_hits.url, [0, 0])
+                counts[0] += 1
+                counts[1] += not rule_hits.hits
+        if sources:
+            lines.append(f"{'rules':>8} {'dead':>6}  source")
+            for url, (count, dead) in sources.items():
+                lines.append(f"{count:>8} {dead:>6}  {url}")
+
+        lines.extend(
+            [
+                f"rules: {len(self.rules)}, "
+                f"with zero hits: {len(self.get_dead_rules())}",
+                f"paths: {self.paths} walked, {self.ignored} ignored",
+                f"walk time: {self.seconds * 1000:.1f}ms",
+            ]
+        )
+        return "\n".join(lines)
+
+
+def _scan_dir(root: Path, path: str) -> List[Tuple[str, bool]]:
+    """Returns the relative path and the is-dir flag of each directory entry."""
+
+    prefix = path + "/" if path else ""
+    try:
+        with os.scandir(root / path) as entries:
+            return [
+                (prefix + entry.name, entry.is_dir(follow_symlinks=False))
+                for entry in entries
+                if entry.name not in SKIPPED_DIRS
+            ]
+    except OSError as e:
+        _log.warning("Skipped directory: '%s'! Details: '%s'", root / path, e)
+        return []
+
+
+def _get_line_urls(text: str) -> List[Optional[str]]:
+    """Returns the source URL of the section of each line of built contents."""
+
+    urls: List[Optional[str]] = []
+    for section in parse_source_sections(text):
+        urls.extend([section.url] * len(section.lines))
+    return urls
+
+
+def analyze_tree(root: Path, text: str, jobs: int = DEFAULT_JOBS) -> TreeAnalysis:
+    """Counts the hits of each rule of the .gitignore contents in the tree.
+
+    The directories are scanned concurrently (with ``os.scandir``), while the
+    scanned paths are matched as soon as their directory is done. The ``.git``
+    directory and the nested .gitignore files are not taken into account.
+
+    Args:
+        root: The project directory (the .gitignore directory).
+        text: The .gitignore contents, e.g. the result of a build.
+        jobs: Max number of directories scanned concurrently.
+    """
+
+    started = time.perf_counter()
+    lines = text.split("\n")
+    matcher = IgnoreMatcher(lines)
+    hits = [0] * len(matcher.rules)
+    paths = ignored = 0
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {executor.submit(_scan_dir, root, "")}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for path, is_dir in future.result():
+                    paths += 1
+                    rule = matcher.find_rule(path, is_dir)
+                    if rule is not None:
+                        hits[rule.index] += 1
+                        if not rule.negated:
+                            ignored += 1
+                            continue
+                    if is_dir:
+                        pending.add(executor.submit(_scan_dir, root, path))
+
+    urls = _get_line_urls(text)
+    rules = [
+        RuleHits(rule, hits[rule.index], urls[rule.line]) for rule in matcher.rules
+    ]
+    seconds = time.perf_counter() - started
+    _log.info("Walked %s paths of '%s' in %.3fs", paths, root, seconds)
+    return TreeAnalysis(lines, rules, paths, ignored, seconds)
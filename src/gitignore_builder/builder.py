@@ -1,17 +1,212 @@
 """This module defines the logic for building the contents of a .gitignore file.
 """
+import logging
+import re
+from functools import partial
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+from typing import Union
 
 import click
 
+from gitignore_builder import stats
+from gitignore_builder import tracing
+from gitignore_builder.io_util import DEFAULT_JOBS
+from gitignore_builder.io_util import FetchOptions
+from gitignore_builder.io_util import iter_url_lines
 from gitignore_builder.io_util import read_url_as_text
+from gitignore_builder.io_util import read_urls_as_text
+from gitignore_builder.io_util import read_urls_as_text_async
+from gitignore_builder.patterns import canonicalize
+from gitignore_builder.patterns import find_subsumed_rules
+from gitignore_builder.patterns import is_negation
+from gitignore_builder.planner import FetchPlan
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
 
 SEPARATOR_LINE_LENGTH = 120
 SEPARATOR_FILL_CHAR = "="
 
+_FILL = re.escape(SEPARATOR_FILL_CHAR)
+_SOURCE_SEPARATOR = re.compile(rf"^# {_FILL}* source: (\S+) {_FILL}*$")
+
+DEDUP_MODES = ("exact", "canonical")
+
+SPELLINGS = ("first", "canonical")
+
+
+class BuildOptions(NamedTuple):
+    """Options of a single build, given along with each build.
+
+    Attributes:
+        dedup: "exact" - drop rules equal to already present ones, or
+            "canonical" - drop rules equivalent to already present ones.
+        spelling: Which spelling of the equivalent rules is kept in
+            "canonical" mode - the "first" one, or the "canonical" one.
+        prune_subsumed: Prune the rules covered by earlier broader rules (see
+            ``prune_subsumed_rules``), so the contents are not streamed.
+        fetch: How the URL contents are read (see ``io_util.FetchOptions``).
+    """
+
+    dedup: str = "exact"
+    spelling: str = "first"
+    prune_subsumed: bool = False
+    fetch: FetchOptions = FetchOptions()
+
+
+class LineAccumulator:
+    """Ordered collection of .gitignore lines with constant-time dedup checks.
+
+    Behaves like the plain list of lines used by the ``append_*`` functions,
+    but additionally keeps a hash-set of the non-comment lines, so checking
+    whether a rule is already present does not scan all accumulated lines.
+
+    The accumulated lines can be taken out with ``drain`` while building, so
+    only the dedup index (and not the whole document) is kept in memory.
+    """
+
+    def __init__(self, lines: Optional[Iterable[str]] = None):
+        self._lines: List[str] = []
+        self._rules: Set[str] = set()
+        self._drained = 0
+        self._last: Optional[str] = None
+        for line in lines or ():
+            self.append(line)
+
+    def __len__(self) -> int:
+        return self._drained + len(self._lines)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lines)
+
+    def __getitem__(self, index):
+        if index == -1 and not self._lines and self._drained:
+            return self._last
+        return self._lines[index]
+
+    def __contains__(self, line) -> bool:
+        if line in self._rules:
+            return True
+        if isinstance(line, str) and line.startswith("#"):
+            return line in self._lines
+        return False
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._lines!r})"
+
+    @property
+    def lines(self) -> List[str]:
+        """Returns copy of the accumulated (not yet drained) lines."""
+
+        return list(self._lines)
+
+    def append(self, line: str):
+        """Appends the line unconditionally and indexes it if not a comment."""
+
+        self._lines.append(line)
+        if line and not line.startswith("#"):
+            self._rules.add(line)
+
+    def drain(self) -> List[str]:
+        """Removes and returns the accumulated lines, keeping the dedup index.
+
+        Later appends are still checked against all previously accumulated
+        rules, but comment lines are only looked-up among the lines not
+        drained yet.
+        """
+
+        lines = self._lines
+        if lines:
+            self._drained += len(lines)
+            self._last = lines[-1]
+            self._lines = []
+        return lines
+
+    def to_text(self) -> str:
+        """Returns the accumulated (not yet drained) lines joined as text."""
+
+        return "\n".join(self._lines)
+
+
+class CanonicalLineAccumulator(LineAccumulator):
+    """``LineAccumulator`` de-duplicating the rules by their normal form.
+
+    Rules equivalent to already accumulated one (see ``patterns.canonicalize``)
+    are reported as present, unless a rule of the opposite kind (negation or
+    not) was appended after it, as the repeated rule may override that one.
+
+    Args:
+        lines: Initial lines.
+        spelling: Which spelling of the rule to keep - the "first" appended
+            one, or the "canonical" (normal) form.
+    """
+
+    def __init__(self, lines: Optional[Iterable[str]] = None, spelling="first"):
+        self._spelling = spelling
+        self._positions: Dict[str, int] = {}
+        self._count = 0
+        self._last_negation = 0
+        self._last_inclusion = 0
+        super().__init__(lines)
+
+    def __contains__(self, line) -> bool:
+        if not isinstance(line, str) or not line or line.startswith("#"):
+            return super().__contains__(line)
+
+        rule = canonicalize(line)
+        position = self._positions.get(rule)
+        if position is None:
+            return False
+        if is_negation(rule):
+            return position > self._last_inclusion
+        return position > self._last_negation
+
+    def append(self, line: str):
+        """Appends the line unconditionally and indexes it if not a comment."""
+
+        if line and not line.startswith("#"):
+            rule = canonicalize(line)
+            if self._spelling == "canonical":
+                line = rule
+            self._count += 1
+            self._positions[rule] = self._count
+            if is_negation(rule):
+                self._last_negation = self._count
+            else:
+                self._last_inclusion = self._count
+        super().append(line)
+
+
+def create_line_accumulator(options: BuildOptions = BuildOptions()) -> LineAccumulator:
+    """Returns empty ``LineAccumulator`` applying the dedup options.
+
+    Raises:
+        ValueError: For unknown dedup mode or spelling.
+    """
+
+    if options.dedup not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode: '{options.dedup}'!")
+    if options.spelling not in SPELLINGS:
+        raise ValueError(f"Unknown spelling: '{options.spelling}'!")
+    if options.dedup == "canonical":
+        return CanonicalLineAccumulator(spelling=options.spelling)
+    return LineAccumulator()
+
+
+Lines = Union[List[str], LineAccumulator]
+
 
 # pylint: disable=trailing-whitespace
-def should_append(lines: List[str], line: str) -> bool:
+def should_append(lines: Lines, line: str) -> bool:
     """Checks if the line should be appended according to rules.
 
     * If the line is empty - append it only if the last line is not empty.
@@ -19,7 +214,7 @@ def should_append(lines: List[str], line: str) -> bool:
     * If the line is comment line - append it.
 
     Args:
-        lines: Target list.
+        lines: Target list (or ``LineAccumulator``).
         line: Current line.
 
     Returns:
@@ -29,9 +224,11 @@ def should_append(lines: List[str], line: str) -> bool:
         return bool(line)
 
     if line:
-        if line.startswith("#") or line not in lines:
+        if line.startswith("#"):
             return True
-        return False
+        if line in lines:
+            return False
+        return True
 
     if lines and lines[-1]:
         return True
@@ -39,7 +236,7 @@ def should_append(lines: List[str], line: str) -> bool:
     return False
 
 
-def append_line(lines: List[str], line: str):
+def append_line(lines: Lines, line: str):
     """Processes and appends the line to the current list of lines.
 
     An "empty-comments-section" can appear while accumulating the contents
@@ -59,14 +256,14 @@ def format_separator_line(title: str) -> str:
     return "# " + f" {title} ".center((SEPARATOR_LINE_LENGTH - 2), SEPARATOR_FILL_CHAR)
 
 
-def append_separator_line(lines: List[str], title: str):
+def append_separator_line(lines: Lines, title: str):
     """Creates and appends separator line to the list of lines."""
 
     line = format_separator_line(title)
     append_line(lines, line)
 
 
-def append_section(lines: List[str], section_text: str, section_title=""):
+def append_section(lines: Lines, section_text: str, section_title=""):
     """Appends .gitignore text contents as titled section to the lines list.
 
     Args:
@@ -75,12 +272,44 @@ def append_section(lines: List[str], section_text: str, section_title=""):
         section_title: Title used for generation of the separator-row.
     """
 
+    with tracing.span("builder.append_section", "build", title=section_title):
+        append_separator_line(lines, section_title)
+        for line in section_text.split("\n"):
+            append_line(lines, line.strip())
+
+
+def append_section_lines(
+    lines: Lines, section_lines: Iterable[str], section_title=""
+) -> bool:
+    """Streaming counterpart of ``append_section``.
+
+    Consumes the lines of .gitignore contents one by one. Empty contents
+    (no lines, or single empty line) are not appended at all.
+
+    Returns:
+        True if the section was appended, False otherwise.
+    """
+
+    if tracing.is_enabled():
+        section_lines = tracing.iter_traced(
+            section_lines, "builder.append_section_lines", "build", title=section_title
+        )
+    section_lines = iter(section_lines)
+    first = next(section_lines, None)
+    second = next(section_lines, None)
+    if not first and second is None:
+        return False
+
     append_separator_line(lines, section_title)
-    for line in section_text.split("\n"):
-        append_line(lines, line.strip())
+    append_line(lines, first.strip())
+    if second is not None:
+        append_line(lines, second.strip())
+        for line in section_lines:
+            append_line(lines, line.strip())
+    return True
 
 
-def append_url(lines: List[str], url: str, section_title=""):
+def append_url(lines: Lines, url: str, section_title=""):
     """Retrieves text from the URL and appends it as section to the list."""
 
     section_text = read_url_as_text(url)
@@ -88,14 +317,354 @@ def append_url(lines: List[str], url: str, section_title=""):
         append_section(lines, section_text, section_title)
 
 
-def build_gitignore_contents(urls: List[str]) -> str:
-    """Build the contents of a single .gitignore file from several URLs."""
+Source = Tuple[str, Union[None, str, Iterable[str]]]
 
-    lines = []
 
-    with click.progressbar(urls) as urls_progress:
-        for url in urls_progress:
-            title = f"source: {url}"
-            append_url(lines, url, title)
+def append_sources(lines: Lines, sources: Iterable[Source]):
+    """Appends the text of each ``(url, text)`` pair as section titled by URL.
+
+    The text may also be given as iterable of its lines
+    (see ``io_util.iter_url_lines``).
+    Sources without text (e.g. failed downloads) are skipped.
+    """
+
+    for url, section_text in sources:
+        if not stats.is_enabled():
+            _append_source(lines, url, section_text)
+            continue
+
+        lines_in = [0]
+        if isinstance(section_text, str):
+            lines_in[0] = section_text.count("\n") + 1 if section_text else 0
+        elif section_text is not None:
+            section_text = _iter_counted(section_text, lines_in)
+        count = len(lines)
+        _append_source(lines, url, section_text)
+        lines_kept = max(len(lines) - count - 1, 0)
+        stats.record_lines(url, lines_in[0], lines_kept)
+
+
+def _append_source(lines: Lines, url: str, section_text):
+    if isinstance(section_text, str):
+        if section_text:
+            append_section(lines, section_text, f"source: {url}")
+    elif section_text is not None:
+        append_section_lines(lines, section_text, f"source: {url}")
+
+
+def _iter_counted(items: Iterable[str], counter: List[int]) -> Iterator[str]:
+    for item in items:
+        counter[0] += 1
+        yield item
+
+
+def prune_subsumed_rules(text: str, options: BuildOptions = BuildOptions()) -> str:
+    """Returns the built .gitignore contents without the subsumed rules.
+
+    The rules covered by earlier broader rules are found over all the lines
+    (see ``patterns.find_subsumed_rules``) and the rest of the lines are
+    re-appended (see ``append_line``) to accumulator of the same dedup options
+    as the build, so no runs of empty lines are left and the rules repeated
+    after negations are kept. The pruned rules are recorded in the stats of
+    their source section URL.
+    """
+
+    lines = text.split("\n")
+    subsumed = find_subsumed_rules(lines)
+    if not subsumed:
+        return text
+
+    result = create_line_accumulator(options)
+    removed: Dict[Optional[str], List[int]] = {}
+    url = None
+    for number, line in enumerate(lines):
+        match = _SOURCE_SEPARATOR.match(line)
+        if match:
+            url = match.group(1)
+        if number in subsumed:
+            removed.setdefault(url, [0, 0])[0] += 1
+        elif should_append(result, line):
+            result.append(line)
+        else:
+            removed.setdefault(url, [0, 0])[1] += 1
+
+    for url, (pruned, dropped) in removed.items():
+        if url is not None:
+            stats.record_pruned(url, pruned, dropped)
+    _log.info("Pruned %s rules covered by broader rules", len(subsumed))
+    return result.to_text()
+
+
+def iter_sources_text(
+    sources: Iterable[Source], options: BuildOptions = BuildOptions()
+) -> Iterator[str]:
+    """Yields the text of the ``(url, text)`` pairs merged by ``append_sources``.
+
+    The merged text is yielded in chunks, one per source as soon as it was
+    appended, so joining all chunks results in the same text as building it
+    at once. Only the dedup index of the merged lines is kept in memory.
+
+    When pruning the subsumed rules (see ``BuildOptions.prune_subsumed``), the
+    merged text is yielded at once, after pruning.
+    """
+
+    lines = create_line_accumulator(options)
+    if options.prune_subsumed:
+        append_sources(lines, sources)
+        text = prune_subsumed_rules(lines.to_text(), options)
+        if text:
+            yield text
+        return
+
+    prefix = ""
+    for source in sources:
+        append_sources(lines, (source,))
+        chunk = lines.drain()
+        if chunk:
+            yield prefix + "\n".join(chunk)
+            prefix = "\n"
+
+
+def _create_fetch_plan(
+    urls: Sequence[str], coalesce: bool, fetch: FetchOptions
+) -> FetchPlan:
+    """Returns the plan of fetching the URLs (coalescing is not applied offline)."""
+
+    plan = FetchPlan(urls, coalesce and not fetch.offline, fetch.use_cache)
+    stats.record_coalesced(plan.get_coalesced_urls())
+    return plan
+
+
+def iter_gitignore_contents(
+    urls: Sequence[str],
+    jobs: int = DEFAULT_JOBS,
+    coalesce: bool = True,
+    options: BuildOptions = BuildOptions(),
+) -> Iterator[str]:
+    """Streaming counterpart of ``build_gitignore_contents``.
+
+    Yields the .gitignore contents in chunks, in order, each one as soon as
+    the contents of its URL are available. Joining the chunks results in
+    the same text as returned by ``build_gitignore_contents``.
+
+    With single job the URLs are streamed (see ``io_util.iter_url_lines``)
+    straight into the result, without holding their whole contents, so the
+    memory stays bounded. With more jobs the contents of each URL are
+    downloaded (and memorized) whole, as they are fetched concurrently.
+
+    Raises:
+        IOError: With single job, if a download fails part-way through.
+    """
+
+    plan = _create_fetch_plan(urls, coalesce, options.fetch)
+    read_url = partial(read_url_as_text, options=options.fetch)
+    if jobs > 1:
+        fetched = read_urls_as_text(plan.fetch_urls, jobs, options.fetch)
+    else:
+        fetched = (
+            (
+                read_url(url)
+                if url == plan.combined_url
+                else iter_url_lines(url, options.fetch)
+            )
+            for url in plan.fetch_urls
+        )
+    texts = plan.assemble(fetched, read_url)
+    yield from iter_sources_text(zip(urls, texts), options)
+
+
+def build_gitignore_contents(
+    urls: Sequence[str],
+    jobs: int = DEFAULT_JOBS,
+    coalesce: bool = True,
+    options: BuildOptions = BuildOptions(),
+) -> str:
+    """Build the contents of a single .gitignore file from several URLs.
+
+    The URLs are downloaded concurrently (see ``io_util.read_urls_as_text``),
+    but the sections are always appended in the original URL order, so the
+    result does not depend on the number of ``jobs``.
+
+    Args:
+        urls: The source URLs, in order.
+        jobs: Max number of concurrent downloads.
+        coalesce: Fetch all toptal API URLs with single request
+            (see ``planner.FetchPlan``). Not applied in offline mode.
+        options: The options of the build (see ``BuildOptions``).
+    """
+
+    plan = _create_fetch_plan(urls, coalesce, options.fetch)
+    fetched = read_urls_as_text(plan.fetch_urls, jobs, options.fetch)
+    texts = plan.assemble(fetched, partial(read_url_as_text, options=options.fetch))
+
+    with click.progressbar(zip(urls, texts), length=len(urls)) as progress:
+        return "".join(iter_sources_text(progress, options))
+
+
+class BuildResult(NamedTuple):
+    """The built .gitignore contents along with the statistics of the build."""
+
+    text: str
+    stats: stats.BuildStats
+
+
+def build_gitignore_contents_with_stats(
+    urls: Sequence[str],
+    jobs: int = DEFAULT_JOBS,
+    coalesce: bool = True,
+    trace_memory: bool = True,
+    options: BuildOptions = BuildOptions(),
+) -> BuildResult:
+    """Same as ``build_gitignore_contents``, but also collects the build stats.
+
+    Args:
+        urls: The source URLs, in order.
+        jobs: Max number of concurrent downloads.
+        coalesce: Fetch all toptal API URLs with single request.
+        trace_memory: Trace the peak of the memory allocated while building
+            (slows down the build).
+        options: The options of the build (see ``BuildOptions``).
+    """
+
+    with stats.collect(trace_memory=trace_memory) as build_stats:
+        text = "".join(iter_gitignore_contents(urls, jobs, coalesce, options))
+    return BuildResult(text, build_stats)
+
+
+def build_many_gitignore_contents(
+    sources: Mapping[str, Sequence[str]],
+    jobs: int = DEFAULT_JOBS,
+    coalesce: bool = True,
+    options: BuildOptions = BuildOptions(),
+) -> Dict[str, str]:
+    """Build the contents of several .gitignore files at once.
+
+    The union of the URLs needed by all builds is fetched only once (and
+    concurrently, with the toptal API URLs of all builds coalesced), then
+    each result is assembled from the shared contents.
+
+    Args:
+        sources: Mapping of build name (e.g. recipe name) to its source URLs.
+        jobs: Max number of concurrent downloads.
+        coalesce: Fetch all toptal API URLs with single request.
+        options: The options of the builds (see ``BuildOptions``).
+
+    Returns:
+        Mapping of each build name to the resulting .gitignore contents.
+    """
+
+    all_urls = list(dict.fromkeys(url for urls in sources.values() for url in urls))
+    plan = _create_fetch_plan(all_urls, coalesce, options.fetch)
+    fetched = read_urls_as_text(plan.fetch_urls, jobs, options.fetch)
+    read_url = partial(read_url_as_text, options=options.fetch)
+
+    with click.progressbar(fetched, length=len(plan.fetch_urls)) as progress:
+        texts = dict(zip(all_urls, plan.assemble(progress, read_url)))
+
+    results = {}
+    for name, urls in sources.items():
+        chunks = iter_sources_text(((url, texts[url]) for url in urls), options)
+        results[name] = "".join(chunks)
+
+    return results
+
+
+class SourceSection(NamedTuple):
+    """Lines of built .gitignore contents, originating from single source URL.
+
+    The lines start with the separator line of the source (if any).
+    """
+
+    url: Optional[str]
+    lines: List[str]
+
+
+def parse_source_sections(text: str) -> List[SourceSection]:
+    """Splits built .gitignore contents back into the sections of each source.
+
+    The lines preceding the first source separator (if any) are returned as
+    section without URL.
+    """
+
+    sections = []
+    current = SourceSection(None, [])
+    for line in text.split("\n"):
+        match = _SOURCE_SEPARATOR.match(line)
+        if match:
+            if current.url or current.lines:
+                sections.append(current)
+            current = SourceSection(match.group(1), [])
+        current.lines.append(line)
+    if current.url or current.lines != [""]:
+        sections.append(current)
+    return sections
+
+
+def update_gitignore_contents(
+    text: str,
+    urls: Sequence[str],
+    jobs: int = DEFAULT_JOBS,
+    coalesce: bool = True,
+    options: BuildOptions = BuildOptions(),
+) -> Tuple[str, List[str]]:
+    """Updates .gitignore contents previously built from the same URLs.
+
+    The sources are revalidated through the cache, so only the changed ones
+    are downloaded. The contents are then rebuilt as a whole, as a change in
+    one source can affect the dedup of the later ones, so the result is the
+    same as building the contents anew, except that the lines preceding the
+    first source section are kept. The sections are compared to the old ones
+    of the same source URL, so adding or removing a source does not mark the
+    unaffected sections after it as changed.
+
+    Args:
+        text: The contents to update (without the final line-break).
+        urls: The source URLs, in order.
+        jobs: Max number of concurrent downloads.
+        coalesce: Fetch all toptal API URLs with single request.
+        options: The options of the build (see ``BuildOptions``).
+
+    Returns:
+        The updated contents (equal to the given text if nothing changed)
+        and the URLs of the added, changed or removed source sections.
+    """
+
+    sections = parse_source_sections(text)
+    preamble = sections.pop(0).lines if sections and sections[0].url is None else []
+
+    plan = _create_fetch_plan(urls, coalesce, options.fetch)
+    fetched = read_urls_as_text(plan.fetch_urls, jobs, options.fetch)
+    texts = plan.assemble(fetched, partial(read_url_as_text, options=options.fetch))
+
+    old_lines = {section.url: section.lines for section in sections}
+    chunks = ["\n".join(preamble)] if preamble else []
+    changed = []
+    built = set()
+    built_text = "".join(iter_sources_text(zip(urls, texts), options))
+    for section in parse_source_sections(built_text):
+        built.add(section.url)
+        chunks.append("\n".join(section.lines))
+        if old_lines.get(section.url) != section.lines:
+            changed.append(section.url)
+
+    changed.extend(url for url in old_lines if url not in built)
+    _log.info("Changed %s of %s source sections", len(changed), len(urls))
+    return "\n".join(chunks), changed
+
+
+async def build_gitignore_contents_async(
+    urls: Sequence[str], coalesce: bool = True, options: BuildOptions = BuildOptions()
+) -> str:
+    """Asyncio counterpart of ``build_gitignore_contents``.
+
+    All URLs are downloaded concurrently without blocking the running event
+    loop (see ``io_util.read_url_as_text_async``), then merged in the original
+    URL order exactly like the blocking version.
+    """
 
-    return "\n".join(lines)
+    plan = _create_fetch_plan(urls, coalesce, options.fetch)
+    fetched = await read_urls_as_text_async(plan.fetch_urls, options.fetch)
+    unsplit_urls = plan.find_unsplit_urls(fetched)
+    unsplit_texts = await read_urls_as_text_async(unsplit_urls, options.fetch)
+    texts = plan.assemble(fetched, dict(zip(unsplit_urls, unsplit_texts)).get)
+    return "".join(iter_sources_text(zip(urls, texts), options))
@@ -0,0 +1,377 @@
+"""This module defines the persistent on-disk cache of downloaded URL contents.
+
+The cache is a content-addressed store: each downloaded body is saved once
+under its SHA-256 digest, and a small JSON file per URL records the digest
+along with the response validators (``ETag``/``Last-Modified``). This allows
+making later downloads conditional, reusing the stored body when the server
+replies with 304, and building without any network access at all.
+"""
+import hashlib
+import json
+import logging
+import marshal
+import os
+import time
+from contextlib import suppress
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import platformdirs
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+APP_NAME = "gitignore-builder"
+
+OBJECTS_DIRNAME = "objects"
+
+URLS_DIRNAME = "urls"
+
+SNAPSHOTS_DIRNAME = "snapshots"
+
+
+class NotCachedError(LookupError):
+    """Raised when URL contents are required, but not present in the cache."""
+
+    def __init__(self, url: str):
+        super().__init__(
+            f"No cached contents for URL: '{url}'! "
+            "Run the build once while online to download it."
+        )
+        self.url = url
+
+
+class CacheEntry(NamedTuple):
+    """Cached contents of a URL along with the response validators."""
+
+    url: str
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+
+
+def get_cache_dir() -> Path:
+    """Returns path to folder for storing the app cache."""
+
+    return platformdirs.user_cache_path(
+        appname=APP_NAME,
+    )
+
+
+def compute_digest(text: str) -> str:
+    """Returns the content-address (SHA-256 hex digest) of the text."""
+
+    data = text.encode(encoding="utf-8", errors="surrogateescape")
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_object_file(digest: str) -> Path:
+    """Returns path to the file storing the body with the given digest."""
+
+    return get_cache_dir() / OBJECTS_DIRNAME / digest[:2] / digest[2:]
+
+
+def get_entry_file(url: str) -> Path:
+    """Returns path to the file storing the cache entry for the URL."""
+
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return get_cache_dir() / URLS_DIRNAME / f"{digest}.json"
+
+
+def _write_file_atomically(file: Path, data: bytes):
+    file.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(dir=file.parent, suffix=".tmp", delete=False) as temp_file:
+        temp_file.write(data)
+    os.replace(temp_file.name, file)
+
+
+def read_object(digest: str) -> Optional[str]:
+    """Returns the stored body with the given digest or None if missing."""
+
+    try:
+        data = get_object_file(digest).read_bytes()
+    except FileNotFoundError:
+        return None
+    return data.decode(encoding="utf-8", errors="surrogateescape")
+
+
+def write_object(text: str) -> str:
+    """Stores the body (unless already present) and returns its digest."""
+
+    digest = compute_digest(text)
+    file = get_object_file(digest)
+    if not file.exists():
+        data = text.encode(encoding="utf-8", errors="surrogateescape")
+        _write_file_atomically(file, data)
+    return digest
+
+
+def load_entry(url: str) -> Optional[CacheEntry]:
+    """Returns the cache entry for the URL or None if missing."""
+
+    file = get_entry_file(url)
+    try:
+        data = json.loads(file.read_text(encoding="utf-8"))
+        if data["url"] != url:
+            return None
+        body = read_object(data["digest"])
+        if body is None:
+            _log.warning("Missing cached body for URL: '%s'", url)
+            return None
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        _log.warning("Ignoring bad cache entry at: '%s'! Details: '%s'", file, e)
+        return None
+
+    return CacheEntry(
+        url=url,
+        body=body,
+        etag=data.get("etag"),
+        last_modified=data.get("last_modified"),
+        fetched_at=data.get("fetched_at", 0.0),
+    )
+
+
+def require_entry(url: str) -> CacheEntry:
+    """Returns the cache entry for the URL or raises ``NotCachedError``."""
+
+    entry = load_entry(url)
+    if entry is None:
+        raise NotCachedError(url)
+    return entry
+
+
+def save_entry(entry: CacheEntry):
+    """Stores the entry body and atomically replaces the URL index record."""
+
+    try:
+        digest = write_object(entry.body)
+    except Exception as e:
+        _log.warning("Could not save cached body of: '%s'! Details: '%s'", entry.url, e)
+        return
+
+    _save_record(entry._replace(body=""), digest)
+
+
+def _save_record(entry: CacheEntry, digest: str):
+    file = get_entry_file(entry.url)
+    try:
+        record = {
+            "url": entry.url,
+            "digest": digest,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "fetched_at": entry.fetched_at,
+        }
+        _write_file_atomically(file, json.dumps(record).encode("utf-8"))
+    except Exception as e:
+        _log.warning("Could not save cache entry at: '%s'! Details: '%s'", file, e)
+
+
+def iter_records() -> Iterator[Tuple[str, str]]:
+    """Yields the URL and the body digest of each stored cache entry.
+
+    The bodies are not read. Bad records are skipped.
+    """
+
+    folder = get_cache_dir() / URLS_DIRNAME
+    try:
+        files = sorted(folder.glob("*.json"))
+    except OSError:
+        return
+
+    for file in files:
+        try:
+            data = json.loads(file.read_text(encoding="utf-8"))
+            record = data["url"], data["digest"]
+        except Exception as e:
+            _log.warning("Ignoring bad cache entry at: '%s'! Details: '%s'", file, e)
+            continue
+        yield record
+
+
+def get_records_mtime_ns() -> int:
+    """Returns the last modification time of the stored cache entries.
+
+    It changes with each saved entry (the records are replaced atomically).
+    Returns 0 if there are no stored entries.
+    """
+
+    try:
+        return (get_cache_dir() / URLS_DIRNAME).stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def iter_stored_lines(
+    url: str, lines: Iterable[str], headers: Mapping[str, str]
+) -> Iterator[str]:
+    """Yields the lines, while storing them as the new cached body of the URL.
+
+    The body (the lines joined by ``"\\n"``) is digested and written to the
+    object store incrementally, so it is never held in memory as a whole.
+    The entry is saved only if all lines were consumed.
+
+    Args:
+        url: The requested URL.
+        lines: The lines of the response body.
+        headers: The response headers (case-insensitive lookup of lowercase names).
+    """
+
+    folder = get_cache_dir() / OBJECTS_DIRNAME
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        temp_file = NamedTemporaryFile(dir=folder, suffix=".tmp", delete=False)
+    except Exception as e:
+        _log.warning("Could not save cached body of: '%s'! Details: '%s'", url, e)
+        yield from lines
+        return
+
+    digest = hashlib.sha256()
+    completed = False
+    try:
+        with temp_file:
+            separator = b""
+            for line in lines:
+                data = separator + line.encode("utf-8", errors="surrogateescape")
+                digest.update(data)
+                temp_file.write(data)
+                separator = b"\n"
+                yield line
+        completed = True
+    finally:
+        if completed:
+            object_file = get_object_file(digest.hexdigest())
+            object_file.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_file.name, object_file)
+            entry = CacheEntry(
+                url=url,
+                body="",
+                etag=headers.get("etag"),
+                last_modified=headers.get("last-modified"),
+                fetched_at=time.time(),
+            )
+            _save_record(entry, digest.hexdigest())
+        else:
+            with suppress(OSError):
+                os.unlink(temp_file.name)
+
+
+def get_snapshot_file(file: Path) -> Path:
+    """Returns path to the file storing the data snapshot of the given file."""
+
+    digest = hashlib.sha256(str(file.resolve()).encode("utf-8")).hexdigest()
+    return get_cache_dir() / SNAPSHOTS_DIRNAME / f"{digest}.marshal"
+
+
+def _get_snapshot_key(file: Path) -> tuple:
+    stat = file.stat()
+    return str(file.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+def load_snapshot(file: Path) -> Optional[Any]:
+    """Returns the data snapshot of the file, if the file was not changed since.
+
+    The snapshot is keyed by the file path, modification time and size.
+    """
+
+    try:
+        key = _get_snapshot_key(file)
+        snapshot_file = get_snapshot_file(file)
+        if not snapshot_file.exists():
+            return None
+        snapshot_key, data = marshal.loads(snapshot_file.read_bytes())
+    except Exception as e:
+        _log.debug("Could not load data snapshot of: '%s'! Details: '%s'", file, e)
+        return None
+
+    return data if tuple(snapshot_key) == key else None
+
+
+def save_snapshot(file: Path, data: Any):
+    """Stores snapshot of the data loaded from the file.
+
+    Data of types unsupported by ``marshal`` is silently not stored.
+    """
+
+    try:
+        snapshot = marshal.dumps((_get_snapshot_key(file), data))
+        _write_file_atomically(get_snapshot_file(file), snapshot)
+    except Exception as e:
+        _log.debug("Could not save data snapshot of: '%s'! Details: '%s'", file, e)
+
+
+def is_fresh(entry: Optional[CacheEntry], ttl: float) -> bool:
+    """Returns True if the entry can be used without revalidation.
+
+    Args:
+        entry: The cache entry (if any).
+        ttl: The freshness window (in seconds) for skipping the revalidation.
+    """
+
+    if entry is None or ttl <= 0:
+        return False
+    return time.time() - entry.fetched_at < ttl
+
+
+def get_conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+    """Returns the request headers for revalidating the cache entry."""
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+def store_response(
+    url: str,
+    entry: Optional[CacheEntry],
+    status: int,
+    headers: Mapping[str, str],
+    text: str,
+) -> str:
+    """Updates the cache with the response and returns the resulting URL text.
+
+    Args:
+        url: The requested URL.
+        entry: The cache entry used for the conditional request (if any).
+        status: The HTTP status code of the response.
+        headers: The response headers (case-insensitive lookup of lowercase names).
+        text: The decoded response body.
+
+    Returns:
+        The cached body on 304, the response text otherwise.
+    """
+
+    now = time.time()
+
+    if status == 304 and entry is not None:
+        _log.debug("Not modified, reusing cached contents of: '%s'", url)
+        save_entry(entry._replace(fetched_at=now))
+        return entry.body
+
+    if status == 200:
+        save_entry(
+            CacheEntry(
+                url=url,
+                body=text,
+                etag=headers.get("etag"),
+                last_modified=headers.get("last-modified"),
+                fetched_at=now,
+            )
+        )
+
+    return text
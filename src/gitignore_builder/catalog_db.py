@@ -0,0 +1,235 @@
+"""This module defines SQLite-backed catalog of the recipes and templates.
+
+Unlike the YAML data-files, the catalog is not loaded as a whole: the rows
+of a recipe or template are read (through indexed lookups by name) only when
+it is used. The catalog can be imported from and exported to the data of the
+YAML data-files (mappings of recipe name to template names and of template
+name to URLs).
+"""
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+from gitignore_builder import tracing
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS template_urls (
+    template_id INTEGER NOT NULL REFERENCES templates (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (template_id, position)
+);
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS recipe_templates (
+    recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    template_name TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, position)
+);
+"""
+
+# table of the values of each catalog table, with its foreign key and value columns
+_VALUE_TABLES = {
+    "templates": ("template_urls", "template_id", "url"),
+    "recipes": ("recipe_templates", "recipe_id", "template_name"),
+}
+
+_RECIPE_URLS_QUERY = """
+SELECT template_urls.url
+FROM recipe_templates
+JOIN templates ON templates.name = recipe_templates.template_name
+JOIN template_urls ON template_urls.template_id = templates.id
+WHERE recipe_templates.recipe_id = ?
+ORDER BY recipe_templates.position, template_urls.position
+"""
+
+
+class CatalogTable(Mapping):
+    """Read-only mapping view of the recipes or templates table.
+
+    Maps each name to tuple of its values (template names or URLs), which
+    are queried upon each lookup, so no rows are loaded in advance.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, table: str, values: str):
+        self._connection = connection
+        self._table = table
+        self._values = values
+
+    def __getitem__(self, name: str) -> Tuple[str, ...]:
+        row = self._connection.execute(
+            f"SELECT id FROM {self._table} WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        rows = self._connection.execute(self._values, (row[0],))
+        return tuple(value for value, in rows)
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._connection.execute(f"SELECT name FROM {self._table} ORDER BY id")
+        return (name for name, in rows)
+
+    def __len__(self) -> int:
+        row = self._connection.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()
+        return row[0]
+
+    def __contains__(self, name) -> bool:
+        row = self._connection.execute(
+            f"SELECT 1 FROM {self._table} WHERE name = ?", (name,)
+        ).fetchone()
+        return row is not None
+
+
+class SqliteCatalog:
+    """Catalog of the recipes and templates stored in SQLite database file.
+
+    Args:
+        file: The database file, created if missing.
+
+    Attributes:
+        recipes: Mapping view of recipe name to its template names.
+        templates: Mapping view of template name to its URLs.
+    """
+
+    def __init__(self, file: Path):
+        self.file = file
+        file.parent.mkdir(parents=True, exist_ok=True)
+        with tracing.span("catalog_db.open", "config", file=str(file)):
+            self._connection = sqlite3.connect(str(file))
+            try:
+                self._connection.execute("PRAGMA foreign_keys = ON")
+                self._init_schema()
+            except Exception:
+                self._connection.close()
+                raise
+        self._recipe_urls: Dict[str, Tuple[str, ...]] = {}
+        self.recipes = CatalogTable(
+            self._connection,
+            "recipes",
+            "SELECT template_name FROM recipe_templates "
+            "WHERE recipe_id = ? ORDER BY position",
+        )
+        self.templates = CatalogTable(
+            self._connection,
+            "templates",
+            "SELECT url FROM template_urls WHERE template_id = ? ORDER BY position",
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self.file)!r})"
+
+    def _init_schema(self):
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        if version:
+            raise ValueError(
+                f"Unsupported catalog schema version: {version} (in: '{self.file}')"
+            )
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        """Closes the database connection."""
+
+        self._connection.close()
+
+    def get_recipe_urls(self, name: str) -> Optional[Tuple[str, ...]]:
+        """Returns the URLs of the recipe templates, None for unknown recipe.
+
+        URLs shared by several of the recipe templates are listed only once,
+        at the position of their first occurrence. The result is memoized.
+        """
+
+        urls = self._recipe_urls.get(name)
+        if urls is not None:
+            return urls
+
+        row = self._connection.execute(
+            "SELECT id FROM recipes WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        rows = self._connection.execute(_RECIPE_URLS_QUERY, (row[0],))
+        urls = tuple(dict.fromkeys(url for url, in rows))
+        self._recipe_urls[name] = urls
+        return urls
+
+    def import_data(
+        self,
+        recipes: Mapping[str, Iterable[str]],
+        templates: Mapping[str, Iterable[str]],
+        replace: bool = False,
+    ):
+        """Imports the recipes and templates (e.g. the YAML data-files data).
+
+        The imported recipes and templates replace the ones with same name.
+
+        Args:
+            recipes: Mapping of recipe name to its template names.
+            templates: Mapping of template name to its URLs.
+            replace: Delete all recipes and templates first.
+        """
+
+        with tracing.span("catalog_db.import_data", "config"), self._connection:
+            if replace:
+                self._connection.execute("DELETE FROM recipes")
+                self._connection.execute("DELETE FROM templates")
+            _import_rows(self._connection, "templates", templates)
+            _import_rows(self._connection, "recipes", recipes)
+        self._recipe_urls.clear()
+        _log.info(
+            "Imported %s recipes and %s templates into: '%s'",
+            len(recipes),
+            len(templates),
+            self.file,
+        )
+
+    def export_data(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """Returns the recipes and templates data, as stored in YAML data-files.
+
+        Returns:
+            Mapping of recipe name to its template names and mapping of
+            template name to its URLs.
+        """
+
+        recipes = {name: list(values) for name, values in self.recipes.items()}
+        templates = {name: list(values) for name, values in self.templates.items()}
+        return recipes, templates
+
+
+def _import_rows(
+    connection: sqlite3.Connection, table: str, data: Mapping[str, Iterable[str]]
+):
+    values_table, foreign_key, value_column = _VALUE_TABLES[table]
+    for name, values in data.items():
+        # the values of the replaced row are deleted by ON DELETE CASCADE
+        connection.execute(f"DELETE FROM {table} WHERE name = ?", (name,))
+        row_id = connection.execute(
+            f"INSERT INTO {table} (name) VALUES (?)", (name,)
+        ).lastrowid
+        connection.executemany(
+            f"INSERT INTO {values_table} ({foreign_key}, position, {value_column}) "
+            "VALUES (?, ?, ?)",
+            [(row_id, position, value) for position, value in enumerate(values)],
+        )
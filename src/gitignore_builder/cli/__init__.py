@@ -1,12 +1,22 @@
-"""This module defines the app CLI entry point."""
+"""This module defines the app CLI entry point.
+
+Importing this module must stay cheap: the app config is loaded and the heavy
+modules (``requests``, ``yaml``, ...) are imported only when actually needed,
+so e.g. ``--help`` and ``--version`` don't pay for them.
+"""
 # SPDX-FileCopyrightText: 2022-present Hrissimir <hrisimir.dakov@gmail.com>
 #
 # SPDX-License-Identifier: MIT
+# pylint: disable=import-outside-toplevel
+
+import sys
+import time
+from contextlib import contextmanager
+from itertools import chain
+from pathlib import Path
 
 import click
 
-from gitignore_builder import builder
-from gitignore_builder import datamodel
 from ..__about__ import __version__  # pylint: disable=relative-beyond-top-level
 
 CONTEXT_SETTINGS = {
@@ -16,18 +26,150 @@ CONTEXT_SETTINGS = {
     "max_content_width": 160,
 }
 
-datamodel.init()
+DEFAULT_JOBS = 8  # same as io_util.DEFAULT_JOBS, without importing it
+
+GITIGNORE_FILENAME = ".gitignore"
+
+_datamodel_initialized = False
+
+_datamodel_init_seconds = None
+
+
+def load_datamodel():
+    """Imports the datamodel module and initializes it upon first call."""
+
+    from gitignore_builder import datamodel
+
+    global _datamodel_initialized, _datamodel_init_seconds
+    if not _datamodel_initialized:
+        started = time.perf_counter()
+        datamodel.init()
+        _datamodel_init_seconds = time.perf_counter() - started
+        _datamodel_initialized = True
+
+    return datamodel
+
+
+class LazyChoice(click.Choice):
+    """Choice type which loads the valid choices upon first usage.
+
+    The help output shows the given metavar instead of listing the choices.
+    """
+
+    def __init__(self, load_choices, metavar: str):
+        self._load_choices = load_choices
+        self._choices = None
+        self._metavar = metavar
+        super().__init__(())
+
+    @property
+    def choices(self):
+        if self._choices is None:
+            self._choices = tuple(self._load_choices())
+        return self._choices
+
+    @choices.setter
+    def choices(self, value):
+        self._choices = tuple(value) or None
+
+    def get_metavar(self, param, *args, **kwargs):  # pylint: disable=unused-argument
+        return self._metavar
+
+
+class DefaultCommandGroup(click.Group):
+    """Group which invokes the default command unless a command is named.
+
+    So the group is used like the default command (e.g. ``gitignore-builder
+    RECIPE``), while the other commands are still available by name. A bare
+    help option shows the help of the group (listing the commands).
+    """
+
+    def __init__(self, *args, default_command: str, **kwargs):
+        self.default_command = default_command
+        super().__init__(*args, **kwargs)
+
+    def parse_args(self, ctx, args):
+        help_names = self.get_help_option_names(ctx)
+        if not args or (args[0] not in self.commands and args[0] not in help_names):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+def get_recipe_names():
+    """Returns the names of the recipes defined in the app config."""
+
+    return load_datamodel().get_recipe_names()
 
 
 def show_files(ctx, ignored_, value):
     if not value or ctx.resilient_parsing:
         return
+    from gitignore_builder import datamodel
+
     click.echo(f"recipes file: {datamodel.get_recipes_file()}")
     click.echo(f"templates file: {datamodel.get_templates_file()}")
+    click.echo(f"catalog file: {datamodel.get_catalog_file()}")
     ctx.exit()
 
 
-@click.command(context_settings=CONTEXT_SETTINGS, no_args_is_help=True)
+def start_trace(ctx, ignored_, value):
+    """Starts tracing the build, so the trace is written when done."""
+
+    if not value or ctx.resilient_parsing:
+        return
+    from gitignore_builder import tracing
+
+    exporter = tracing.ChromeTraceExporter()
+    tracing.add_hook(exporter)
+
+    def write_trace():
+        tracing.remove_hook(exporter)
+        exporter.write(value, {"command": " ".join(sys.argv)})
+
+    ctx.call_on_close(write_trace)
+
+
+@contextmanager
+def report_stats(show_stats, stats_format, show_pruned=False):
+    """Collects the stats of the builds within and prints them to stderr.
+
+    With ``show_pruned`` only the number of the pruned rules is printed,
+    unless ``show_stats``.
+    """
+
+    if not show_stats and not show_pruned:
+        yield
+        return
+
+    from gitignore_builder import stats
+
+    with stats.collect(trace_memory=show_stats) as build_stats:
+        yield
+    build_stats.config_seconds = _datamodel_init_seconds
+    if not show_stats:
+        pruned = build_stats.get_totals()["lines_pruned"]
+        click.echo(f"Pruned {pruned} rules covered by broader rules.", err=True)
+        return
+
+    if stats_format == "json":
+        click.echo(build_stats.format_json(), err=True)
+    else:
+        click.echo(build_stats.format_text(), err=True)
+
+
+@click.group(
+    cls=DefaultCommandGroup, default_command="build", context_settings=CONTEXT_SETTINGS
+)
+def gitignore_builder():
+    """Build .gitignore contents from recipe URLs (see the 'build' command).
+
+    The 'build' command is the default one, so 'gitignore-builder RECIPE'
+    builds the recipe. A recipe named like a command (e.g. 'which') is built
+    only with the explicit 'build' name: 'gitignore-builder build which'.
+    """
+
+
+@gitignore_builder.command(context_settings=CONTEXT_SETTINGS, no_args_is_help=True)
 @click.version_option(version=__version__, prog_name="gitignore-builder")
 @click.option(
     "--files",
@@ -37,16 +179,535 @@ def show_files(ctx, ignored_, value):
     is_eager=True,
     help="Show paths to app data-files and exit.",
 )
-@click.argument("recipe", type=click.Choice(datamodel.get_recipe_names()))
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_JOBS,
+    help="Max number of URLs to download concurrently. With 1 each URL is "
+    "streamed into the result, so the memory stays bounded for huge sources.",
+)
+@click.option(
+    "--ttl",
+    type=click.FloatRange(min=0),
+    default=0,
+    metavar="SECONDS",
+    help="Reuse cached URL contents younger than this without revalidation.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not read or write the cache of downloaded URL contents.",
+)
+@click.option(
+    "--coalesce/--no-coalesce",
+    default=True,
+    help="Fetch all toptal.com API URLs of the recipe with single request.",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Build only from the cached URL contents, without any network access.",
+)
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Build each output listed in YAML mapping of output file to recipe.",
+)
+@click.option(
+    "--all",
+    "all_dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    metavar="DIRECTORY",
+    help="Build each recipe into '<recipe>.gitignore' file in the directory.",
+)
+@click.option(
+    "-d",
+    "--dir",
+    "dirs",
+    multiple=True,
+    type=click.Path(file_okay=False, path_type=Path),
+    metavar="DIRECTORY",
+    help="Write the result of RECIPE to '.gitignore' file in the directory "
+    "(can be repeated).",
+)
+@click.option(
+    "--dirs-from",
+    type=click.File("r"),
+    metavar="FILE",
+    help="Like --dir, for each directory listed in the file (one per line).",
+)
+@click.option(
+    "--update",
+    is_flag=True,
+    help="Rebuild the existing OUTPUT file, downloading only the changed sources, "
+    "report the changed source sections and leave it untouched if nothing changed.",
+)
+@click.option(
+    "--dedup",
+    type=click.Choice(["exact", "canonical"]),
+    default="exact",
+    help="Drop the rules equal to already present ones (exact), or also the "
+    "equivalent ones, e.g. 'foo' and '**/foo' (canonical).",
+)
+@click.option(
+    "--spelling",
+    type=click.Choice(["first", "canonical"]),
+    default="first",
+    help="Which spelling of the equivalent rules to keep with --dedup=canonical.",
+)
+@click.option(
+    "--prune-subsumed",
+    is_flag=True,
+    help="Drop the rules covered by earlier broader rules, e.g. 'foo/*.pyc' "
+    "after '*.pyc', and report their number.",
+)
+@click.option(
+    "--stats",
+    "show_stats",
+    is_flag=True,
+    help="Print statistics of the build (per URL timings, sizes, cache usage "
+    "and dedup counts) to stderr.",
+)
+@click.option(
+    "--stats-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Format of the --stats output.",
+)
+@click.option(
+    "--trace",
+    type=click.Path(dir_okay=False, path_type=Path),
+    metavar="FILE",
+    callback=start_trace,
+    expose_value=False,
+    is_eager=True,
+    help="Write timeline of the build steps (config loading, each download "
+    "and section) to Chrome/Perfetto trace-event JSON file.",
+)
+@click.argument("recipe", type=LazyChoice(get_recipe_names, "RECIPE"), required=False)
 @click.argument("output", type=click.File("w"), default="-")
-def gitignore_builder(recipe, output):
-    """Build .gitignore contents from recipe URLs and write result to output."""
+def build(
+    recipe,
+    output,
+    jobs,
+    ttl,
+    no_cache,
+    coalesce,
+    offline,
+    manifest,
+    all_dir,
+    dirs,
+    dirs_from,
+    update,
+    dedup,
+    spelling,
+    prune_subsumed,
+    show_stats,
+    stats_format,
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Build .gitignore contents from recipe URLs and write result to output.
+
+    RECIPE is the name of a recipe defined in the recipes file (see --files).
+
+    With --manifest and/or --all many outputs are built in one go, downloading
+    the URLs shared between the recipes only once. With --dir and/or
+    --dirs-from the result of RECIPE is written to many directories.
+
+    Many outputs are written in parallel, atomically, and only if changed.
+
+    This is the default command, so the 'build' name can be omitted. See
+    'gitignore-builder analyze --help' for finding the rules of a .gitignore
+    file which match nothing in a project tree.
+    """
+
+    from gitignore_builder import builder
+    from gitignore_builder import io_util
+
+    if offline and no_cache:
+        raise click.UsageError("The --offline and --no-cache options are exclusive!")
+
+    fetch_options = io_util.FetchOptions(offline, ttl, use_cache=not no_cache)
+    options = builder.BuildOptions(dedup, spelling, prune_subsumed, fetch_options)
+
+    targets = get_batch_targets(recipe, manifest, all_dir, dirs, dirs_from)
+    if targets:
+        if update:
+            raise click.UsageError("The --update option is for single OUTPUT file!")
+        with report_stats(show_stats, stats_format, prune_subsumed):
+            build_batch(targets, jobs, coalesce, options)
+        return
+
+    if not recipe:
+        raise click.UsageError("Missing argument 'RECIPE'.")
+
+    with report_stats(show_stats, stats_format, prune_subsumed):
+        if update:
+            update_file(recipe, output, jobs, coalesce, options)
+        else:
+            build_file(recipe, output, jobs, coalesce, options)
+
+
+def build_file(recipe, output, jobs, coalesce, options):
+    """Builds the recipe and streams the result to the output.
+
+    The output file is replaced only after the whole result was written (to
+    temp file next to it), so a failed build leaves the existing file intact.
+    """
+
+    from gitignore_builder import builder
+    from gitignore_builder import cache
+    from gitignore_builder import io_util
+
+    datamodel = load_datamodel()
 
     click.echo(f"Building .gitignore contents using recipe: '{recipe}' ...")
+    click.echo(f"Writing the result to: '{output}' ...")
     urls = datamodel.get_recipe_urls(recipe)
-    text = builder.build_gitignore_contents(urls)
+    try:
+        chunks = builder.iter_gitignore_contents(urls, jobs, coalesce, options)
+        if output.name == "-":
+            for chunk in chunks:
+                output.write(chunk)
+                output.flush()
+            output.write("\n")
+        else:
+            io_util.write_chunks_to_file(chain(chunks, ["\n"]), Path(output.name))
+    except (cache.NotCachedError, IOError) as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        io_util.close_session()
+    click.echo("...all done!")
+
+
+def get_batch_targets(recipe, manifest, all_dir, dirs, dirs_from):
+    """Returns mapping of each output file of batch build to its recipe."""
+
+    datamodel = load_datamodel()
+
+    targets = {}
+    if manifest:
+        try:
+            targets.update(datamodel.load_manifest(manifest))
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--manifest") from e
+    if all_dir:
+        for name in datamodel.get_recipe_names():
+            targets[all_dir / f"{name}.gitignore"] = name
+    if targets and recipe:
+        raise click.UsageError(
+            "The RECIPE argument can't be combined with --manifest or --all!"
+        )
+
+    dirs = list(dirs)
+    if dirs_from:
+        dirs.extend(Path(line.strip()) for line in dirs_from if line.strip())
+    if dirs:
+        if not recipe:
+            raise click.UsageError("The --dir and --dirs-from options require RECIPE!")
+        for folder in dirs:
+            targets[folder / GITIGNORE_FILENAME] = recipe
+
+    return targets
+
+
+def build_batch(targets, jobs, coalesce, options):
+    """Builds the recipe of each target output file and writes the results."""
+
+    from gitignore_builder import builder
+    from gitignore_builder import cache
+    from gitignore_builder import io_util
+
+    datamodel = load_datamodel()
+
+    recipes = list(dict.fromkeys(targets.values()))
+    click.echo(f"Building .gitignore contents of {len(recipes)} recipes ...")
+    sources = {name: datamodel.get_recipe_urls(name) for name in recipes}
+    try:
+        texts = builder.build_many_gitignore_contents(sources, jobs, coalesce, options)
+    except cache.NotCachedError as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        io_util.close_session()
     click.echo("...done!")
 
-    click.echo(f"Writing the result to: '{output}' ...")
-    click.echo(text, file=output)
+    click.echo(f"Writing {len(targets)} files ...")
+    texts = {file: texts[name] + "\n" for file, name in targets.items()}
+    report = io_util.write_texts_to_files(texts, jobs)
+    for file, error in report.failed:
+        click.echo(f"Failed to write: '{file}' ({error})", err=True)
+    click.echo(
+        f"...written: {len(report.written)}, "
+        f"skipped (unchanged): {len(report.skipped)}, "
+        f"failed: {len(report.failed)}"
+    )
+    if report.failed:
+        raise click.ClickException(f"Could not write {len(report.failed)} files!")
+    click.echo("...all done!")
+
+
+def update_file(recipe, output, jobs, coalesce, options):
+    """Updates the existing output file, writing it only if it was changed."""
+
+    from gitignore_builder import builder
+    from gitignore_builder import cache
+    from gitignore_builder import io_util
+
+    datamodel = load_datamodel()
+
+    file = Path(output.name)
+    if output.name == "-" or not file.is_file():
+        raise click.BadParameter(
+            "The --update option requires existing output file!", param_hint="OUTPUT"
+        )
+
+    click.echo(f"Updating .gitignore file: '{file}' using recipe: '{recipe}' ...")
+    text = io_util.read_file_as_text(file)
+    if text is None:
+        raise click.ClickException(f"Could not read the output file: '{file}'")
+
+    old_text = text[:-1] if text.endswith("\n") else text
+    urls = datamodel.get_recipe_urls(recipe)
+    try:
+        new_text, changed = builder.update_gitignore_contents(
+            old_text, urls, jobs, coalesce, options
+        )
+    except cache.NotCachedError as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        io_util.close_session()
+
+    if new_text == old_text:
+        click.echo("...no changes, the file was not written!")
+        return
+
+    for url in changed:
+        click.echo(f"Changed section of: '{url}'")
+    output.write(new_text + "\n")
+    click.echo("...all done!")
+
+
+@gitignore_builder.command(context_settings=CONTEXT_SETTINGS)
+@click.option(
+    "-r",
+    "--recipe",
+    type=LazyChoice(get_recipe_names, "RECIPE"),
+    help="Analyze the result of the recipe instead of an existing .gitignore file.",
+)
+@click.option(
+    "--gitignore",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    metavar="FILE",
+    help="Analyze this file instead of the '.gitignore' file in DIRECTORY.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_JOBS,
+    help="Max number of directories to scan (or URLs to download) concurrently.",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Build the --recipe only from the cached URL contents.",
+)
+@click.option(
+    "--dead-only",
+    is_flag=True,
+    help="List only the rules with zero hits.",
+)
+@click.option(
+    "--format",
+    "report_format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Format of the report.",
+)
+@click.option(
+    "--write-pruned",
+    type=click.Path(dir_okay=False, path_type=Path),
+    metavar="FILE",
+    help="Write the analyzed contents without the rules with zero hits to the "
+    "file (can be the analyzed one).",
+)
+@click.argument(
+    "directory",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    default=".",
+)
+def analyze(
+    recipe, gitignore, jobs, offline, dead_only, report_format, write_pruned, directory
+):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Count the hits of each .gitignore rule over the paths in DIRECTORY.
+
+    The tree is walked like git walks it (the ignored directories are not
+    entered) and each path is counted for the last rule matching it. The rules
+    with zero hits decide nothing in the tree, so removing them does not change
+    which of its paths are ignored.
+
+    The analyzed rules are the result of --recipe, the --gitignore file or
+    else the '.gitignore' file in DIRECTORY. The report is printed to stdout.
+    """
+
+    from gitignore_builder import analysis
+    from gitignore_builder import io_util
+
+    if recipe and gitignore:
+        raise click.UsageError("The --recipe and --gitignore options are exclusive!")
+
+    if recipe:
+        text = build_text(recipe, jobs, offline)
+    else:
+        file = gitignore or directory / GITIGNORE_FILENAME
+        if not file.is_file():
+            raise click.UsageError(
+                f"No .gitignore file to analyze: '{file}' (see --gitignore)"
+            )
+        text = io_util.read_file_as_text(file)
+        if text is None:
+            raise click.ClickException(f"Could not read the file: '{file}'")
+
+    click.echo(f"Analyzing the rules over the tree: '{directory}' ...", err=True)
+    result = analysis.analyze_tree(directory, text, jobs)
+    if report_format == "json":
+        click.echo(result.format_json())
+    else:
+        click.echo(result.format_text(dead_only))
+
+    if write_pruned:
+        pruned = len(result.get_dead_rules())
+        click.echo(f"Writing without {pruned} rules to: '{write_pruned}' ...", err=True)
+        io_util.write_text_to_file(result.prune(), write_pruned)
+    click.echo("...all done!", err=True)
+
+
+def build_text(recipe, jobs, offline):
+    """Builds the recipe and returns the result (without the final line-break)."""
+
+    from gitignore_builder import builder
+    from gitignore_builder import cache
+    from gitignore_builder import io_util
+
+    datamodel = load_datamodel()
+
+    options = builder.BuildOptions(fetch=io_util.FetchOptions(offline=offline))
+    click.echo(f"Building .gitignore contents using recipe: '{recipe}' ...", err=True)
+    urls = datamodel.get_recipe_urls(recipe)
+    try:
+        return builder.build_gitignore_contents(urls, jobs, options=options)
+    except cache.NotCachedError as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        io_util.close_session()
+
+
+@gitignore_builder.command(context_settings=CONTEXT_SETTINGS)
+@click.argument("pattern")
+def which(pattern):
+    """Show the cached URLs (and their templates) containing the PATTERN rule.
+
+    The equivalent rules (e.g. '**/foo' and 'foo') are found as well. The
+    answer comes from index of the rules of the cached URL contents, updated
+    with the contents changed since the last call, so nothing is downloaded.
+    Only URLs downloaded by earlier builds are known.
+    """
+
+    from gitignore_builder import pattern_index
+
+    datamodel = load_datamodel()
+
+    sources = pattern_index.find_pattern_sources(pattern, datamodel.get_templates())
+    if not sources:
+        raise click.ClickException(f"No cached URL contains the rule: '{pattern}'")
+    for source in sources:
+        templates = ", ".join(source.templates) or "-"
+        click.echo(f"{source.url} (templates: {templates})")
+
+
+@gitignore_builder.group(context_settings=CONTEXT_SETTINGS)
+def catalog():
+    """Import or export the SQLite catalog of the recipes and templates.
+
+    Once the catalog file exists (see 'gitignore-builder --files'), the recipes
+    and templates are looked-up in it instead of the YAML data-files, reading
+    only the rows of the used ones.
+    """
+
+
+@catalog.command("import")
+@click.option(
+    "--recipes",
+    "recipes_file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    metavar="FILE",
+    help="Import the recipes from this YAML file instead of the recipes file.",
+)
+@click.option(
+    "--templates",
+    "templates_file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    metavar="FILE",
+    help="Import the templates from this YAML file instead of the templates file.",
+)
+@click.option(
+    "--replace",
+    is_flag=True,
+    help="Delete all recipes and templates of the catalog first.",
+)
+def import_catalog(recipes_file, templates_file, replace):
+    """Import the recipes and templates from YAML files into the catalog.
+
+    Imported recipes and templates replace the ones with same name.
+    """
+
+    from gitignore_builder import datamodel
+    from gitignore_builder import io_util
+
+    data = {}
+    for name, file in (
+        ("recipes", recipes_file or datamodel.get_recipes_file()),
+        ("templates", templates_file or datamodel.get_templates_file()),
+    ):
+        if not file.is_file():
+            raise click.UsageError(f"No {name} file to import: '{file}'")
+        data[name] = datamodel.freeze_catalog(io_util.read_file_as_data(file))
+        if not data[name]:
+            raise click.UsageError(f"No {name} data to import in: '{file}'")
+
+    db = datamodel.open_catalog()
+    click.echo(f"Importing into catalog file: '{db.file}' ...")
+    try:
+        db.import_data(data["recipes"], data["templates"], replace)
+        click.echo(
+            f"...catalog has {len(db.recipes)} recipes and "
+            f"{len(db.templates)} templates, all done!"
+        )
+    finally:
+        db.close()
+
+
+@catalog.command("export")
+@click.argument("directory", type=click.Path(file_okay=False, path_type=Path))
+def export_catalog(directory):
+    """Export the catalog as recipes and templates YAML files in DIRECTORY."""
+
+    from gitignore_builder import datamodel
+    from gitignore_builder import io_util
+
+    file = datamodel.get_catalog_file()
+    if not file.is_file():
+        raise click.UsageError(f"No catalog file to export: '{file}'")
+
+    db = datamodel.open_catalog(file)
+    try:
+        recipes, templates = db.export_data()
+    finally:
+        db.close()
+    for name, data in (
+        (datamodel.RECIPES_FILENAME, recipes),
+        (datamodel.TEMPLATES_FILENAME, templates),
+    ):
+        click.echo(f"Writing {len(data)} entries to: '{directory / name}' ...")
+        io_util.write_data_to_file(data, directory / name)
     click.echo("...all done!")
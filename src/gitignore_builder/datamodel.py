@@ -1,14 +1,20 @@
 """This module defines the API methods for the gitignore_builder.config package.
 """
 import logging
-from copy import deepcopy
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+from typing import Dict
 from typing import List
+from typing import Mapping
 from typing import Optional
+from typing import Tuple
 
 import platformdirs
 
 from gitignore_builder import io_util
+from gitignore_builder import tracing
+from gitignore_builder.catalog_db import SqliteCatalog
 
 _log = logging.getLogger(__name__)
 _log.addHandler(logging.NullHandler())
@@ -103,9 +109,41 @@ _DEFAULT_RECIPES = {
     ],
 }
 
-_recipes: Optional[dict] = None
+Catalog = Mapping[str, Tuple[str, ...]]
 
-_templates: Optional[dict] = None
+
+def freeze_catalog(data: Any) -> Catalog:
+    """Returns read-only view of recipes/templates data with tuple values.
+
+    Malformed data (not a mapping) results in empty catalog.
+    """
+
+    if not isinstance(data, Mapping):
+        if data is not None:
+            _log.error("Bad catalog data! Expected mapping, got: '%s'", type(data))
+        return MappingProxyType({})
+
+    frozen = {}
+    for name, values in data.items():
+        if values is None:
+            values = ()
+        elif isinstance(values, str):
+            values = (values,)
+        frozen[name] = tuple(values)
+    return MappingProxyType(frozen)
+
+
+_FROZEN_DEFAULT_TEMPLATES = freeze_catalog(_DEFAULT_TEMPLATES)
+
+_FROZEN_DEFAULT_RECIPES = freeze_catalog(_DEFAULT_RECIPES)
+
+_recipes: Optional[Catalog] = None
+
+_templates: Optional[Catalog] = None
+
+_recipe_urls_index: Optional[Dict[str, Tuple[str, ...]]] = None
+
+_catalog: Optional[SqliteCatalog] = None
 
 APP_NAME = "gitignore-builder"
 
@@ -113,6 +151,8 @@ RECIPES_FILENAME = "recipes.yaml"
 
 TEMPLATES_FILENAME = "templates.yaml"
 
+CATALOG_FILENAME = "catalog.sqlite3"
+
 
 def get_config_dir() -> Path:
     """Returns path to folder for storing the app configuration."""
@@ -122,18 +162,49 @@ def get_config_dir() -> Path:
     )
 
 
-def set_recipes(recipes: dict):
-    """Set the recipes data to be used by the module."""
+def set_recipes(recipes: Optional[Mapping]):
+    """Set the recipes data to be used by the module (None for the defaults)."""
+
+    global _recipes, _recipe_urls_index
+    _recipes = freeze_catalog(recipes) if recipes else None
+    _recipe_urls_index = None
+
+
+def set_templates(templates: Optional[Mapping]):
+    """Set the templates data to be used by the module (None for the defaults)."""
+
+    global _templates, _recipe_urls_index
+    _templates = freeze_catalog(templates) if templates else None
+    _recipe_urls_index = None
+
+
+def set_catalog(catalog: Optional[SqliteCatalog]):
+    """Set the SQLite catalog to be used instead of the recipes/templates data.
+
+    None restores the usage of the recipes/templates data.
+    """
+
+    global _catalog, _recipe_urls_index
+    _catalog = catalog
+    _recipe_urls_index = None
+
+
+def get_catalog() -> Optional[SqliteCatalog]:
+    """Returns the SQLite catalog in use, None if not using catalog."""
+
+    return _catalog
+
 
-    global _recipes
-    _recipes = recipes
+def get_catalog_file() -> Path:
+    """Returns path to the SQLite catalog file."""
 
+    return get_config_dir() / CATALOG_FILENAME
 
-def set_templates(templates: dict):
-    """Set the templates data to be used by the module."""
 
-    global _templates
-    _templates = templates
+def open_catalog(file: Optional[Path] = None) -> SqliteCatalog:
+    """Opens the SQLite catalog file (the app one by default), creates if missing."""
+
+    return SqliteCatalog(file or get_catalog_file())
 
 
 def get_recipes_file() -> Path:
@@ -159,7 +230,8 @@ def load_recipes():
 
     try:
         _log.info("Loading recipes data from file: '%s'", file)
-        recipes = io_util.read_file_as_data(file)
+        with tracing.span("datamodel.load_recipes", "config", file=str(file)):
+            recipes = io_util.read_file_as_data(file)
     except Exception as e:
         _log.warning("Error while loading recipes from file: '%s'", e)
         _log.warning("Using bundled recipes data as fallback value!")
@@ -192,7 +264,8 @@ def load_templates():
 
     try:
         _log.info("Loading templates data from file: '%s'", file)
-        templates = io_util.read_file_as_data(file)
+        with tracing.span("datamodel.load_templates", "config", file=str(file)):
+            templates = io_util.read_file_as_data(file)
     except Exception as e:
         _log.warning("Error while loading templates from file: '%s'", e)
         _log.warning("Using bundled templates data as fallback value!")
@@ -203,17 +276,32 @@ def load_templates():
 
 
 def init():
-    """Call this to initialize the module before interaction."""
+    """Call this to initialize the module before interaction.
+
+    If the SQLite catalog file exists, it is used instead of the recipes and
+    templates data-files, which are then not loaded at all.
+    """
 
-    load_recipes()
-    load_templates()
+    with tracing.span("datamodel.init", "config"):
+        file = get_catalog_file()
+        if file.exists():
+            _log.info("Using the catalog file: '%s'", file)
+            try:
+                set_catalog(open_catalog(file))
+                return
+            except Exception as e:
+                _log.error("Error while opening the catalog file: '%s'", e)
+                _log.warning("Using the recipes and templates data-files instead!")
+        load_recipes()
+        load_templates()
 
 
-def get_recipes() -> Optional[dict]:
-    """Returns the currently available recipes."""
+def get_recipes() -> Catalog:
+    """Returns read-only view of the currently available recipes."""
 
-    global _recipes
-    return _recipes if _recipes else deepcopy(_DEFAULT_RECIPES)
+    if _catalog is not None:
+        return _catalog.recipes
+    return _recipes if _recipes else _FROZEN_DEFAULT_RECIPES
 
 
 def get_recipe_names() -> List[str]:
@@ -225,7 +313,7 @@ def get_recipe_names() -> List[str]:
     return []
 
 
-def get_recipe_templates(name: str) -> Optional[List[str]]:
+def get_recipe_templates(name: str) -> Optional[Tuple[str, ...]]:
     """Call this to get list of template-names for a given recipe."""
 
     recipes = get_recipes()
@@ -245,11 +333,12 @@ def get_recipe_templates(name: str) -> Optional[List[str]]:
     return None
 
 
-def get_templates() -> Optional[dict]:
-    """Returns the currently available templates."""
+def get_templates() -> Catalog:
+    """Returns read-only view of the currently available templates."""
 
-    global _templates
-    return _templates if _templates else deepcopy(_DEFAULT_TEMPLATES)
+    if _catalog is not None:
+        return _catalog.templates
+    return _templates if _templates else _FROZEN_DEFAULT_TEMPLATES
 
 
 def get_template_names() -> List[str]:
@@ -261,7 +350,7 @@ def get_template_names() -> List[str]:
     return []
 
 
-def get_template_urls(name: str) -> Optional[List[str]]:
+def get_template_urls(name: str) -> Optional[Tuple[str, ...]]:
     """Call this to list of URLs defined by a given template."""
 
     templates = get_templates()
@@ -283,13 +372,17 @@ def get_template_urls(name: str) -> Optional[List[str]]:
     return None
 
 
-def get_recipe_urls(recipe_name: str) -> List[str]:
-    """Call this to construct list of all template-urls for a given recipe."""
+def resolve_recipe_urls(recipe_name: str) -> Tuple[str, ...]:
+    """Call this to construct tuple of all template-urls for a given recipe.
+
+    URLs shared by several of the recipe templates are listed only once,
+    at the position of their first occurrence.
+    """
 
     recipe_templates = get_recipe_templates(recipe_name)
     if not recipe_templates:
         _log.warning("Got NO recipe template names!")
-        return []
+        return ()
 
     result = []
 
@@ -299,4 +392,74 @@ def get_recipe_urls(recipe_name: str) -> List[str]:
             continue
         result.extend(template_urls)
 
-    return result
+    return tuple(dict.fromkeys(result))
+
+
+def get_recipe_urls_index() -> Mapping[str, Tuple[str, ...]]:
+    """Returns read-only mapping of each recipe name to its resolved URLs.
+
+    The index is built upon first call after the recipes/templates were set.
+    """
+
+    global _recipe_urls_index
+    index = _recipe_urls_index
+    if index is None:
+        with tracing.span("datamodel.get_recipe_urls_index", "config"):
+            index = {name: resolve_recipe_urls(name) for name in get_recipes()}
+        _recipe_urls_index = index
+    return MappingProxyType(index)
+
+
+def get_recipe_urls(recipe_name: str) -> Tuple[str, ...]:
+    """Call this to get tuple of all template-urls for a given recipe.
+
+    Looks-up the precomputed index (see ``get_recipe_urls_index``), so no
+    resolution or copying takes place on each call. With SQLite catalog only
+    the rows of the recipe are queried instead.
+    """
+
+    if _catalog is not None:
+        urls = _catalog.get_recipe_urls(recipe_name)
+        if urls is None:
+            _log.warning("Bad recipe name: '%s'!", recipe_name)
+            return ()
+        return urls
+
+    index = _recipe_urls_index
+    if index is None:
+        index = get_recipe_urls_index()
+
+    try:
+        return index[recipe_name]
+    except KeyError:
+        _log.warning(
+            "Bad recipe name: '%s'! Valid recipe names: '%s'",
+            recipe_name,
+            get_recipe_names(),
+        )
+        return ()
+
+
+def load_manifest(file: Path) -> Dict[Path, str]:
+    """Loads batch manifest mapping output files to the recipes to build them.
+
+    The manifest is YAML mapping of output file path to recipe name, e.g.
+    ``projects/api/.gitignore: python``. Relative paths are resolved against
+    the folder of the manifest file.
+
+    Raises:
+        ValueError: If the manifest can't be loaded or refers unknown recipe.
+    """
+
+    data = io_util.read_file_as_data(file)
+    if not isinstance(data, Mapping) or not data:
+        raise ValueError(f"Expected non-empty mapping of output to recipe in: '{file}'")
+
+    recipe_names = set(get_recipe_names())
+    targets = {}
+    for output, recipe in data.items():
+        if recipe not in recipe_names:
+            raise ValueError(f"Bad recipe name: '{recipe}' (for output: '{output}')")
+        targets[file.parent / str(output)] = recipe
+
+    return targets
@@ -1,14 +1,153 @@
 """Helper module for IO-related operations."""
+import asyncio
+import hashlib
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from functools import partial
 from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
 
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+
+from gitignore_builder import cache
+from gitignore_builder import stats
+from gitignore_builder import tracing
 
 _log = logging.getLogger(__name__)
 _log.addHandler(logging.NullHandler())
 
+DEFAULT_JOBS = 8
+
+DEFAULT_TIMEOUT = 10
+
+POOL_CONNECTIONS = 8
+
+POOL_MAXSIZE = 16
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+_YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+_session: Optional[requests.Session] = None
+
+_session_lock = threading.Lock()
+
+_memo: Dict[str, str] = {}
+
+_memo_locks: Dict[str, threading.Lock] = {}
+
+_memo_lock = threading.Lock()
+
+
+def _read_umask() -> int:
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+_new_file_mode = 0o666 & ~_read_umask()
+
+
+class FetchOptions(NamedTuple):
+    """Options of reading the URL contents, given along with each read.
+
+    Attributes:
+        offline: Read the URL contents only from the cache, without any
+            network access.
+        ttl: Reuse cached contents younger than this (in seconds) without
+            revalidation.
+        use_cache: Read and write the cache of downloaded URL contents.
+    """
+
+    offline: bool = False
+    ttl: float = 0.0
+    use_cache: bool = True
+
+
+def create_session(
+    pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE
+) -> requests.Session:
+    """Creates HTTP session with pooled keep-alive connections.
+
+    Args:
+        pool_connections: Number of per-host connection pools to keep.
+        pool_maxsize: Max number of connections kept alive per host.
+    """
+
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Returns the shared HTTP session, creating it upon first usage.
+
+    Reusing the session across all URLs (and across builds in a long-lived
+    process) avoids paying for new TCP/TLS handshakes to the same hosts.
+    """
+
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def set_session(session: Optional[requests.Session]):
+    """Set the HTTP session to be used for downloading URL contents.
+
+    The caller remains responsible for closing the injected session.
+    """
+
+    global _session
+    with _session_lock:
+        _session = session
+
+
+def close_session():
+    """Closes the shared HTTP session and its pooled connections."""
+
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def clear_memo():
+    """Forgets the URL contents memorized by this process.
+
+    Long-lived processes should call this to pick-up changes of the sources.
+    """
+
+    with _memo_lock:
+        _memo.clear()
+        _memo_locks.clear()
+
+
+def _get_memo_lock(url: str) -> threading.Lock:
+    with _memo_lock:
+        return _memo_locks.setdefault(url, threading.Lock())
+
 
 def format_data_to_yaml(data: dict) -> Optional[str]:
     """Serialize dict data to YAML string."""
@@ -16,7 +155,7 @@ def format_data_to_yaml(data: dict) -> Optional[str]:
     try:
         return yaml.dump(
             data,
-            Dumper=yaml.SafeDumper,
+            Dumper=_YamlDumper,
             default_flow_style=False,
             sort_keys=False,
         )
@@ -29,7 +168,7 @@ def parse_data_from_yaml(text: str) -> Optional[dict]:
     """Deserialize data from YAML text."""
 
     try:
-        return yaml.load(text, Loader=yaml.SafeLoader)
+        return yaml.load(text, Loader=_YamlLoader)
     except Exception as e:
         _log.error("Error while parsing YAML data: '%s'", e)
         return None
@@ -50,9 +189,18 @@ def read_file_as_text(file: Path) -> Optional[str]:
 
 
 def read_file_as_data(file: Path) -> Optional[dict]:
-    """Parse and return data from YAML file."""
+    """Parse and return data from YAML file.
+
+    The parsed data is snapshot to the app cache, so unchanged files are later
+    loaded from the snapshot without parsing the YAML again.
+    """
 
     _log.info("Reading data from file: '%s'", file)
+    data = cache.load_snapshot(file)
+    if data is not None:
+        _log.info("...DONE! (from snapshot)")
+        return data
+
     text = read_file_as_text(file)
     if text is None:
         _log.error("...FAILED! (could not read the file)")
@@ -63,32 +211,308 @@ def read_file_as_data(file: Path) -> Optional[dict]:
         _log.error("...FAILED! (could not parse the data)")
         return None
 
+    cache.save_snapshot(file, data)
     _log.info("...DONE!")
     return data
 
 
-def read_url_as_text(url: str) -> Optional[str]:
+def read_url_as_text(url: str, options: FetchOptions = FetchOptions()) -> Optional[str]:
     """Call this to retrieve text contents from a given URL.
 
     Args:
         url(str): Target URL
+        options(FetchOptions): How to use the cache and the network.
 
     Returns:
         str: The URL contents upon success, None in all other cases.
+
+    Raises:
+        cache.NotCachedError: In offline mode, if the URL is not in the cache.
+
+    Note:
+        The contents are memorized, so each URL is downloaded at most once per
+        process, even when requested concurrently (see ``clear_memo``).
     """
 
+    with tracing.span("io_util.read_url_as_text", "fetch", url=url):
+        with _get_memo_lock(url):
+            text = _memo.get(url)
+            if text is None:
+                text = _download_url_as_text(url, options)
+                if text is not None:
+                    _memo[url] = text
+            else:
+                stats.record_fetch(url, time.perf_counter(), "memo", text=text)
+            return text
+
+
+def _download_url_as_text(url: str, options: FetchOptions) -> Optional[str]:
+    """Retrieves the URL contents using the cache and the shared HTTP session."""
+
     _log.info("Reading text from URL: '%s' ...", url)
+    started = time.perf_counter()
+
+    if options.offline:
+        text = _read_url_offline(url)
+        stats.record_fetch(url, started, "hit", text=text)
+        return text
 
+    entry = cache.load_entry(url) if options.use_cache else None
+    if cache.is_fresh(entry, options.ttl):
+        _log.info("...DONE! (fresh in cache)")
+        stats.record_fetch(url, started, "hit", text=entry.body)
+        return entry.body
+
+    status = None
     try:
-        with requests.get(url, allow_redirects=True, timeout=10) as response:
+        with get_session().get(
+            url,
+            allow_redirects=True,
+            timeout=DEFAULT_TIMEOUT,
+            headers=cache.get_conditional_headers(entry),
+        ) as response:
+            status = response.status_code
+            _check_response_status(url, status, entry)
             text = response.text
+            if options.use_cache:
+                text = cache.store_response(url, entry, status, response.headers, text)
 
         _log.info("...DONE!")
+        cache_state = _get_cache_state(status, entry)
+        stats.record_fetch(url, started, cache_state, status=status, text=text)
         return text
 
     except Exception as e:
-        _log.error("...ERROR! Details: '%s'", e)
-        return None
+        text = _handle_read_url_error(entry, e)
+        cache_state = _get_cache_state(None, entry)
+        stats.record_fetch(url, started, cache_state, status=status, text=text, error=e)
+        return text
+
+
+def _get_cache_state(status: Optional[int], entry: Optional[cache.CacheEntry]) -> str:
+    """Returns how the URL contents were obtained (see ``stats.UrlStats.cache``)."""
+
+    if entry is None:
+        return "miss"
+    if status is None:
+        return "fallback"
+    return "revalidated" if status == 304 else "miss"
+
+
+def _read_url_offline(url: str) -> str:
+    """Returns the cached URL contents or raises ``cache.NotCachedError``."""
+
+    entry = cache.require_entry(url)
+    _log.info("...DONE! (offline)")
+    return entry.body
+
+
+def _check_response_status(url: str, status: int, entry: Optional[cache.CacheEntry]):
+    """Raises ``IOError`` for responses without the URL contents.
+
+    Only "200 OK" and (when revalidating cache entry) "304 Not Modified"
+    provide the contents, all other responses (e.g. 404, 502) are errors.
+    """
+
+    if status != 200 and (status != 304 or entry is None):
+        raise IOError(f"Unexpected HTTP status {status} of URL: '{url}'")
+
+
+def _handle_read_url_error(
+    entry: Optional[cache.CacheEntry], error: Exception
+) -> Optional[str]:
+    """Falls back to the cached URL contents (if any) on download errors."""
+
+    if entry is not None:
+        _log.warning("...ERROR! Using the cached contents. Details: '%s'", error)
+        return entry.body
+
+    _log.error("...ERROR! Details: '%s'", error)
+    return None
+
+
+def _iter_text_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Yields the lines of the text chunks, exactly as ``text.split("\\n")``."""
+
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        yield from lines
+    yield pending
+
+
+def iter_url_lines(url: str, options: FetchOptions = FetchOptions()) -> Iterator[str]:
+    """Streaming counterpart of ``read_url_as_text``.
+
+    The response is streamed and yielded line by line (split by ``"\\n"``,
+    same as ``text.split("\\n")``), so the whole body is never held in
+    memory. Freshly downloaded contents are stored to the cache on the way,
+    but are not memorized.
+
+    Yields:
+        The lines of the URL contents. Nothing if the download fails (and
+        there are no cached contents) before yielding the first line.
+
+    Raises:
+        cache.NotCachedError: In offline mode, if the URL is not in the cache.
+        IOError: If the download fails after some lines were already yielded,
+            as those can't be taken back (the partial contents are not cached).
+    """
+
+    lines = _iter_url_lines(url, options)
+    if tracing.is_enabled():
+        lines = tracing.iter_traced(lines, "io_util.iter_url_lines", "fetch", url=url)
+    return lines
+
+
+def _iter_url_lines(url: str, options: FetchOptions) -> Iterator[str]:
+    start_time = time.perf_counter()
+    text = _memo.get(url)
+    if text is not None:
+        stats.record_fetch(url, start_time, "memo", text=text)
+        yield from text.split("\n")
+        return
+
+    _log.info("Streaming lines from URL: '%s' ...", url)
+
+    if options.offline:
+        text = _read_url_offline(url)
+        stats.record_fetch(url, start_time, "hit", text=text)
+        yield from text.split("\n")
+        return
+
+    entry = cache.load_entry(url) if options.use_cache else None
+    if cache.is_fresh(entry, options.ttl):
+        _log.info("...DONE! (fresh in cache)")
+        stats.record_fetch(url, start_time, "hit", text=entry.body)
+        yield from entry.body.split("\n")
+        return
+
+    collecting = stats.is_enabled()
+    status = None
+    size = -1
+    started = False
+    try:
+        with get_session().get(
+            url,
+            allow_redirects=True,
+            timeout=DEFAULT_TIMEOUT,
+            headers=cache.get_conditional_headers(entry),
+            stream=True,
+        ) as response:
+            status = response.status_code
+            _check_response_status(url, status, entry)
+            if status == 304:
+                lines = cache.store_response(url, entry, 304, response.headers, "")
+                lines = lines.split("\n")
+            else:
+                response.encoding = response.encoding or "utf-8"
+                chunks = response.iter_content(STREAM_CHUNK_SIZE, decode_unicode=True)
+                lines = _iter_text_lines(chunks)
+                if options.use_cache:
+                    lines = cache.iter_stored_lines(url, lines, response.headers)
+
+            for line in lines:
+                started = True
+                if collecting:
+                    size += stats.get_text_size(line) + 1
+                yield line
+
+        _log.info("...DONE!")
+        cache_state = _get_cache_state(status, entry)
+        stats.record_fetch(
+            url, start_time, cache_state, status=status, size=max(size, 0)
+        )
+
+    except Exception as e:
+        if started:
+            _log.error("...ERROR! (after partial contents) Details: '%s'", e)
+            stats.record_fetch(
+                url, start_time, "miss", status=status, size=size, error=e
+            )
+            raise IOError(
+                f"Download of URL: '{url}' failed part-way through! Details: '{e}'"
+            ) from e
+        text = _handle_read_url_error(entry, e)
+        cache_state = _get_cache_state(None, entry)
+        stats.record_fetch(
+            url, start_time, cache_state, status=status, text=text, error=e
+        )
+        if text is not None:
+            yield from text.split("\n")
+
+
+def read_urls_as_text(
+    urls: Sequence[str],
+    jobs: int = DEFAULT_JOBS,
+    options: FetchOptions = FetchOptions(),
+) -> Iterator[Optional[str]]:
+    """Call this to retrieve the text contents of several URLs concurrently.
+
+    The downloads are performed by a pool of at most ``jobs`` threads, but the
+    results are always yielded in the order of the given URLs.
+
+    Args:
+        urls: Target URLs.
+        jobs: Max number of concurrent downloads (1 means serial download).
+        options: How to use the cache and the network.
+
+    Yields:
+        The contents of each URL as returned by ``read_url_as_text``.
+    """
+
+    read_url = partial(read_url_as_text, options=options)
+    workers = min(jobs, len(urls))
+    if workers <= 1:
+        for url in urls:
+            yield read_url(url)
+        return
+
+    _log.info("Reading text from %s URLs using %s threads ...", len(urls), workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(read_url, urls)
+
+
+async def read_url_as_text_async(
+    url: str, options: FetchOptions = FetchOptions()
+) -> Optional[str]:
+    """Asyncio counterpart of ``read_url_as_text``.
+
+    The blocking ``read_url_as_text`` is run in the default executor of the
+    running loop, so the awaiting coroutine does not block the loop, while
+    sharing the HTTP session, the cache, the memorized contents (each URL is
+    downloaded once, even when requested concurrently) and the build stats
+    with the blocking callers.
+
+    Args:
+        url(str): Target URL
+        options(FetchOptions): How to use the cache and the network.
+
+    Returns:
+        str: The URL contents upon success, None in all other cases.
+
+    Raises:
+        cache.NotCachedError: In offline mode, if the URL is not in the cache.
+    """
+
+    read_url = partial(read_url_as_text, url, options=options)
+    return await asyncio.get_running_loop().run_in_executor(None, read_url)
+
+
+async def read_urls_as_text_async(
+    urls: Sequence[str], options: FetchOptions = FetchOptions()
+) -> List[Optional[str]]:
+    """Retrieves the text contents of all URLs, overlapping the downloads.
+
+    Returns:
+        List with the result of ``read_url_as_text_async`` for each URL,
+        in the order of the given URLs.
+    """
+
+    return list(
+        await asyncio.gather(*(read_url_as_text_async(url, options) for url in urls))
+    )
 
 
 def write_text_to_file(text: str, file: Path):
@@ -116,3 +540,137 @@ def write_data_to_file(data: dict, file: Path):
 
     text = format_data_to_yaml(data)
     write_text_to_file(text, file)
+
+
+class WriteReport(NamedTuple):
+    """Outcome of writing several files (see ``write_texts_to_files``)."""
+
+    written: List[Path]
+    skipped: List[Path]
+    failed: List[Tuple[Path, str]]
+
+
+def _compute_file_digest(file: Path) -> bytes:
+    digest = hashlib.sha256()
+    with file.open("rb") as stream:
+        for chunk in iter(lambda: stream.read(STREAM_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def write_text_if_changed(text: str, file: Path) -> bool:
+    """Atomically replaces the file contents with the text, unless the same.
+
+    The existing contents are compared by size and SHA-256 digest, so an
+    unchanged file keeps its modification time. Otherwise the text is written
+    to temp file next to the target, which then replaces it with a rename,
+    so readers never see partially written file. The permissions of an
+    existing file are kept, new file is created with the default permissions
+    of the process umask.
+
+    Returns:
+        True if the file was written, False if it was already up to date.
+    """
+
+    data = text.encode(encoding="utf-8", errors="surrogateescape")
+    try:
+        stat = file.stat()
+    except FileNotFoundError:
+        stat = None
+
+    if stat is not None and stat.st_size == len(data):
+        if _compute_file_digest(file) == hashlib.sha256(data).digest():
+            _log.debug("Skipping unchanged file: '%s'", file)
+            return False
+
+    _replace_file(file, [data], stat)
+    _log.debug("Written file: '%s'", file)
+    return True
+
+
+def write_chunks_to_file(chunks: Iterable[str], file: Path):
+    """Streams the text chunks to the file, replacing it only once all are written.
+
+    The chunks are written to temp file next to the target as they come (see
+    ``write_text_if_changed``), so if producing them fails part-way through,
+    the existing file is left untouched instead of being truncated.
+    """
+
+    try:
+        stat = file.stat()
+    except FileNotFoundError:
+        stat = None
+
+    data = (
+        chunk.encode(encoding="utf-8", errors="surrogateescape") for chunk in chunks
+    )
+    _replace_file(file, data, stat)
+    _log.debug("Written file: '%s'", file)
+
+
+def _replace_file(file: Path, data: Iterable[bytes], stat: Optional[os.stat_result]):
+    """Writes the data to temp file next to the file, then renames it over.
+
+    The permissions of the replaced file (if any) are kept, new files get
+    the default permissions of the process umask. The temp file is removed
+    if writing the data fails.
+    """
+
+    file.parent.mkdir(parents=True, exist_ok=True)
+    temp_name = None
+    try:
+        with NamedTemporaryFile(
+            dir=file.parent, prefix=f".{file.name}.", suffix=".tmp", delete=False
+        ) as temp_file:
+            temp_name = temp_file.name
+            for chunk in data:
+                temp_file.write(chunk)
+
+        mode = _new_file_mode if stat is None else stat.st_mode & 0o7777
+        os.chmod(temp_name, mode)
+        os.replace(temp_name, file)
+    except BaseException:
+        if temp_name is not None:
+            with suppress(OSError):
+                os.unlink(temp_name)
+        raise
+
+
+def write_texts_to_files(
+    targets: Mapping[Path, str], jobs: int = DEFAULT_JOBS
+) -> WriteReport:
+    """Writes the text of each target file (see ``write_text_if_changed``).
+
+    The files are written by a pool of at most ``jobs`` threads. Failures
+    don't stop the writing of the other files, but are reported instead.
+
+    Args:
+        targets: Mapping of target file to its text.
+        jobs: Max number of concurrent writes.
+    """
+
+    def write(file: Path) -> Tuple[Path, Optional[bool], Optional[str]]:
+        try:
+            return file, write_text_if_changed(targets[file], file), None
+        except Exception as e:
+            _log.error("Error while writing file: '%s'! Details: '%s'", file, e)
+            return file, None, str(e)
+
+    _log.info("Writing %s files using %s threads ...", len(targets), jobs)
+    report = WriteReport([], [], [])
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(targets)))) as executor:
+        for file, written, error in executor.map(write, targets):
+            if error is not None:
+                report.failed.append((file, error))
+            elif written:
+                report.written.append(file)
+            else:
+                report.skipped.append(file)
+
+    _log.info(
+        "...DONE! (written: %s, skipped: %s, failed: %s)",
+        len(report.written),
+        len(report.skipped),
+        len(report.failed),
+    )
+    return report
@@ -0,0 +1,444 @@
+"""This module defines matching of paths against compiled .gitignore rules.
+
+``IgnoreMatcher`` compiles the rules once, so matching a path does not loop
+over all of them. The rules matching literal names (e.g. ``.DS_Store``),
+extensions (e.g. ``*.pyc``) and anchored literal paths (e.g. ``/build/``)
+are looked-up in hash tables, and only the remaining wildcard rules are
+matched by single combined regex.
+"""
+import logging
+import re
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Pattern
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+from gitignore_builder.patterns import canonicalize
+from gitignore_builder.patterns import is_literal_segment
+from gitignore_builder.patterns import is_negation
+from gitignore_builder.patterns import split_rule
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+_LITERAL_HEAD = re.compile(r"^[^*?\[\]\\]*")
+
+_LITERAL_TAIL = re.compile(r"[^*?\[\]\\]*$")
+
+_POSIX_CLASSES = {
+    "alnum": "a-zA-Z0-9",
+    "alpha": "a-zA-Z",
+    "blank": " \\t",
+    "digit": "0-9",
+    "lower": "a-z",
+    "space": " \\t\\n\\r\\f\\v",
+    "upper": "A-Z",
+    "xdigit": "0-9A-Fa-f",
+}
+
+
+class Rule(NamedTuple):
+    """Compiled .gitignore rule.
+
+    Attributes:
+        index: Position of the rule among the compiled rules.
+        line: Position of the line of the rule among the compiled lines.
+        pattern: The rule pattern, as written.
+        negated: The rule re-includes the paths it matches ("!" rule).
+        dir_only: The rule matches only directories (trailing "/").
+    """
+
+    index: int
+    line: int
+    pattern: str
+    negated: bool
+    dir_only: bool
+
+
+def translate_glob_segment(segment: str) -> str:
+    """Returns regex matching the same names as the pattern path segment."""
+
+    result = []
+    index = 0
+    while index < len(segment):
+        char = segment[index]
+        index += 1
+        if char == "\\" and index < len(segment):
+            result.append(re.escape(segment[index]))
+            index += 1
+        elif char == "*":
+            while index < len(segment) and segment[index] == "*":
+                index += 1
+            result.append("[^/]*")
+        elif char == "?":
+            result.append("[^/]")
+        elif char == "[":
+            end = _find_class_end(segment, index)
+            if end < 0:
+                result.append(re.escape(char))
+            else:
+                result.append(_translate_class(segment[index:end]))
+                index = end + 1
+        else:
+            result.append(re.escape(char))
+    return "".join(result)
+
+
+def translate_rule(rule: str) -> Optional[str]:
+    """Returns regex matching the same relative paths as the rule.
+
+    The rule is expected in normal form (see ``patterns.canonicalize``),
+    without the "!". The trailing "/" is not taken into account.
+    Returns None for invalid rule.
+    """
+
+    anchored, _, segments = split_rule(rule)
+    if not segments:
+        return None
+
+    parts = [] if anchored else ["(?:.*/)?"]
+    for number, segment in enumerate(segments, start=1):
+        last = number == len(segments)
+        if segment == "**":
+            parts.append(".+" if last else "(?:.*/)?")
+        else:
+            parts.append(translate_glob_segment(segment) + ("" if last else "/"))
+    return "".join(parts)
+
+
+def _find_class_end(segment: str, start: int) -> int:
+    index = start
+    if index < len(segment) and segment[index] in "!^":
+        index += 1
+    if index < len(segment) and segment[index] == "]":
+        index += 1
+    while index < len(segment):
+        if segment.startswith("[:", index):
+            end = segment.find(":]", index + 2)
+            if end < 0:
+                return -1
+            index = end + 2
+        elif segment[index] == "]":
+            return index
+        else:
+            index += 1
+    return -1
+
+
+def _translate_class(body: str) -> str:
+    negated = body[:1] in ("!", "^")
+    if negated:
+        body = body[1:]
+    members = []
+    index = 0
+    while index < len(body):
+        if body.startswith("[:", index):
+            end = body.index(":]", index + 2)
+            name = body[index + 2 : end]
+            if name not in _POSIX_CLASSES:
+                raise ValueError(f"Unsupported character class: '[:{name}:]'")
+            members.append(_POSIX_CLASSES[name])
+            index = end + 2
+            continue
+        char = body[index]
+        if char == "\\" and index + 1 < len(body):
+            index += 1
+            char = body[index]
+        if char == "-" and members and index + 1 < len(body):
+            members.append("-")
+        else:
+            members.append(re.escape(char))
+        index += 1
+    # the wildcards never match the path separator
+    return "[" + ("^/" if negated else "") + "".join(members) + "]"
+
+
+class _WildcardBucket:
+    """Wildcard rules combined into single regex (one for dirs, one for files).
+
+    The alternatives of regex are tried in order, so with the rules ordered
+    from the last one, the first matching alternative is the last matching
+    rule.
+    """
+
+    def __init__(self, wildcards: List[Tuple[Rule, str]]):
+        ordered = wildcards[::-1]
+        self._dirs = _compile_alternatives(ordered)
+        self._files = _compile_alternatives(
+            [(rule, regex) for rule, regex in ordered if not rule.dir_only]
+        )
+
+    def find_rule(self, text: str, is_dir: bool) -> Optional[Rule]:
+        """Returns the last rule matching the text, None if no match."""
+
+        regex, rules = self._dirs if is_dir else self._files
+        if regex is None:
+            return None
+        match = regex.fullmatch(text)
+        return rules[match.lastindex - 1] if match is not None else None
+
+
+class _WildcardIndex:
+    """Wildcard rules grouped by literal key required in the matched text.
+
+    Each group is combined into ``_WildcardBucket``, so only the groups of
+    the keys present in the text are matched (besides the rules without key).
+    """
+
+    def __init__(self, wildcards: List[Tuple[Rule, str, Optional[Hashable]]]):
+        groups: Dict[Optional[Hashable], List[Tuple[Rule, str]]] = {}
+        for rule, regex, key in wildcards:
+            groups.setdefault(key, []).append((rule, regex))
+        self._unkeyed = _WildcardBucket(groups.pop(None, []))
+        self._buckets = {key: _WildcardBucket(group) for key, group in groups.items()}
+
+    def find_rule(
+        self, text: str, keys: Iterable[Hashable], is_dir: bool
+    ) -> Optional[Rule]:
+        """Returns the last rule matching the text, None if no match.
+
+        Args:
+            text: The matched text.
+            keys: The keys present in the text.
+            is_dir: The text is directory path (or name).
+        """
+
+        found = self._unkeyed.find_rule(text, is_dir)
+        if self._buckets:
+            for key in keys:
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    found = _get_later(found, bucket.find_rule(text, is_dir))
+        return found
+
+
+def _compile_alternatives(
+    wildcards: List[Tuple[Rule, str]],
+) -> Tuple[Optional[Pattern], List[Rule]]:
+    if not wildcards:
+        return None, []
+    regex = "|".join(f"({regex})" for _, regex in wildcards)
+    return re.compile(regex, re.DOTALL), [rule for rule, _ in wildcards]
+
+
+class IgnoreMatcher:
+    """Compiled .gitignore rules, matching paths like git does.
+
+    The paths are relative to the directory of the .gitignore file, with
+    "/" as separator. As in git, the last rule matching the path decides
+    if it is ignored, and all paths within ignored directory are ignored.
+
+    Args:
+        lines: The lines of .gitignore contents. Comments and empty lines
+            are skipped.
+
+    Attributes:
+        rules: The compiled rules, in order.
+        wildcards: Number of the rules matched by regex.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self.rules: List[Rule] = []
+        self._names: Dict[str, List[Rule]] = {}
+        self._extensions: Dict[str, List[Rule]] = {}
+        self._paths: Dict[str, List[Rule]] = {}
+        self._head_lengths: Set[int] = set()
+        self._tail_lengths: Set[int] = set()
+        name_wildcards: List[Tuple[Rule, str, Optional[Hashable]]] = []
+        path_wildcards: List[Tuple[Rule, str, Optional[Hashable]]] = []
+
+        for number, line in enumerate(lines):
+            pattern = _strip_line(line)
+            if pattern:
+                self._add_rule(number, pattern, name_wildcards, path_wildcards)
+
+        self.wildcards = len(name_wildcards) + len(path_wildcards)
+        self._name_wildcards = _WildcardIndex(name_wildcards)
+        self._path_wildcards = _WildcardIndex(path_wildcards)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(rules={len(self)}, wildcards={self.wildcards})"
+
+    def _add_rule(self, line: int, pattern: str, name_wildcards, path_wildcards):
+        rule = canonicalize(pattern)
+        negated = is_negation(rule)
+        if negated:
+            rule = rule[1:]
+        anchored, dir_only, segments = split_rule(rule)
+        if not segments:
+            _log.warning("Skipped invalid rule: '%s'", pattern)
+            return
+
+        compiled = Rule(len(self.rules), line, pattern, negated, dir_only)
+        literal = all(is_literal_segment(segment) for segment in segments)
+        name = segments[0]
+        try:
+            if not anchored and literal:
+                self._names.setdefault(name, []).append(compiled)
+            elif not anchored and name[:2] == "*." and is_literal_segment(name[2:]):
+                self._extensions.setdefault(name[2:], []).append(compiled)
+            elif anchored and literal:
+                self._paths.setdefault("/".join(segments), []).append(compiled)
+            elif not anchored and len(segments) == 1:
+                key = self._get_name_key(name)
+                name_wildcards.append((compiled, translate_glob_segment(name), key))
+            else:
+                keys = [key for key in segments if is_literal_segment(key)]
+                key = max(keys, key=len) if keys else None
+                path_wildcards.append((compiled, translate_rule(rule), key))
+        except ValueError as e:
+            _log.warning("Skipped rule: '%s'! Details: '%s'", pattern, e)
+            return
+        self.rules.append(compiled)
+
+    def _get_name_key(self, name: str) -> Optional[Tuple[bool, str]]:
+        """Returns the longer of the literal head and tail of the name pattern."""
+
+        head = _LITERAL_HEAD.search(name).group()
+        tail = _LITERAL_TAIL.search(name).group()
+        if not head and not tail:
+            return None
+        if len(tail) >= len(head):
+            self._tail_lengths.add(len(tail))
+            return True, tail
+        self._head_lengths.add(len(head))
+        return False, head
+
+    def _get_name_keys(self, name: str) -> List[Tuple[bool, str]]:
+        keys = [(True, name[-length:]) for length in self._tail_lengths]
+        keys.extend((False, name[:length]) for length in self._head_lengths)
+        return keys
+
+    def find_rule(self, path: str, is_dir: bool = False) -> Optional[Rule]:
+        """Returns the last rule matching the path itself, None if no match.
+
+        Unlike ``match``, the rules matching its parent directories are not
+        taken into account.
+        """
+
+        name = path.rpartition("/")[2]
+        extensions = _get_extensions(name)
+        found = _find_last(self._names.get(name), is_dir)
+        if self._extensions:
+            for extension in extensions:
+                rules = self._extensions.get(extension)
+                found = _get_later(found, _find_last(rules, is_dir))
+        if self._paths:
+            found = _get_later(found, _find_last(self._paths.get(path), is_dir))
+        rule = self._name_wildcards.find_rule(name, self._get_name_keys(name), is_dir)
+        found = _get_later(found, rule)
+        rule = self._path_wildcards.find_rule(path, set(path.split("/")), is_dir)
+        return _get_later(found, rule)
+
+    def is_ignored_self(self, path: str, is_dir: bool = False) -> bool:
+        """Returns True if the last rule matching the path itself ignores it."""
+
+        rule = self.find_rule(path, is_dir)
+        return rule is not None and not rule.negated
+
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        """Returns True if the path is ignored.
+
+        Args:
+            path: Path relative to the .gitignore directory, "/" separated.
+            is_dir: The path is directory.
+        """
+
+        path = _normalize_path(path)
+        start = path.find("/")
+        while start >= 0:
+            if self.is_ignored_self(path[:start], True):
+                return True
+            start = path.find("/", start + 1)
+        return self.is_ignored_self(path, is_dir)
+
+    def match_many(self, paths: Iterable[str]) -> Iterator[bool]:
+        """Yields for each path if it is ignored (see ``match``).
+
+        Paths ending with "/" are matched as directories. The results of
+        the parent directories are reused between the paths.
+        """
+
+        ignored_dirs: Dict[str, bool] = {}
+        for path in paths:
+            is_dir = path.endswith("/")
+            path = _normalize_path(path)
+            parent, _, _ = path.rpartition("/")
+            if parent and self._is_dir_ignored(parent, ignored_dirs):
+                yield True
+            else:
+                yield self.is_ignored_self(path, is_dir)
+
+    def _is_dir_ignored(self, path: str, ignored_dirs: Dict[str, bool]) -> bool:
+        ignored = ignored_dirs.get(path)
+        if ignored is None:
+            parent, _, _ = path.rpartition("/")
+            ignored = bool(parent) and self._is_dir_ignored(parent, ignored_dirs)
+            ignored = ignored or self.is_ignored_self(path, True)
+            ignored_dirs[path] = ignored
+        return ignored
+
+
+def compile_rules(rules: Union[str, Iterable[str]]) -> IgnoreMatcher:
+    """Compiles .gitignore contents (e.g. the result of a build) to matcher.
+
+    Args:
+        rules: The .gitignore contents as text, or as iterable of its lines.
+    """
+
+    if isinstance(rules, str):
+        rules = rules.split("\n")
+    return IgnoreMatcher(rules)
+
+
+def _strip_line(line: str) -> str:
+    line = line.rstrip("\r\n")
+    if not line or line.startswith("#"):
+        return ""
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "  # escaped trailing space
+    return stripped
+
+
+def _normalize_path(path: str) -> str:
+    if path.startswith("./"):
+        path = path[2:]
+    return path.strip("/")
+
+
+def _get_extensions(name: str) -> List[str]:
+    """Returns each part of the name following a dot (e.g. "tar.gz" and "gz")."""
+
+    extensions = []
+    dot = name.find(".")
+    while dot >= 0:
+        extensions.append(name[dot + 1 :])
+        dot = name.find(".", dot + 1)
+    return extensions
+
+
+def _find_last(rules: Optional[List[Rule]], is_dir: bool) -> Optional[Rule]:
+    if rules:
+        for rule in reversed(rules):
+            if is_dir or not rule.dir_only:
+                return rule
+    return None
+
+
+def _get_later(first: Optional[Rule], second: Optional[Rule]) -> Optional[Rule]:
+    if first is None:
+        return second
+    if second is None or second.index < first.index:
+        return first
+    return second
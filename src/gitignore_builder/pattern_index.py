@@ -0,0 +1,245 @@
+"""This module defines inverted index of the rules of the cached URL contents.
+
+The index maps each rule in normal form (see ``patterns.canonicalize``) to
+the URLs whose cached contents contain it, so the sources of a rule can be
+found without reading all the contents. The index is stored in the cache dir
+along with the digest of the indexed contents of each URL, and is updated
+incrementally: only the URLs whose cached contents changed are re-indexed.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from gitignore_builder import cache
+from gitignore_builder.patterns import canonicalize
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+INDEX_FILENAME = "pattern-index.json"
+
+INDEX_VERSION = 1
+
+# modification times this close to the update are not trusted, as the entries
+# saved later within the same filesystem timestamp tick would go unnoticed
+RACY_MTIME_NS = 2 * 10**9
+
+
+class PatternSource(NamedTuple):
+    """URL whose cached contents contain the rule, with the templates using it."""
+
+    url: str
+    templates: Tuple[str, ...]
+
+
+def extract_patterns(text: str) -> Set[str]:
+    """Returns the rules of .gitignore contents in normal form."""
+
+    patterns = set()
+    for line in text.split("\n"):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            patterns.add(canonicalize(line))
+    return patterns
+
+
+class PatternIndex:
+    """Inverted index of the rules of the cached URL contents.
+
+    Attributes:
+        records_mtime_ns: Modification time of the cache entries as of the
+            last update (see ``cache.get_records_mtime_ns``).
+    """
+
+    def __init__(self):
+        self.records_mtime_ns = 0
+        self._digests: Dict[str, str] = {}
+        self._urls: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def get_urls(self) -> List[str]:
+        """Returns the indexed URLs."""
+
+        return sorted(self._digests)
+
+    def find(self, pattern: str) -> List[str]:
+        """Returns the URLs whose indexed contents contain the (equivalent) rule."""
+
+        return sorted(self._urls.get(canonicalize(pattern.strip()), ()))
+
+    def add(self, url: str, text: str, digest: str):
+        """Indexes the contents of the URL, replacing the previous contents."""
+
+        self.remove(url)
+        for pattern in extract_patterns(text):
+            self._urls.setdefault(pattern, set()).add(url)
+        self._digests[url] = digest
+
+    def remove(self, url: str):
+        """Removes the URL from the index (if indexed)."""
+
+        digest = self._digests.pop(url, None)
+        if digest is None:
+            return
+        text = cache.read_object(digest)
+        patterns = extract_patterns(text) if text is not None else list(self._urls)
+        for pattern in patterns:
+            urls = self._urls.get(pattern)
+            if urls is not None:
+                urls.discard(url)
+                if not urls:
+                    del self._urls[pattern]
+
+    def update(self) -> List[str]:
+        """Re-indexes the URLs whose cached contents changed since last update.
+
+        The cache entries are listed only if some of them were saved since
+        (or if the last update was too close to the last save), and only the
+        contents of the changed ones are read.
+
+        Returns:
+            The added, changed or removed URLs.
+        """
+
+        mtime_ns = cache.get_records_mtime_ns()
+        if mtime_ns == self.records_mtime_ns:
+            return []
+
+        changed = []
+        present = set()
+        for url, digest in cache.iter_records():
+            present.add(url)
+            if self._digests.get(url) == digest:
+                continue
+            text = cache.read_object(digest)
+            if text is None:
+                _log.warning("Missing cached body for URL: '%s'", url)
+                continue
+            self.add(url, text, digest)
+            changed.append(url)
+
+        for url in set(self._digests) - present:
+            self.remove(url)
+            changed.append(url)
+
+        racy = time.time_ns() - mtime_ns < RACY_MTIME_NS
+        self.records_mtime_ns = 0 if racy else mtime_ns
+        _log.info("Re-indexed %s of %s URLs", len(changed), len(self._digests))
+        return changed
+
+    def to_dict(self) -> dict:
+        """Returns the index as JSON-serializable dict."""
+
+        return {
+            "version": INDEX_VERSION,
+            "records_mtime_ns": self.records_mtime_ns,
+            "digests": self._digests,
+            "patterns": {pattern: sorted(urls) for pattern, urls in self._urls.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "PatternIndex":
+        """Returns the index from dict created by ``to_dict``."""
+
+        index = cls()
+        if data.get("version") != INDEX_VERSION:
+            _log.info("Ignoring pattern index of other version!")
+            return index
+        index.records_mtime_ns = data["records_mtime_ns"]
+        index._digests = dict(data["digests"])
+        index._urls = {pattern: set(urls) for pattern, urls in data["patterns"].items()}
+        return index
+
+
+_index: Optional[PatternIndex] = None
+
+
+def get_index_file() -> Path:
+    """Returns path to the file storing the pattern index."""
+
+    return cache.get_cache_dir() / INDEX_FILENAME
+
+
+def load_index() -> PatternIndex:
+    """Returns the stored pattern index, empty index if missing or bad."""
+
+    file = get_index_file()
+    try:
+        return PatternIndex.from_dict(json.loads(file.read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        return PatternIndex()
+    except Exception as e:
+        _log.warning("Ignoring bad pattern index at: '%s'! Details: '%s'", file, e)
+        return PatternIndex()
+
+
+def save_index(index: PatternIndex):
+    """Stores the pattern index (atomically replacing the previous one)."""
+
+    file = get_index_file()
+    try:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(index.to_dict()).encode("utf-8")
+        with NamedTemporaryFile(dir=file.parent, suffix=".tmp", delete=False) as temp:
+            temp.write(data)
+        os.replace(temp.name, file)
+    except Exception as e:
+        _log.warning("Could not save pattern index at: '%s'! Details: '%s'", file, e)
+
+
+def get_index() -> PatternIndex:
+    """Returns the pattern index, updated with the changed cache entries.
+
+    The index is loaded upon first call and stored after each change.
+    """
+
+    global _index
+    if _index is None:
+        _index = load_index()
+    records_mtime_ns = _index.records_mtime_ns
+    if _index.update() or _index.records_mtime_ns != records_mtime_ns:
+        save_index(_index)
+    return _index
+
+
+def reset_index():
+    """Drops the loaded pattern index, so it is loaded anew upon next use."""
+
+    global _index
+    _index = None
+
+
+def find_pattern_sources(
+    pattern: str, templates: Mapping[str, Iterable[str]]
+) -> List[PatternSource]:
+    """Returns the cached URLs containing the rule (or equivalent one).
+
+    Answers from the pattern index, without downloading or reading the
+    contents of the URLs (except the changed ones, see ``get_index``).
+
+    Args:
+        pattern: The .gitignore rule.
+        templates: Mapping of template name to its URLs, used to find the
+            templates of each URL (e.g. ``datamodel.get_templates()``).
+    """
+
+    urls = get_index().find(pattern)
+    url_templates: Dict[str, List[str]] = {url: [] for url in urls}
+    for name, template_urls in templates.items():
+        for url in template_urls:
+            if url in url_templates:
+                url_templates[url].append(name)
+    return [PatternSource(url, tuple(names)) for url, names in url_templates.items()]
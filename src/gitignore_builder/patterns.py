@@ -0,0 +1,384 @@
+"""This module defines helpers for working with .gitignore patterns.
+
+The ``canonicalize`` method maps the patterns to normal form following the
+pattern format of git (see ``gitignore(5)``), so equivalent spellings of the
+same rule (e.g. ``**/foo`` and ``foo``) can be recognized.
+"""
+import logging
+from functools import lru_cache
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+_NEGATION = "!"
+
+_DOUBLE_STAR = "**"
+
+# chars which need not to be escaped anywhere in a pattern
+_PLAIN_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._-+=,@%~"
+)
+
+# chars which can be written as literal instead of single-char class
+_LITERAL_CHARS = _PLAIN_CHARS | frozenset("$&'()")
+
+
+class _UnsupportedPattern(ValueError):
+    """Raised for patterns which are kept as they are."""
+
+
+def is_negation(pattern: str) -> bool:
+    """Returns True if the pattern re-includes the paths it matches."""
+
+    return pattern.startswith(_NEGATION)
+
+
+@lru_cache(maxsize=16 * 1024)
+def canonicalize(pattern: str) -> str:
+    """Returns the normal form of the .gitignore pattern.
+
+    Equivalent patterns have the same normal form, which is itself
+    an equivalent pattern. The normalization:
+
+    * drops the redundant leading ``**/`` of single-name patterns and the
+      redundant leading ``/`` of patterns anchored by inner ``/``,
+    * collapses consecutive ``**/`` segments and runs of ``*``,
+    * sorts and de-duplicates the members of character classes and writes
+      single-char classes as literals,
+    * drops needless escapes (e.g. ``\\a``).
+
+    Patterns using features not covered (e.g. ``[[:alpha:]]``) are returned
+    as they are.
+    """
+
+    negated = is_negation(pattern)
+    body = pattern[1:] if negated else pattern
+    try:
+        body = _canonicalize_body(body)
+    except _UnsupportedPattern:
+        return pattern
+    return _NEGATION + body if negated else body
+
+
+def _canonicalize_body(body: str) -> str:
+    dir_only = body.endswith("/") and not body.endswith("\\/")
+    if dir_only:
+        body = body[:-1]
+    anchored = body.startswith("/")
+    if anchored:
+        body = body[1:]
+
+    segments = body.split("/")
+    if not all(segments):
+        raise _UnsupportedPattern(body)
+
+    normalized: List[str] = []
+    for segment in segments:
+        if segment.strip("*") == "" and len(segment) > 1:
+            if normalized and normalized[-1] == _DOUBLE_STAR:
+                continue
+            normalized.append(_DOUBLE_STAR)
+        else:
+            normalized.append(_canonicalize_segment(segment))
+
+    if len(normalized) == 2 and normalized[0] == _DOUBLE_STAR:
+        # "**/foo" matches "foo" in all directories, same as "foo"
+        normalized.pop(0)
+        anchored = False
+    elif len(normalized) > 1 or normalized[0] == _DOUBLE_STAR:
+        # inner "/" anchors the pattern, so the leading "/" is redundant
+        anchored = False
+
+    prefix = "/" if anchored else ""
+    suffix = "/" if dir_only else ""
+    return prefix + "/".join(normalized) + suffix
+
+
+def _canonicalize_segment(segment: str) -> str:
+    result = []
+    index = 0
+    while index < len(segment):
+        char = segment[index]
+        if char == "\\":
+            if index + 1 == len(segment):
+                raise _UnsupportedPattern(segment)
+            escaped = segment[index + 1]
+            result.append(escaped if escaped in _PLAIN_CHARS else char + escaped)
+            index += 2
+        elif char == "[":
+            end = _find_class_end(segment, index)
+            result.append(_canonicalize_class(segment[index + 1 : end]))
+            index = end + 1
+        elif char == "*":
+            while index < len(segment) and segment[index] == "*":
+                index += 1
+            result.append("*")
+        else:
+            result.append(char)
+            index += 1
+    return "".join(result)
+
+
+def _find_class_end(segment: str, start: int) -> int:
+    index = start + 1
+    if index < len(segment) and segment[index] in "!^":
+        index += 1
+    if index < len(segment) and segment[index] == "]":
+        index += 1
+    end = segment.find("]", index)
+    if end < 0:
+        raise _UnsupportedPattern(segment)
+    if "[" in segment[start + 1 : end] or "\\" in segment[start + 1 : end]:
+        raise _UnsupportedPattern(segment)
+    return end
+
+
+def _parse_class(body: str) -> Tuple[bool, List[str], List[Tuple[str, str]]]:
+    negated = body[:1] in ("!", "^")
+    if negated:
+        body = body[1:]
+    chars = []
+    ranges = []
+    index = 0
+    while index < len(body):
+        if index + 2 < len(body) and body[index + 1] == "-":
+            ranges.append((body[index], body[index + 2]))
+            index += 3
+        else:
+            chars.append(body[index])
+            index += 1
+    return negated, chars, ranges
+
+
+def _canonicalize_class(body: str) -> str:
+    negated, chars, ranges = _parse_class(body)
+    if any(low > high for low, high in ranges):
+        raise _UnsupportedPattern(body)
+
+    ranges = sorted(set(ranges))
+    chars = sorted(
+        {char for char in chars if not any(low <= char <= high for low, high in ranges)}
+    )
+
+    if not negated and not ranges and len(chars) == 1 and chars[0] in _LITERAL_CHARS:
+        return chars[0]
+
+    # "]" is literal only as the first member, "-" only as the first or the
+    # last one, and "!"/"^" must not be the first member (they would negate
+    # the class), so "-" goes first when only "!"/"^" could start the class
+    first = ["]"] if "]" in chars else []
+    last = ["-"] if "-" in chars else []
+    middle = [char for char in chars if char not in "]-"]
+    if not first and not ranges and middle and middle[0] in "!^":
+        middle.append(middle.pop(0))
+        if middle[0] in "!^":
+            if not last:
+                raise _UnsupportedPattern(body)
+            first, last = last, []
+    members = first + [f"{low}-{high}" for low, high in ranges] + middle + last
+    if not members:
+        raise _UnsupportedPattern(body)
+    return "[" + ("!" if negated else "") + "".join(members) + "]"
+
+
+def is_literal_segment(segment: str) -> bool:
+    """Returns True if the pattern segment has no wildcards nor escapes."""
+
+    return not any(char in segment for char in "*?[\\")
+
+
+def split_rule(rule: str) -> Tuple[bool, bool, List[str]]:
+    """Splits rule in normal form (without "!") to its parts.
+
+    Returns:
+        Tuple of flag if the rule is anchored (matches only relative to the
+        .gitignore dir), flag if the rule matches only directories and the
+        path segments of the rule (empty if the rule is invalid).
+    """
+
+    dir_only = rule.endswith("/")
+    if dir_only:
+        rule = rule[:-1]
+    segments = rule.split("/")
+    anchored = len(segments) > 1 and segments[0] != _DOUBLE_STAR
+    if segments[0] == "":
+        anchored = True
+        segments.pop(0)
+    if not all(segments):
+        return anchored, dir_only, []
+    return anchored, dir_only, segments
+
+
+class _TrieNode:
+    """Node of the ``RuleIndex`` trie of anchored literal paths."""
+
+    __slots__ = ("children", "dir_only")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.dir_only: Optional[bool] = None  # None if no rule ends here
+
+
+class RuleIndex:
+    """Index of .gitignore rules for finding rules covered by broader ones.
+
+    The rules are indexed (in normal form, see ``canonicalize``) by:
+
+    * name - rules like ``foo`` or ``foo/``, matching the name at any level,
+    * extension - rules like ``*.ext``, matching the extension at any level,
+    * path - rules like ``/foo`` or ``foo/bar/``, in trie of path segments.
+
+    Rule is covered if it matches only paths matched by an indexed rule,
+    e.g. ``foo/*.pyc`` by ``*.pyc``, or only paths inside directory matched
+    by an indexed rule, e.g. ``.idea/workspace.xml`` by ``.idea/``.
+    Negation rules are never covered nor indexed.
+    """
+
+    def __init__(self):
+        self._names: Dict[str, bool] = {}
+        self._extensions: Set[str] = set()
+        self._root = _TrieNode()
+
+    def clear(self):
+        """Removes all indexed rules."""
+
+        self._names.clear()
+        self._extensions.clear()
+        self._root = _TrieNode()
+
+    def add(self, pattern: str):
+        """Indexes the rule if it is one of the indexed kinds."""
+
+        rule = canonicalize(pattern)
+        if is_negation(rule):
+            return
+        anchored, dir_only, segments = split_rule(rule)
+        if not segments or _DOUBLE_STAR in segments:
+            return
+
+        if not anchored:
+            name = segments[0]
+            if is_literal_segment(name):
+                self._names[name] = self._names.get(name, True) and dir_only
+            elif name.startswith("*.") and is_literal_segment(name[2:]):
+                if not dir_only:
+                    self._extensions.add(name[2:])
+        elif all(is_literal_segment(segment) for segment in segments):
+            node = self._root
+            for segment in segments:
+                node = node.children.setdefault(segment, _TrieNode())
+            node.dir_only = (node.dir_only is not False) and dir_only
+
+    def covers(self, pattern: str, parents: bool = True) -> bool:
+        """Returns True if the rule is covered by some of the indexed rules.
+
+        Args:
+            pattern: The rule.
+            parents: Also check if the rule is covered by rule matching some
+                of its parent directories.
+        """
+
+        rule = canonicalize(pattern)
+        if is_negation(rule):
+            return False
+        anchored, dir_only, segments = split_rule(rule)
+        if not segments:
+            return False
+
+        name = segments[-1]
+        if parents and any(parent in self._names for parent in segments[:-1]):
+            return True
+        if name in self._names and (dir_only or not self._names[name]):
+            return True
+        if self._covers_extension(name):
+            return True
+        return anchored and self._covers_path(segments, dir_only, parents)
+
+    def _covers_extension(self, name: str) -> bool:
+        if not self._extensions:
+            return False
+        index = name.find(".")
+        while index >= 0:
+            extension = name[index + 1 :]
+            if extension in self._extensions and is_literal_segment(extension):
+                return True
+            index = name.find(".", index + 1)
+        return False
+
+    def _covers_path(self, segments: List[str], dir_only: bool, parents: bool) -> bool:
+        node = self._root
+        for depth, segment in enumerate(segments, start=1):
+            node = node.children.get(segment) if is_literal_segment(segment) else None
+            if node is None:
+                return False
+            if node.dir_only is not None:
+                if depth < len(segments):
+                    if parents:
+                        return True
+                elif dir_only or not node.dir_only:
+                    return True
+        return False
+
+
+def _find_last_negations(lines: Sequence[str]) -> Tuple[Dict[str, int], int]:
+    """Returns the last line number of the negation rules re-including each name.
+
+    Returns:
+        Mapping of the literal name matched by negation rule to the number of
+        its last line, and the number of the last line of negation rule which
+        may match any name (-1 if none).
+    """
+
+    names: Dict[str, int] = {}
+    last_wildcard = -1
+    for number, line in enumerate(lines):
+        if not is_negation(line):
+            continue
+        _, _, segments = split_rule(canonicalize(line)[1:])
+        if segments and is_literal_segment(segments[-1]):
+            names[segments[-1]] = number
+        else:
+            last_wildcard = number
+    return names, last_wildcard
+
+
+def find_subsumed_rules(lines: Sequence[str]) -> Set[int]:
+    """Returns the numbers of the lines with rules covered by broader rules.
+
+    The rules are checked in order against the preceding rules (see
+    ``RuleIndex``), so dropping all of the returned lines does not change
+    which paths are ignored:
+
+    * no rule is covered by broader rule preceding a negation rule,
+    * no rule is covered by rule matching its parent directory, if some
+      later negation rule may re-include that directory (e.g. ``.idea/``,
+      ``.idea/workspace.xml``, ``!.idea/``).
+
+    Args:
+        lines: The .gitignore lines (comment and empty lines are skipped).
+    """
+
+    negated_names, last_wildcard = _find_last_negations(lines)
+    index = RuleIndex()
+    subsumed = set()
+    for number, line in enumerate(lines):
+        if not line or line.startswith("#"):
+            continue
+        if is_negation(line):
+            index.clear()
+            continue
+        _, _, segments = split_rule(canonicalize(line))
+        parents = last_wildcard < number and all(
+            negated_names.get(parent, -1) < number for parent in segments[:-1]
+        )
+        if index.covers(line, parents):
+            subsumed.add(number)
+        else:
+            index.add(line)
+    return subsumed
@@ -0,0 +1,264 @@
+"""This module defines the planning stage between the recipe URLs and fetching.
+
+The toptal.com gitignore API accepts comma-separated list of template names,
+so all toptal API URLs of a recipe are coalesced into one combined request.
+The combined response is then split back into per-URL texts by its
+``### <Name> ###`` section headers.
+"""
+import logging
+import re
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from gitignore_builder import cache
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+TOPTAL_API_URL = "https://www.toptal.com/developers/gitignore/api/"
+
+TOPTAL_EDIT_URL = "https://www.toptal.com/developers/gitignore?templates="
+
+_TOPTAL_HEADER = re.compile(r"^### (.+?) ###$")
+
+_TOPTAL_PATCH_SUFFIX = " patch"
+
+_toptal_api_url = TOPTAL_API_URL
+
+_MISSING = object()
+
+
+def set_toptal_api_url(url: Optional[str]):
+    """Set the base URL of the toptal API (None for the ``TOPTAL_API_URL``).
+
+    The URLs of other server with the same API (e.g. local one) get coalesced
+    instead of the toptal ones.
+    """
+
+    global _toptal_api_url
+    _toptal_api_url = url or TOPTAL_API_URL
+
+
+def get_toptal_api_url() -> str:
+    """Returns the base URL of the toptal API (see ``set_toptal_api_url``)."""
+
+    return _toptal_api_url
+
+
+def get_toptal_names(url: str) -> Optional[List[str]]:
+    """Returns the template names requested by toptal API URL, None otherwise."""
+
+    if not url.startswith(_toptal_api_url):
+        return None
+
+    listing = url[len(_toptal_api_url) :]
+    if not listing or any(char in listing for char in "/?#"):
+        return None
+
+    names = [name.strip().lower() for name in listing.split(",")]
+    return names if all(names) else None
+
+
+def format_toptal_url(names: Iterable[str]) -> str:
+    """Returns toptal API URL requesting all the given template names."""
+
+    return _toptal_api_url + ",".join(names)
+
+
+def split_toptal_response(text: str) -> Dict[str, str]:
+    """Splits toptal API response into the sections of each template name.
+
+    The "Patch" section of a template is kept together with the template.
+
+    Returns:
+        Dict mapping lower-case template name to its section text.
+    """
+
+    sections: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+
+    for line in text.split("\n"):
+        header = _TOPTAL_HEADER.match(line.strip())
+        if header:
+            name = header.group(1).strip().lower()
+            if name.endswith(_TOPTAL_PATCH_SUFFIX):
+                name = name[: -len(_TOPTAL_PATCH_SUFFIX)]
+            current = sections.setdefault(name, [])
+            current.append(line)
+        elif line.startswith("# End of "):
+            current = None
+        elif current is not None:
+            current.append(line)
+
+    return {name: "\n".join(lines).strip("\n") for name, lines in sections.items()}
+
+
+def format_toptal_response(
+    url: str, names: Sequence[str], sections: Dict[str, str]
+) -> str:
+    """Formats the sections as if they were returned by the toptal API URL."""
+
+    lines = [f"# Created by {url}", f"# Edit at {TOPTAL_EDIT_URL}{','.join(names)}"]
+    for name in names:
+        lines.extend(["", sections[name]])
+    lines.extend(["", f"# End of {url}", ""])
+    return "\n".join(lines)
+
+
+def _next_fetched(fetched: Iterator, url: str):
+    """Returns the next fetched contents, raises ``ValueError`` if exhausted."""
+
+    contents = next(fetched, _MISSING)
+    if contents is _MISSING:
+        raise ValueError(f"Missing the fetched contents of URL: '{url}'")
+    return contents
+
+
+def _get_fetched_at(url: str) -> float:
+    """Returns the fetch time of the cached URL contents, 0 if not cached."""
+
+    entry = cache.load_entry(url)
+    return 0.0 if entry is None else entry.fetched_at
+
+
+def _store_split_text(url: str, text: str, fetched_at: float):
+    """Stores the text split from combined response, unless already cached."""
+
+    entry = cache.load_entry(url)
+    if entry is None or entry.body != text:
+        cache.save_entry(cache.CacheEntry(url, text, fetched_at=fetched_at))
+
+
+class FetchPlan:
+    """Describes which URLs to fetch to obtain the contents of the recipe URLs.
+
+    Args:
+        urls: The recipe URLs, in order.
+        coalesce: Coalesce the toptal API URLs into single combined URL.
+        use_cache: Store the texts split from the combined response in the
+            cache (see ``assemble``).
+
+    Attributes:
+        urls: The recipe URLs, in order.
+        fetch_urls: The URLs to actually fetch, in order of first need.
+        combined_url: The toptal API URL coalescing several recipe URLs, if any.
+    """
+
+    def __init__(
+        self, urls: Sequence[str], coalesce: bool = True, use_cache: bool = True
+    ):
+        self.urls = list(urls)
+        self.use_cache = use_cache
+        self._toptal_names: Dict[str, List[str]] = {}
+        self.combined_url: Optional[str] = None
+
+        if coalesce:
+            for url in self.urls:
+                names = get_toptal_names(url)
+                if names:
+                    self._toptal_names[url] = names
+
+        if len(self._toptal_names) < 2:
+            self._toptal_names.clear()
+            self.fetch_urls = list(self.urls)
+            return
+
+        all_names = {}
+        for names in self._toptal_names.values():
+            all_names.update(dict.fromkeys(names))
+        self.combined_url = format_toptal_url(all_names)
+        _log.info(
+            "Coalesced %s toptal API URLs into: '%s'",
+            len(self._toptal_names),
+            self.combined_url,
+        )
+
+        self.fetch_urls = []
+        for url in self.urls:
+            if url not in self._toptal_names:
+                self.fetch_urls.append(url)
+            elif self.combined_url not in self.fetch_urls:
+                self.fetch_urls.append(self.combined_url)
+
+    def get_coalesced_urls(self) -> List[str]:
+        """Returns the recipe URLs to be split from the combined response."""
+
+        return list(self._toptal_names)
+
+    def _split_combined(self, combined_text: Optional[str]) -> Dict[str, str]:
+        if not combined_text:
+            return {}
+        return split_toptal_response(combined_text)
+
+    def find_unsplit_urls(self, fetched: Sequence[Optional[str]]) -> List[str]:
+        """Returns the coalesced URLs missing from the fetched combined response.
+
+        Args:
+            fetched: The fetched contents of the ``fetch_urls``.
+        """
+
+        if self.combined_url is None:
+            return []
+
+        combined_index = self.fetch_urls.index(self.combined_url)
+        sections = self._split_combined(fetched[combined_index])
+        return [
+            url
+            for url, names in self._toptal_names.items()
+            if not all(name in sections for name in names)
+        ]
+
+    def assemble(
+        self,
+        fetched: Iterable[Optional[str]],
+        read_url: Callable[[str], Optional[str]],
+    ) -> Iterator[Optional[str]]:
+        """Yields the contents of each recipe URL, in order.
+
+        Consumes the ``fetched`` contents lazily, so sections can be yielded
+        as soon as the contents they depend on are available. The texts split
+        from the combined response are also stored in the cache under their
+        own URLs (unless not using the cache), so they are available to
+        offline builds. Only the missing or changed texts are stored, along
+        with the fetch time of the combined response.
+
+        Args:
+            fetched: The contents of the ``fetch_urls``, in order. The contents
+                of the URLs not coalesced are passed through as they are, so
+                they may also be given as iterables of lines.
+            read_url: Used to directly fetch coalesced URLs that are missing
+                from the combined response.
+
+        Raises:
+            ValueError: If less contents were fetched than the ``fetch_urls``.
+        """
+
+        fetched = iter(fetched)
+        sections: Optional[Dict[str, str]] = None
+        fetched_at = 0.0
+
+        for url in self.urls:
+            names = self._toptal_names.get(url)
+            if names is None:
+                yield _next_fetched(fetched, url)
+                continue
+
+            if sections is None:
+                combined_text = _next_fetched(fetched, self.combined_url)
+                sections = self._split_combined(combined_text)
+                if self.use_cache and sections:
+                    fetched_at = _get_fetched_at(self.combined_url)
+
+            if all(name in sections for name in names):
+                text = format_toptal_response(url, names, sections)
+                if self.use_cache:
+                    _store_split_text(url, text, fetched_at)
+                yield text
+            else:
+                _log.warning("Combined toptal response lacks: '%s'", url)
+                yield read_url(url)
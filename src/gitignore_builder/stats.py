@@ -0,0 +1,316 @@
+"""This module defines the statistics collected while building .gitignore contents.
+
+The statistics are collected only within ``collect``, while anywhere else
+the recording functions return right away, so they cost next to nothing.
+"""
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+CACHE_STATES = ("miss", "hit", "revalidated", "fallback", "memo", "coalesced")
+
+_current: Optional["BuildStats"] = None
+
+
+class UrlStats:
+    """Statistics of single source URL of a build.
+
+    Attributes:
+        url: The source URL.
+        seconds: Wall time of fetching the contents. For streamed contents
+            (see ``io_util.iter_url_lines``) it includes processing them.
+        size: Size of the contents in bytes (UTF-8 encoded).
+        status: HTTP status code of the response, None if no request was made.
+        cache: How the contents were obtained, one of:
+            "miss" - downloaded,
+            "hit" - fresh in the cache (or offline mode),
+            "revalidated" - reused from the cache after "304 Not Modified",
+            "fallback" - reused from the cache after download error,
+            "memo" - already downloaded by this process,
+            "coalesced" - split from combined toptal API response.
+        error: Description of the download error, if any.
+        lines_in: Number of lines of the contents.
+        lines_kept: Number of lines appended to the result.
+        lines_dropped: Number of lines dropped as duplicates.
+        lines_pruned: Number of rules pruned as covered by broader rules
+            (see ``builder.BuildOptions.prune_subsumed``).
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.seconds = 0.0
+        self.size = 0
+        self.status: Optional[int] = None
+        self.cache: Optional[str] = None
+        self.error: Optional[str] = None
+        self.lines_in = 0
+        self.lines_kept = 0
+        self.lines_dropped = 0
+        self.lines_pruned = 0
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the statistics as JSON-serializable dict."""
+
+        return {
+            "url": self.url,
+            "seconds": self.seconds,
+            "bytes": self.size,
+            "status": self.status,
+            "cache": self.cache,
+            "error": self.error,
+            "lines_in": self.lines_in,
+            "lines_kept": self.lines_kept,
+            "lines_dropped": self.lines_dropped,
+            "lines_pruned": self.lines_pruned,
+        }
+
+
+class BuildStats:
+    """Statistics of a build (or several builds) of .gitignore contents.
+
+    Attributes:
+        urls: The statistics of each URL, in order of first use.
+        seconds: Wall time of the build.
+        peak_memory: Peak size of the memory allocated while building
+            (in bytes), None if not traced.
+        config_seconds: Time of loading the app config, None if not loaded.
+    """
+
+    def __init__(self):
+        self.urls: Dict[str, UrlStats] = {}
+        self.seconds = 0.0
+        self.peak_memory: Optional[int] = None
+        self.config_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get_url_stats(self, url: str) -> UrlStats:
+        """Returns the statistics of the URL, adding them if not present yet."""
+
+        with self._lock:
+            url_stats = self.urls.get(url)
+            if url_stats is None:
+                url_stats = self.urls[url] = UrlStats(url)
+            return url_stats
+
+    def get_totals(self) -> Dict[str, Any]:
+        """Returns the statistics summed over all URLs."""
+
+        urls = list(self.urls.values())
+        cache_counts = {state: 0 for state in CACHE_STATES}
+        for url_stats in urls:
+            if url_stats.cache in cache_counts:
+                cache_counts[url_stats.cache] += 1
+        return {
+            "urls": len(urls),
+            "requests": sum(1 for url_stats in urls if url_stats.status is not None),
+            "errors": sum(1 for url_stats in urls if url_stats.error),
+            "cache": cache_counts,
+            "bytes": sum(url_stats.size for url_stats in urls),
+            "fetch_seconds": sum(url_stats.seconds for url_stats in urls),
+            "lines_in": sum(url_stats.lines_in for url_stats in urls),
+            "lines_kept": sum(url_stats.lines_kept for url_stats in urls),
+            "lines_dropped": sum(url_stats.lines_dropped for url_stats in urls),
+            "lines_pruned": sum(url_stats.lines_pruned for url_stats in urls),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the statistics as JSON-serializable dict."""
+
+        return {
+            "seconds": self.seconds,
+            "peak_memory": self.peak_memory,
+            "config_seconds": self.config_seconds,
+            "totals": self.get_totals(),
+            "urls": [url_stats.to_dict() for url_stats in self.urls.values()],
+        }
+
+    def format_json(self) -> str:
+        """Returns the statistics formatted as JSON text."""
+
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_text(self) -> str:
+        """Returns the statistics formatted as human-readable table."""
+
+        lines = [
+            f"{'time(ms)':>9} {'bytes':>9} {'status':>6} {'cache':>11} "
+            f"{'lines in':>8} {'kept':>6} {'dropped':>7} {'pruned':>6}  url"
+        ]
+        for url_stats in self.urls.values():
+            status = url_stats.status if url_stats.status is not None else "-"
+            lines.append(
+                f"{url_stats.seconds * 1000:>9.1f} {url_stats.size:>9} {status:>6} "
+                f"{url_stats.cache or '-':>11} {url_stats.lines_in:>8} "
+                f"{url_stats.lines_kept:>6} {url_stats.lines_dropped:>7} "
+                f"{url_stats.lines_pruned:>6}  {url_stats.url}"
+            )
+            if url_stats.error:
+                lines.append(f"{'':>69}  error: {url_stats.error}")
+
+        totals = self.get_totals()
+        cache_counts = ", ".join(
+            f"{state}: {count}" for state, count in totals["cache"].items() if count
+        )
+        lines.extend(
+            [
+                f"total: {totals['urls']} URLs, {totals['requests']} requests, "
+                f"{totals['errors']} errors, {totals['bytes']} bytes "
+                f"(cache {cache_counts or '-'})",
+                f"lines: {totals['lines_in']} in, {totals['lines_kept']} kept, "
+                f"{totals['lines_dropped']} dropped as duplicates, "
+                f"{totals['lines_pruned']} pruned as subsumed",
+                f"build time: {self.seconds * 1000:.1f}ms "
+                f"(fetch time: {totals['fetch_seconds'] * 1000:.1f}ms)",
+            ]
+        )
+        if self.config_seconds is not None:
+            lines.append(f"config load time: {self.config_seconds * 1000:.1f}ms")
+        if self.peak_memory is not None:
+            lines.append(f"peak memory: {self.peak_memory / 1024:.1f}KiB")
+        return "\n".join(lines)
+
+
+def get_current() -> Optional[BuildStats]:
+    """Returns the statistics being collected, None if not collecting."""
+
+    return _current
+
+
+def is_enabled() -> bool:
+    """Returns True if statistics are being collected."""
+
+    return _current is not None
+
+
+@contextmanager
+def collect(
+    build_stats: Optional[BuildStats] = None, trace_memory: bool = False
+) -> Iterator[BuildStats]:
+    """Context manager collecting the statistics of the builds within.
+
+    Args:
+        build_stats: The statistics to add to (new ones by default).
+        trace_memory: Trace the peak of the allocated memory (see ``tracemalloc``),
+            unless already traced by someone else.
+    """
+
+    global _current
+    build_stats = build_stats if build_stats is not None else BuildStats()
+    previous = _current
+    _current = build_stats
+    trace_memory = trace_memory and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        yield build_stats
+    finally:
+        build_stats.seconds += time.perf_counter() - started
+        if trace_memory:
+            build_stats.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        _current = previous
+
+
+def get_text_size(text: Optional[str]) -> int:
+    """Returns the size of the text in bytes (UTF-8 encoded)."""
+
+    if not text:
+        return 0
+    return len(text.encode("utf-8", errors="surrogateescape"))
+
+
+def record_fetch(
+    url: str,
+    started: float,
+    cache_state: str,
+    *,
+    status: Optional[int] = None,
+    text: Optional[str] = None,
+    size: Optional[int] = None,
+    error: Optional[Exception] = None,
+):
+    """Records the fetch of the URL contents (if collecting statistics).
+
+    Args:
+        url: The fetched URL.
+        started: The ``time.perf_counter()`` value of starting the fetch.
+        cache_state: How the contents were obtained (see ``UrlStats.cache``).
+        status: HTTP status code of the response, if any.
+        text: The fetched contents, used to compute their size if not given.
+        size: The size of the contents in bytes.
+        error: The download error, if any.
+    """
+
+    build_stats = _current
+    if build_stats is None:
+        return
+
+    url_stats = build_stats.get_url_stats(url)
+    if cache_state == "memo" and url_stats.cache is not None:
+        return  # already fetched within this build
+    url_stats.seconds += time.perf_counter() - started
+    url_stats.size = size if size is not None else get_text_size(text)
+    url_stats.status = status
+    url_stats.cache = cache_state
+    url_stats.error = str(error) if error is not None else None
+
+
+def record_lines(url: str, lines_in: int, lines_kept: int):
+    """Records the numbers of lines of the URL contents in and kept in result.
+
+    The lines not kept are recorded as dropped.
+    """
+
+    build_stats = _current
+    if build_stats is None:
+        return
+
+    url_stats = build_stats.get_url_stats(url)
+    url_stats.lines_in += lines_in
+    url_stats.lines_kept += lines_kept
+    url_stats.lines_dropped += lines_in - lines_kept
+
+
+def record_pruned(url: str, lines_pruned: int, lines_dropped: int = 0):
+    """Records the numbers of lines of the URL contents removed from result.
+
+    The lines were recorded as kept, so they are recorded as pruned (or as
+    dropped, e.g. the empty lines left behind the pruned rules) instead.
+    """
+
+    build_stats = _current
+    if build_stats is None:
+        return
+
+    url_stats = build_stats.get_url_stats(url)
+    url_stats.lines_kept -= lines_pruned + lines_dropped
+    url_stats.lines_dropped += lines_dropped
+    url_stats.lines_pruned += lines_pruned
+
+
+def record_coalesced(urls: List[str]):
+    """Records the URLs contents of which were split from combined response."""
+
+    build_stats = _current
+    if build_stats is None:
+        return
+
+    for url in urls:
+        url_stats = build_stats.get_url_stats(url)
+        if url_stats.cache is None:
+            url_stats.cache = "coalesced"
@@ -0,0 +1,197 @@
+"""This module defines lightweight tracing of the build steps as timed spans.
+
+Instrumented code wraps its steps with ``span``. The finished spans are
+passed to each of the registered hooks (see ``add_hook``), e.g. to the
+``ChromeTraceExporter``. While there are no hooks, ``span`` returns shared
+no-op context manager, so the tracing costs next to nothing.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import ContextManager
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+_NO_SPAN = nullcontext()
+
+
+class Span(NamedTuple):
+    """Finished span of traced code.
+
+    Attributes:
+        name: Name of the traced step (e.g. the traced function name).
+        category: Category of the traced step (e.g. "config", "fetch", "build").
+        start_ns: The ``time.perf_counter_ns()`` value of starting the step.
+        duration_ns: The duration of the step in nanoseconds.
+        thread_id: Identifier of the thread running the step.
+        thread_name: Name of the thread running the step.
+        args: Additional details of the step (e.g. URL).
+    """
+
+    name: str
+    category: str
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+    thread_name: str
+    args: Dict[str, Any]
+
+
+Hook = Callable[[Span], None]
+
+_hooks: List[Hook] = []
+
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: Hook):
+    """Registers callable to be called with each finished span."""
+
+    global _hooks
+    with _hooks_lock:
+        _hooks = [*_hooks, hook]
+
+
+def remove_hook(hook: Hook):
+    """Unregisters hook added by ``add_hook`` (if registered)."""
+
+    global _hooks
+    with _hooks_lock:
+        _hooks = [item for item in _hooks if item != hook]
+
+
+def is_enabled() -> bool:
+    """Returns True if there are registered hooks."""
+
+    return bool(_hooks)
+
+
+class _ActiveSpan:
+    """Context manager timing the span and passing it to the hooks upon exit."""
+
+    __slots__ = ("name", "category", "args", "_start_ns")
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.args = args
+        self._start_ns = 0
+
+    def __enter__(self) -> "_ActiveSpan":
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration_ns = time.perf_counter_ns() - self._start_ns
+        if exc_type is not None:
+            self.args["error"] = repr(exc_value)
+        thread = threading.current_thread()
+        finished = Span(
+            self.name,
+            self.category,
+            self._start_ns,
+            duration_ns,
+            thread.ident or 0,
+            thread.name,
+            self.args,
+        )
+        for hook in _hooks:
+            try:
+                hook(finished)
+            except Exception as e:
+                _log.warning("Tracing hook failed! Details: '%s'", e)
+
+
+def span(name: str, category: str = "", **args: Any) -> ContextManager:
+    """Returns context manager tracing the code within as span.
+
+    Args:
+        name: Name of the traced step.
+        category: Category of the traced step.
+        args: Additional details of the step.
+    """
+
+    if not _hooks:
+        return _NO_SPAN
+    return _ActiveSpan(name, category, args)
+
+
+def iter_traced(
+    items: Iterable[Any], name: str, category: str = "", **args: Any
+) -> Iterator[Any]:
+    """Yields the items, tracing the iteration over all of them as span."""
+
+    with span(name, category, **args):
+        yield from items
+
+
+class ChromeTraceExporter:
+    """Tracing hook collecting the spans as Chrome trace events.
+
+    The written JSON file can be opened with ``chrome://tracing`` or at
+    https://ui.perfetto.dev to see the timeline of the spans of each thread.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._origin_ns = time.perf_counter_ns()
+
+    def __call__(self, finished: Span):
+        self.spans.append(finished)
+
+    def get_events(self) -> List[Dict[str, Any]]:
+        """Returns the collected spans as "complete" trace events."""
+
+        pid = os.getpid()
+        events = []
+        thread_names: Dict[int, str] = {}
+        for item in sorted(self.spans, key=lambda item: item.start_ns):
+            thread_names.setdefault(item.thread_id, item.thread_name)
+            events.append(
+                {
+                    "name": item.name,
+                    "cat": item.category,
+                    "ph": "X",
+                    "ts": (item.start_ns - self._origin_ns) / 1000,
+                    "dur": item.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": item.thread_id,
+                    "args": item.args,
+                }
+            )
+        for thread_id, thread_name in thread_names.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": thread_id,
+                    "args": {"name": thread_name},
+                }
+            )
+        return events
+
+    def write(self, file: Path, metadata: Optional[Dict[str, Any]] = None):
+        """Writes the collected spans to JSON file in the trace-event format."""
+
+        data = {
+            "traceEvents": self.get_events(),
+            "displayTimeUnit": "ms",
+            "otherData": metadata or {},
+        }
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(json.dumps(data, default=str), encoding="utf-8")
+        _log.info("Written %s trace events to: '%s'", len(self.spans), file)
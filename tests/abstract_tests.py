@@ -13,11 +13,14 @@ from typing import Optional
 from typing import Sequence
 from typing import Union
 from unittest import TestCase
+from unittest.mock import patch
 
 from click import BaseCommand
 from click.testing import CliRunner
 from click.testing import Result
 
+from gitignore_builder import io_util
+
 _log = logging.getLogger(__name__)
 _log.addHandler(logging.NullHandler())
 
@@ -56,7 +59,31 @@ class TempDirTestBase(TestCase, ABC):
         self.temp_dir = None
 
 
-class CliCommandTestBase(TempDirTestBase, ABC):
+class CacheDirTestBase(TempDirTestBase, ABC):
+    """Base class for unit-tests that must not touch the user's app cache.
+
+    Also starts and ends each test with empty in-process memo of URL contents.
+    """
+
+    cache_dir: Optional[Path]
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_dir = self.temp_dir / "cache"
+        self._cache_dir_patcher = patch(
+            "gitignore_builder.cache.get_cache_dir", return_value=self.cache_dir
+        )
+        self._cache_dir_patcher.start()
+        io_util.clear_memo()
+
+    def tearDown(self) -> None:
+        io_util.clear_memo()
+        self._cache_dir_patcher.stop()
+        self.cache_dir = None
+        super().tearDown()
+
+
+class CliCommandTestBase(CacheDirTestBase, ABC):
     """Base class for CLI-related unit-tests."""
 
     args: Optional[List[str]]
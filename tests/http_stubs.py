@@ -0,0 +1,197 @@
+"""This module defines local HTTP servers that stand-in for the remote sources."""
+import asyncio
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+_log = logging.getLogger(__name__)
+_log.addHandler(logging.NullHandler())
+
+
+class StubResponse(NamedTuple):
+    """Canned response served by the HTTP stubs."""
+
+    body: bytes = b""
+    status: int = 200
+    headers: Tuple[Tuple[str, str], ...] = ()
+    chunked: bool = False
+    delay: float = 0.0
+    drop_after: Optional[int] = None
+
+
+_REASONS = {
+    200: "OK",
+    301: "Moved Permanently",
+    302: "Found",
+    304: "Not Modified",
+    404: "Not Found",
+}
+
+
+class AsyncHttpStub:
+    """Minimal asyncio HTTP/1.1 server serving canned responses by path.
+
+    Use as async context manager on the event loop running the tested code.
+    """
+
+    def __init__(self, routes: Dict[str, StubResponse]):
+        self.routes = routes
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        self.base_url: Optional[str] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def __aenter__(self) -> "AsyncHttpStub":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.base_url = f"http://{host}:{port}"
+        _log.debug("AsyncHttpStub - serving at: '%s'", self.base_url)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def url(self, path: str) -> str:
+        """Returns absolute URL for the given path."""
+
+        return self.base_url + path
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            self.requests.append((method, target, headers))
+
+            response = self.routes.get(target, StubResponse(b"Not Found", 404))
+            if response.delay:
+                await asyncio.sleep(response.delay)
+            writer.write(_format_response(_revalidate(response, headers)))
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+class HttpStubServer:
+    """Threaded HTTP/1.1 server serving canned responses by path.
+
+    Runs in a background thread, so it can serve blocking clients as well.
+    Responses having an ``ETag`` header are revalidated via ``If-None-Match``.
+    Use as context manager.
+    """
+
+    def __init__(self, routes: Dict[str, StubResponse]):
+        self.routes = routes
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        self.connections = 0
+        self.base_url: Optional[str] = None
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "HttpStubServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        host, port = self._server.server_address[:2]
+        self.base_url = f"http://{host}:{port}"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        _log.debug("HttpStubServer - serving at: '%s'", self.base_url)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def url(self, path: str) -> str:
+        """Returns absolute URL for the given path."""
+
+        return self.base_url + path
+
+    def count_requests(self, path: str) -> int:
+        """Returns the number of requests received for the given path."""
+
+        return sum(1 for _, target, _ in self.requests if target == path)
+
+
+def _make_handler(stub: HttpStubServer):
+    class StubRequestHandler(BaseHTTPRequestHandler):
+        """Request handler serving the routes of the stub server."""
+
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with stub._lock:  # pylint: disable=protected-access
+                stub.connections += 1
+
+        def do_GET(self):  # noqa: N802 pylint: disable=invalid-name
+            headers = {name.lower(): value for name, value in self.headers.items()}
+            stub.requests.append(("GET", self.path, headers))
+            response = stub.routes.get(self.path, StubResponse(b"Not Found", 404))
+            if response.delay:
+                threading.Event().wait(response.delay)
+
+            response = _revalidate(response, headers)
+            self.send_response(response.status)
+            for name, value in response.headers:
+                self.send_header(name, value)
+            if response.status == 304:
+                self.end_headers()
+                return
+            self.send_header("Content-Length", str(len(response.body)))
+            self.end_headers()
+            if response.drop_after is None:
+                self.wfile.write(response.body)
+            else:
+                self.wfile.write(response.body[: response.drop_after])
+                self.close_connection = True
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            _log.debug("HttpStubServer - %s", format % args)
+
+    return StubRequestHandler
+
+
+def _revalidate(response: StubResponse, headers: Dict[str, str]) -> StubResponse:
+    etag = dict(response.headers).get("ETag")
+    if etag and headers.get("if-none-match") == etag:
+        return StubResponse(status=304, headers=(("ETag", etag),))
+    return response
+
+
+def _format_response(response: StubResponse) -> bytes:
+    reason = _REASONS.get(response.status, "Unknown")
+    head = [f"HTTP/1.1 {response.status} {reason}"]
+    head.extend(f"{name}: {value}" for name, value in response.headers)
+    if response.chunked:
+        head.append("Transfer-Encoding: chunked")
+        middle = len(response.body) // 2
+        parts = [response.body[:middle], response.body[middle:]]
+        body = b"".join(b"%x\r\n%s\r\n" % (len(part), part) for part in parts if part)
+        body += b"0\r\n\r\n"
+    elif response.status == 304:
+        body = b""
+    else:
+        head.append(f"Content-Length: {len(response.body)}")
+        body = response.body
+    head.append("Connection: close")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
@@ -0,0 +1,140 @@
+"""Unit-tests for the ``gitignore_builder.analysis`` module."""
+import json
+from textwrap import dedent
+from unittest.mock import patch
+
+from gitignore_builder.analysis import analyze_tree
+from gitignore_builder.builder import format_separator_line
+from gitignore_builder.matcher import compile_rules
+
+from .abstract_tests import TempDirTestBase
+
+RULES = dedent(
+    """\
+    # comment
+    *.log
+    !keep.log
+    *.tmp
+
+    build/
+    build/*.o
+    /dist
+    docs/*.html
+    """
+)
+
+PATHS = [
+    "app.log",
+    "keep.log",
+    "src/main.py",
+    "src/debug.log",
+    "build/main.o",
+    "docs/index.html",
+    "docs/index.md",
+    ".git/HEAD",
+]
+
+
+class AnalyzeTreeTestCase(TempDirTestBase):
+    """Unit-tests for the ``analysis.analyze_tree`` method."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        for path in PATHS:
+            file = self.temp_dir / path
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_text(path, encoding="utf-8")
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    def get_hits(self, text: str, jobs: int = 2):
+        result = analyze_tree(self.temp_dir, text, jobs)
+        return {rule_hits.rule.pattern: rule_hits.hits for rule_hits in result.rules}
+
+    def test_counts_hits_of_last_matching_rule(self):
+        expected = {
+            "*.log": 2,
+            "!keep.log": 1,
+            "*.tmp": 0,
+            "build/": 1,
+            "build/*.o": 0,  # not walked, its directory is ignored
+            "/dist": 0,
+            "docs/*.html": 1,
+        }
+        self.assertDictEqual(expected, self.get_hits(RULES))
+
+    def test_result_does_not_depend_on_jobs(self):
+        self.assertDictEqual(self.get_hits(RULES, 1), self.get_hits(RULES, 8))
+
+    def test_counts_walked_and_ignored_paths(self):
+        result = analyze_tree(self.temp_dir, RULES)
+        # 7 files and 3 dirs, without ".git" and the contents of "build"
+        self.assertEqual(9, result.paths)
+        self.assertEqual(4, result.ignored)
+
+    def test_get_dead_rules(self):
+        result = analyze_tree(self.temp_dir, RULES)
+        self.assertListEqual(
+            ["*.tmp", "build/*.o", "/dist"],
+            [rule_hits.rule.pattern for rule_hits in result.get_dead_rules()],
+        )
+
+    def test_prune_drops_dead_rules(self):
+        result = analyze_tree(self.temp_dir, RULES)
+        expected = dedent(
+            """\
+            # comment
+            *.log
+            !keep.log
+
+            build/
+            docs/*.html
+            """
+        )
+        self.assertEqual(expected, result.prune())
+
+    def test_prune_keeps_the_ignored_paths(self):
+        result = analyze_tree(self.temp_dir, RULES)
+        original = compile_rules(RULES)
+        pruned = compile_rules(result.prune())
+        for path in PATHS:
+            self.assertEqual(original.match(path), pruned.match(path), path)
+
+    def test_pruned_contents_have_no_dead_rules(self):
+        pruned = analyze_tree(self.temp_dir, RULES).prune()
+        self.assertListEqual([], analyze_tree(self.temp_dir, pruned).get_dead_rules())
+
+    def test_attributes_rules_to_source_sections(self):
+        text = "\n".join(
+            [
+                format_separator_line("source: https://a.test/one"),
+                "*.log",
+                format_separator_line("source: https://a.test/two"),
+                "*.tmp",
+            ]
+        )
+        result = analyze_tree(self.temp_dir, text)
+        self.assertListEqual(
+            ["https://a.test/one", "https://a.test/two"],
+            [rule_hits.url for rule_hits in result.rules],
+        )
+        self.assertIn("https://a.test/two", result.format_text())
+
+    def test_format_json(self):
+        data = json.loads(analyze_tree(self.temp_dir, RULES).format_json())
+        self.assertEqual(3, data["dead_rules"])
+        self.assertDictEqual(
+            {"line": 4, "rule": "*.tmp", "hits": 0, "url": None}, data["rules"][2]
+        )
+
+    def test_format_text_dead_only(self):
+        text = analyze_tree(self.temp_dir, RULES).format_text(dead_only=True)
+        self.assertIn("/dist", text)
+        self.assertNotIn("docs/*.html", text)
+
+    @patch("gitignore_builder.analysis.os.scandir", side_effect=PermissionError)
+    def test_skips_unreadable_directories(self, mock_scandir):
+        result = analyze_tree(self.temp_dir, RULES)
+        mock_scandir.assert_called_once()
+        self.assertEqual(0, result.paths)
@@ -0,0 +1,139 @@
+"""Smoke-tests for the ``benchmarks`` suite."""
+import json
+from unittest import TestCase
+
+from click.testing import CliRunner
+
+from benchmarks.__main__ import main
+from benchmarks.server import TemplateServer
+from benchmarks.suite import BenchmarkConfig
+from benchmarks.suite import compute_percentile
+from benchmarks.suite import run_benchmarks
+from benchmarks.synthetic import SyntheticConfig
+from benchmarks.synthetic import generate_catalog
+from benchmarks.synthetic import generate_template
+from gitignore_builder import datamodel
+from gitignore_builder import io_util
+from gitignore_builder import planner
+
+from .abstract_tests import CacheDirTestBase
+
+TINY_CONFIG = BenchmarkConfig(
+    synthetic=SyntheticConfig(templates=20, recipes=10, template_lines=30),
+    latency=0,
+    builds=3,
+    dedup_sizes=(100, 1000),
+    matcher_rules=50,
+    matcher_paths=200,
+    matcher_naive_paths=50,
+)
+
+
+class SyntheticTestCase(TestCase):
+    """Unit-tests for the ``benchmarks.synthetic`` module."""
+
+    def test_generate_template_is_deterministic(self):
+        config = SyntheticConfig(template_lines=50)
+        text = generate_template(config, "synthetic-00001")
+        self.assertEqual(text, generate_template(config, "synthetic-00001"))
+        self.assertEqual(50, len(text.split("\n")))
+
+    def test_generate_template_with_full_overlap_uses_only_shared_rules(self):
+        config = SyntheticConfig(template_lines=50, overlap=1)
+        lines = generate_template(config, "synthetic-00001").split("\n")
+        rules = [line for line in lines if line and not line.startswith("#")]
+        self.assertTrue(rules)
+        self.assertTrue(all(rule.startswith("shared/") for rule in rules))
+
+    def test_generate_catalog(self):
+        config = SyntheticConfig(templates=10, recipes=5, templates_per_recipe=3)
+        templates, recipes = generate_catalog(config, "http://localhost")
+        self.assertEqual(10, len(templates))
+        self.assertEqual(5, len(recipes))
+        for names in recipes.values():
+            self.assertEqual(3, len(set(names)))
+            self.assertTrue(all(name in templates for name in names))
+
+
+class TemplateServerTestCase(CacheDirTestBase):
+    """Unit-tests for the ``benchmarks.server.TemplateServer`` class."""
+
+    def test_serves_templates_splittable_as_toptal_response(self):
+        config = SyntheticConfig(template_lines=10)
+        with TemplateServer(config) as server:
+            url = server.url("/toptal/api/first,second")
+            text = next(io_util.read_urls_as_text([url], 1))
+            io_util.close_session()
+        sections = planner.split_toptal_response(text)
+        self.assertListEqual(["first", "second"], list(sections))
+        self.assertIn(generate_template(config, "first"), sections["first"])
+
+    def test_counts_reused_connection_once(self):
+        with TemplateServer(SyntheticConfig(template_lines=10)) as server:
+            urls = [server.url("/github/first.gitignore")] * 3
+            urls.append(server.url("/toptal/api/second"))
+            options = io_util.FetchOptions(use_cache=False)
+            list(io_util.read_urls_as_text(urls, 1, options))
+            io_util.close_session()
+        self.assertEqual(1, server.connections)
+
+
+class RunBenchmarksTestCase(CacheDirTestBase):
+    """Unit-tests for the ``benchmarks.suite.run_benchmarks`` method."""
+
+    def test_compute_percentile(self):
+        samples = [float(value) for value in range(1, 101)]
+        self.assertEqual(50.0, compute_percentile(samples, 50))
+        self.assertEqual(99.0, compute_percentile(samples, 99))
+        self.assertEqual(0.0, compute_percentile([], 50))
+
+    def test_run_benchmarks(self):
+        report = run_benchmarks(TINY_CONFIG)
+
+        results = report["results"]
+        self.assertEqual(3, results["build"]["builds"])
+        self.assertEqual(3, results["build"]["latency"]["count"])
+        self.assertLess(results["build"]["requests"], results["build"]["urls"])
+        self.assertGreaterEqual(results["build"]["connections"], 1)
+        self.assertLessEqual(results["build"]["connections"], TINY_CONFIG.jobs)
+        self.assertGreater(results["build"]["peak_memory_bytes"], 0)
+        self.assertEqual(2, len(results["dedup"]["sizes"]))
+        self.assertEqual(10, results["catalog"]["recipes"])
+        self.assertEqual(50, results["matcher"]["rules"])
+        self.assertTrue(results["matcher"]["batch_agrees"])
+        self.assertEqual(1.0, results["matcher"]["naive_agreement"])
+        self.assertEqual(20, report["meta"]["params"]["synthetic"]["templates"])
+        json.dumps(report)
+
+    def test_run_benchmarks_restores_the_state(self):
+        datamodel.set_recipes({"recipe": ["template"]})
+        datamodel.set_templates({"template": ["url"]})
+        self.addCleanup(datamodel.set_templates, None)
+        self.addCleanup(datamodel.set_recipes, None)
+
+        run_benchmarks(TINY_CONFIG)
+        self.assertFalse(self.cache_dir.exists())
+        self.assertEqual(planner.TOPTAL_API_URL, planner.get_toptal_api_url())
+        self.assertEqual(("url",), datamodel.get_recipe_urls("recipe"))
+
+    def test_run_benchmarks_restores_the_catalog(self):
+        catalog = datamodel.open_catalog(self.temp_dir / "catalog.sqlite3")
+        self.addCleanup(catalog.close)
+        datamodel.set_catalog(catalog)
+        self.addCleanup(datamodel.set_catalog, None)
+
+        run_benchmarks(TINY_CONFIG)
+        self.assertIs(catalog, datamodel.get_catalog())
+
+    def test_main_saves_the_results(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            args = ["--templates", "10", "--recipes", "5", "--builds", "2"]
+            args += ["--latency", "0", "--dedup-size", "100", "-o", "results.json"]
+            args += ["--matcher-rules", "20", "--matcher-paths", "100"]
+            result = runner.invoke(main, args)
+            self.assertEqual(0, result.exit_code, result.output)
+            with open("results.json", encoding="utf-8") as file:
+                report = json.load(file)
+        self.assertEqual(2, report["results"]["build"]["builds"])
+        self.assertEqual(100, report["results"]["matcher"]["paths"])
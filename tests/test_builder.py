@@ -1,4 +1,8 @@
 """Unit-tests for the ``gitignore_builder.builder`` module"""
+
+import asyncio
+import threading
+from time import perf_counter
 from unittest import TestCase
 from unittest.mock import MagicMock
 from unittest.mock import call
@@ -9,12 +13,32 @@ from ddt import ddt
 
 from gitignore_builder.builder import SEPARATOR_FILL_CHAR
 from gitignore_builder.builder import SEPARATOR_LINE_LENGTH
+from gitignore_builder.builder import BuildOptions
+from gitignore_builder.builder import CanonicalLineAccumulator
+from gitignore_builder.builder import LineAccumulator
 from gitignore_builder.builder import append_line
 from gitignore_builder.builder import append_section
+from gitignore_builder.builder import append_section_lines
 from gitignore_builder.builder import append_separator_line
 from gitignore_builder.builder import append_url
+from gitignore_builder.builder import build_gitignore_contents
+from gitignore_builder.builder import build_gitignore_contents_async
+from gitignore_builder.builder import build_gitignore_contents_with_stats
+from gitignore_builder.builder import build_many_gitignore_contents
+from gitignore_builder.builder import create_line_accumulator
 from gitignore_builder.builder import format_separator_line
+from gitignore_builder.builder import iter_gitignore_contents
+from gitignore_builder.builder import parse_source_sections
+from gitignore_builder.builder import prune_subsumed_rules
 from gitignore_builder.builder import should_append
+from gitignore_builder.builder import update_gitignore_contents
+from gitignore_builder.io_util import FetchOptions
+from gitignore_builder.planner import TOPTAL_API_URL
+
+from .abstract_tests import CacheDirTestBase
+from .http_stubs import AsyncHttpStub
+from .http_stubs import HttpStubServer
+from .http_stubs import StubResponse
 
 
 @ddt
@@ -75,6 +99,233 @@ class ShouldAppendTestCase(TestCase):
             raise ValueError(last_line_type)
 
 
+class ShouldAppendToAccumulatorTestCase(ShouldAppendTestCase):
+    """Unit-tests for the ``builder.should_append`` method with accumulator."""
+
+    @classmethod
+    def generate_lines_list(cls, last_line_type):
+        return LineAccumulator(super().generate_lines_list(last_line_type))
+
+
+class LineAccumulatorTestCase(TestCase):
+    """Unit-tests for the ``builder.LineAccumulator`` class."""
+
+    def test_behaves_like_list_of_lines(self):
+        lines = LineAccumulator(["# A", "*.log", ""])
+        self.assertEqual(3, len(lines))
+        self.assertEqual("", lines[-1])
+        self.assertListEqual(["# A", "*.log", ""], list(lines))
+        self.assertListEqual(["# A", "*.log", ""], lines.lines)
+        self.assertEqual("# A\n*.log\n", lines.to_text())
+
+    def test_contains_checks_rules_and_comments(self):
+        lines = LineAccumulator(["# A", "*.log"])
+        self.assertIn("*.log", lines)
+        self.assertIn("# A", lines)
+        self.assertNotIn("*.tmp", lines)
+        self.assertNotIn("# B", lines)
+
+    def test_append_functions_work_on_accumulator(self):
+        lines = LineAccumulator()
+        append_section(lines, "# A\n*.log\n\n*.log\n", "one")
+        append_section(lines, "# B\n*.log\n", "two")
+        expected = [
+            format_separator_line("one"),
+            "# A",
+            "*.log",
+            "",
+            format_separator_line("two"),
+            "# B",
+            "",
+        ]
+        self.assertListEqual(expected, lines.lines)
+
+    def test_drain_keeps_dedup_index(self):
+        lines = LineAccumulator()
+        append_section(lines, "# A\n*.log\n", "one")
+        drained = lines.drain()
+        self.assertListEqual(
+            [format_separator_line("one"), "# A", "*.log", ""], drained
+        )
+        self.assertListEqual([], lines.lines)
+        self.assertEqual(4, len(lines))
+        self.assertEqual("", lines[-1])
+
+        append_section(lines, "# B\n*.log\n\n*.tmp\n", "two")
+        expected = [format_separator_line("two"), "# B", "", "*.tmp", ""]
+        self.assertListEqual(expected, lines.drain())
+
+    def test_append_section_lines_matches_append_section(self):
+        for text in ("# A\n*.log\n\n*.log\n", "*.log", "\n", "", "# A\r\n *.tmp \n"):
+            expected = LineAccumulator()
+            append_section(expected, text, "title")
+            actual = LineAccumulator()
+            appended = append_section_lines(actual, iter(text.split("\n")), "title")
+            if text:
+                self.assertTrue(appended)
+                self.assertListEqual(expected.lines, actual.lines)
+            else:
+                self.assertFalse(appended)
+                self.assertListEqual([], actual.lines)
+
+    def test_append_line_scales_linearly(self):
+        def measure(count):
+            lines = LineAccumulator()
+            started = perf_counter()
+            for i in range(count):
+                append_line(lines, f"file-{i}.tmp")
+                append_line(lines, f"file-{i}.tmp")
+            return perf_counter() - started
+
+        measure(1000)  # warm-up
+        small = min(measure(5000) for _ in range(3))
+        large = min(measure(40000) for _ in range(3))
+
+        # 8x the input: linear is ~8x the time, quadratic would be ~64x
+        self.assertLess(large / small, 24)
+
+
+class ShouldAppendToCanonicalAccumulatorTestCase(ShouldAppendTestCase):
+    """Unit-tests for the ``builder.should_append`` method with canonical dedup."""
+
+    @classmethod
+    def generate_lines_list(cls, last_line_type):
+        return CanonicalLineAccumulator(super().generate_lines_list(last_line_type))
+
+
+class CanonicalLineAccumulatorTestCase(TestCase):
+    """Unit-tests for the ``builder.CanonicalLineAccumulator`` class."""
+
+    def test_drops_equivalent_rules_keeping_first_spelling(self):
+        lines = CanonicalLineAccumulator()
+        append_section(lines, "**/.idea/\n/.idea/\n.idea/\n*.py[cod]\n*.py[doc]")
+        expected = [format_separator_line(""), "**/.idea/", "/.idea/", "*.py[cod]"]
+        self.assertListEqual(expected, lines.lines)
+
+    def test_keeps_canonical_spelling(self):
+        lines = CanonicalLineAccumulator(spelling="canonical")
+        append_section(lines, "**/.idea/\n.idea/\n/foo/bar\n# **/keep")
+        expected = [format_separator_line(""), ".idea/", "foo/bar", "# **/keep"]
+        self.assertListEqual(expected, lines.lines)
+
+    def test_keeps_rule_repeated_after_opposite_rule(self):
+        lines = CanonicalLineAccumulator()
+        text = "*.log\n!keep.log\n**/*.log\n*.log\n!keep.log\n!keep.log"
+        append_section(lines, text)
+        expected = [
+            format_separator_line(""),
+            "*.log",
+            "!keep.log",
+            "**/*.log",
+            "!keep.log",
+        ]
+        self.assertListEqual(expected, lines.lines)
+
+    def test_drain_keeps_dedup_index(self):
+        lines = CanonicalLineAccumulator()
+        append_section(lines, "foo/", "one")
+        lines.drain()
+        append_section(lines, "**/foo/\n", "two")
+        self.assertListEqual([format_separator_line("two"), ""], lines.drain())
+
+    def test_dedup_option_selects_accumulator(self):
+        self.assertIs(LineAccumulator, type(create_line_accumulator()))
+        lines = create_line_accumulator(BuildOptions("canonical", "canonical"))
+        self.assertIs(CanonicalLineAccumulator, type(lines))
+        with self.assertRaises(ValueError):
+            create_line_accumulator(BuildOptions("fuzzy"))
+        with self.assertRaises(ValueError):
+            create_line_accumulator(BuildOptions("exact", "last"))
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_build_drops_equivalent_rules_of_other_sources(
+        self, mock_read_url: MagicMock
+    ):
+        texts = {"url-a": "/foo/bar\nbaz", "url-b": "foo/bar\n**/baz"}
+        mock_read_url.side_effect = lambda url, options: texts.get(url)
+        exact = build_gitignore_contents(list(texts), jobs=1)
+        options = BuildOptions(dedup="canonical")
+        canonical = build_gitignore_contents(list(texts), jobs=1, options=options)
+
+        self.assertIn("\nfoo/bar\n**/baz", exact)
+        self.assertTrue(canonical.endswith(format_separator_line("source: url-b")))
+
+
+class PruneSubsumedTestCase(TestCase):
+    """Unit-tests for pruning the rules covered by earlier broader rules."""
+
+    PRUNE = BuildOptions(prune_subsumed=True)
+
+    def test_prunes_covered_rules(self):
+        text = "*.pyc\nfoo/*.pyc\n.idea/\n.idea/workspace.xml\n*.so"
+        self.assertEqual("*.pyc\n.idea/\n*.so", prune_subsumed_rules(text))
+
+    def test_does_not_prune_across_negation(self):
+        text = "*.log\n!keep.log\nlogs/*.log\n*.tmp\nfoo.tmp"
+        expected = "*.log\n!keep.log\nlogs/*.log\n*.tmp"
+        self.assertEqual(expected, prune_subsumed_rules(text))
+
+    def test_does_not_prune_rule_in_dir_re_included_later(self):
+        text = ".idea/\n.idea/workspace.xml\n!.idea/"
+        self.assertEqual(text, prune_subsumed_rules(text))
+
+    def test_does_not_prune_rule_in_dir_named_by_later_negation(self):
+        text = "**/foo\nfoo/*.py\n!foo"
+        self.assertEqual(text, prune_subsumed_rules(text))
+
+    def test_does_not_prune_broader_rule_appended_later(self):
+        text = "foo/*.pyc\n*.pyc"
+        self.assertEqual(text, prune_subsumed_rules(text))
+
+    def test_does_not_leave_runs_of_empty_lines(self):
+        text = "*.pyc\n\nfoo/*.pyc\n\n*.so"
+        self.assertEqual("*.pyc\n\n*.so", prune_subsumed_rules(text))
+
+    def test_keeps_canonical_rule_repeated_after_negation(self):
+        text = "*.log\n!keep.log\n*.log\nlogs/*.log"
+        options = self.PRUNE._replace(dedup="canonical")
+        self.assertEqual("*.log\n!keep.log\n*.log", prune_subsumed_rules(text, options))
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_prune_subsumed_option_applies_to_build(self, mock_read_url: MagicMock):
+        mock_read_url.return_value = "*.pyc\nfoo/*.pyc"
+        self.assertIn("foo/*.pyc", build_gitignore_contents(["url-a"], jobs=1))
+        text = build_gitignore_contents(["url-a"], jobs=1, options=self.PRUNE)
+        self.assertNotIn("foo/*.pyc", text)
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_canonical_build_keeps_rule_repeated_after_negation(
+        self, mock_read_url: MagicMock
+    ):
+        texts = {"url-a": "*.log\n!keep.log", "url-b": "*.log\nlogs/*.log"}
+        mock_read_url.side_effect = lambda url, options: texts.get(url)
+        options = self.PRUNE._replace(dedup="canonical")
+        text = build_gitignore_contents(list(texts), jobs=1, options=options)
+        separator = format_separator_line("source: url-b")
+        self.assertTrue(text.endswith(f"!keep.log\n{separator}\n*.log"))
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_build_prunes_across_sources(self, mock_read_url: MagicMock):
+        texts = {"url-a": ".idea/\n.idea/workspace.xml", "url-b": "!.idea/"}
+        mock_read_url.side_effect = lambda url, options: texts.get(url)
+        text = build_gitignore_contents(list(texts), jobs=1, options=self.PRUNE)
+        self.assertIn(".idea/workspace.xml", text)
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_build_records_pruned_rules(self, mock_read_url: MagicMock):
+        texts = {"url-a": "*.pyc\n.venv/", "url-b": "*.pyc\nsrc/*.pyc\n.venv/bin/"}
+        mock_read_url.side_effect = lambda url, options: texts.get(url)
+        result = build_gitignore_contents_with_stats(
+            list(texts), jobs=2, options=self.PRUNE
+        )
+
+        url_stats = result.stats.urls["url-b"]
+        self.assertEqual(1, url_stats.lines_dropped)
+        self.assertEqual(2, url_stats.lines_pruned)
+        self.assertEqual(0, url_stats.lines_kept)
+        self.assertNotIn("src/*.pyc", result.text)
+
+
 class AppendLineTestCase(TestCase):
     """Unit-tests for the ``builder.append_line`` method."""
 
@@ -248,3 +499,301 @@ class AppendUrlTestCase(TestCase):
         expected_calls = [call(mock_lines, mock_url_contents, mock_title)]
         actual_calls = mock_append_section.mock_calls
         self.assertListEqual(expected_calls, actual_calls)
+
+
+class BuildGitignoreContentsTestCase(TestCase):
+    """Unit-tests for the ``builder.build_gitignore_contents`` method."""
+
+    TEXTS = {
+        "url-a": "# A\n*.log\n*.tmp\n",
+        "url-b": None,
+        "url-c": "# C\n*.log\n\n.idea/\n",
+    }
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_result_does_not_depend_on_jobs(self, mock_read_url: MagicMock):
+        mock_read_url.side_effect = lambda url, options: self.TEXTS.get(url)
+        urls = list(self.TEXTS)
+        serial = build_gitignore_contents(urls, jobs=1)
+        concurrent = build_gitignore_contents(urls, jobs=3)
+        self.assertEqual(serial, concurrent)
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_sections_are_appended_in_url_order(self, mock_read_url: MagicMock):
+        mock_read_url.side_effect = lambda url, options: self.TEXTS.get(url)
+        expected = "\n".join(
+            [
+                format_separator_line("source: url-a"),
+                "# A",
+                "*.log",
+                "*.tmp",
+                "",
+                format_separator_line("source: url-c"),
+                "# C",
+                "",
+                ".idea/",
+                "",
+            ]
+        )
+        actual = build_gitignore_contents(list(self.TEXTS), jobs=3)
+        self.assertEqual(expected, actual)
+
+
+class IterGitignoreContentsTestCase(TestCase):
+    """Unit-tests for the ``builder.iter_gitignore_contents`` method."""
+
+    TEXTS = BuildGitignoreContentsTestCase.TEXTS
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_joined_chunks_match_built_contents(self, mock_read_url: MagicMock):
+        mock_read_url.side_effect = lambda url, options: self.TEXTS.get(url)
+        urls = list(self.TEXTS)
+        chunks = list(iter_gitignore_contents(urls, jobs=3))
+        self.assertEqual(2, len(chunks))
+        self.assertEqual(build_gitignore_contents(urls, jobs=1), "".join(chunks))
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_yields_section_before_later_urls_are_fetched(
+        self, mock_read_url: MagicMock
+    ):
+        released = threading.Event()
+
+        def read_url(url, **_):
+            if url == "url-c":
+                released.wait(5)
+            return self.TEXTS[url]
+
+        mock_read_url.side_effect = read_url
+        chunks = iter_gitignore_contents(list(self.TEXTS), jobs=3)
+
+        first = next(chunks)
+        self.assertFalse(released.is_set())
+        self.assertIn("*.tmp", first.split("\n"))
+        self.assertNotIn(".idea/", first.split("\n"))
+
+        released.set()
+        self.assertIn(".idea/", "".join(chunks).split("\n"))
+
+
+class IterGitignoreContentsStreamingTestCase(CacheDirTestBase):
+    """Unit-tests for the streaming of URLs by ``builder.iter_gitignore_contents``."""
+
+    ROUTES = {
+        "/a": StubResponse(b"# A\n*.log\n*.tmp\n"),
+        "/b": StubResponse(b"Not Found", status=404),
+        "/c": StubResponse(b"# C\n*.log\n\n.idea/\n"),
+        "/empty": StubResponse(b""),
+    }
+
+    def test_single_job_streams_the_same_contents(self):
+        with HttpStubServer(dict(self.ROUTES)) as server:
+            urls = [server.url(path) for path in self.ROUTES]
+            with patch(
+                "gitignore_builder.io_util.read_url_as_text", autospec=True
+            ) as mock_read_url:
+                streamed = "".join(iter_gitignore_contents(urls, jobs=1))
+                mock_read_url.assert_not_called()
+            concurrent = build_gitignore_contents(urls, jobs=4)
+
+        self.assertEqual(concurrent, streamed)
+        self.assertNotIn(format_separator_line(f"source: {urls[3]}"), streamed)
+
+    def test_single_job_fails_when_source_is_cut_off(self):
+        body = b"*.log\n" * 100_000
+        routes = {
+            "/a": self.ROUTES["/a"],
+            "/cut": StubResponse(body, drop_after=300_000),
+        }
+        with HttpStubServer(routes) as server:
+            urls = [server.url(path) for path in routes]
+            with self.assertRaises(IOError):
+                "".join(iter_gitignore_contents(urls, jobs=1))
+
+
+class ParseSourceSectionsTestCase(TestCase):
+    """Unit-tests for the ``builder.parse_source_sections`` method."""
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_splits_built_contents_by_source(self, mock_read_url: MagicMock):
+        texts = BuildGitignoreContentsTestCase.TEXTS
+        mock_read_url.side_effect = lambda url, options: texts.get(url)
+        text = build_gitignore_contents(["url-a", "url-b", "url-c"], jobs=1)
+
+        sections = parse_source_sections(text)
+        self.assertListEqual(["url-a", "url-c"], [section.url for section in sections])
+        self.assertEqual(format_separator_line("source: url-c"), sections[1].lines[0])
+        joined = [line for section in sections for line in section.lines]
+        self.assertEqual(text, "\n".join(joined))
+
+    def test_keeps_lines_preceding_first_source(self):
+        header = format_separator_line("source: https://example.com/a b")
+        text = f"# notes\n{header}\n*.log\n"
+        sections = parse_source_sections(text)
+        self.assertEqual(1, len(sections))
+        self.assertIsNone(sections[0].url)
+
+    def test_empty_text_has_no_sections(self):
+        self.assertListEqual([], parse_source_sections(""))
+
+
+class UpdateGitignoreContentsTestCase(TestCase):
+    """Unit-tests for the ``builder.update_gitignore_contents`` method."""
+
+    OLD = {
+        "url-a": "# A\n*.log\n*.tmp\n",
+        "url-b": "# B\n*.bak\n",
+        "url-c": "# C\n*.log\n.idea/\n",
+    }
+
+    def setUp(self) -> None:
+        super().setUp()
+        patcher = patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+        self.mock_read_url = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.responses = dict(self.OLD)
+        self.mock_read_url.side_effect = lambda url, options: self.responses.get(url)
+        self.old_text = build_gitignore_contents(list(self.OLD), jobs=1)
+
+    def update(self, text: str, urls=tuple(OLD)):
+        return update_gitignore_contents(text, list(urls), jobs=1)
+
+    def test_returns_same_text_when_nothing_changed(self):
+        self.assertEqual((self.old_text, []), self.update(self.old_text))
+
+    def test_result_matches_fresh_build(self):
+        self.responses["url-b"] = "# B\n*.swp\n*.tmp\n"
+        expected = build_gitignore_contents(list(self.OLD), jobs=1)
+        self.assertEqual((expected, ["url-b"]), self.update(self.old_text))
+
+    def test_reports_sections_affected_by_earlier_change(self):
+        self.responses["url-a"] = "# A\n*.tmp\n"
+        text, changed = self.update(self.old_text)
+        self.assertListEqual(["url-a", "url-c"], changed)
+        self.assertIn("*.log", text.split("\n"))
+
+    def test_reports_added_and_removed_sections(self):
+        urls = ["url-a", "url-d", "url-b"]
+        self.responses["url-d"] = "*.bak\n*.out\n"
+        expected = build_gitignore_contents(urls, jobs=1)
+        self.assertEqual(
+            (expected, ["url-d", "url-b", "url-c"]), self.update(self.old_text, urls)
+        )
+
+    def test_reports_only_inserted_section(self):
+        urls = ["url-a", "url-d", "url-b", "url-c"]
+        self.responses["url-d"] = "# D\n*.out\n"
+        expected = build_gitignore_contents(urls, jobs=1)
+        self.assertEqual((expected, ["url-d"]), self.update(self.old_text, urls))
+
+    def test_reports_only_removed_section(self):
+        urls = ["url-a", "url-c"]
+        expected = build_gitignore_contents(urls, jobs=1)
+        self.assertEqual((expected, ["url-b"]), self.update(self.old_text, urls))
+
+    def test_keeps_lines_preceding_first_source(self):
+        text = "# managed by gitignore-builder\n" + self.old_text
+        self.responses["url-c"] = "# C\n.vscode/\n"
+        updated, changed = self.update(text)
+        self.assertListEqual(["url-c"], changed)
+        self.assertTrue(updated.startswith("# managed by gitignore-builder\n# ="))
+
+
+class BuildGitignoreContentsAsyncTestCase(CacheDirTestBase):
+    """Unit-tests for the ``builder.build_gitignore_contents_async`` method."""
+
+    ROUTES = {
+        "/a": StubResponse(b"# A\n*.log\n*.tmp\n", delay=0.05),
+        "/b": StubResponse(b"Not Found", status=404),
+        "/c": StubResponse(b"# C\n*.log\n\n.idea/\n", chunked=True),
+    }
+
+    def test_result_matches_blocking_build(self):
+        async def scenario():
+            async with AsyncHttpStub(self.ROUTES) as stub:
+                urls = [stub.url(path) for path in self.ROUTES]
+                texts = {
+                    url: self.ROUTES[path].body.decode()
+                    for url, path in zip(urls, self.ROUTES)
+                    if self.ROUTES[path].status == 200
+                }
+                return urls, texts, await build_gitignore_contents_async(urls)
+
+        urls, texts, actual = asyncio.run(scenario())
+
+        with patch("gitignore_builder.io_util.read_url_as_text") as mock_read_url:
+            mock_read_url.side_effect = lambda url, options: texts.get(url)
+            expected = build_gitignore_contents(urls, jobs=1)
+
+        self.assertEqual(expected, actual)
+
+
+class BuildGitignoreContentsCoalescingTestCase(CacheDirTestBase):
+    """Unit-tests for coalescing of toptal URLs by the builder."""
+
+    URLS = [
+        TOPTAL_API_URL + "eclipse",
+        "url-a",
+        TOPTAL_API_URL + "java,maven",
+    ]
+
+    RESPONSES = {
+        TOPTAL_API_URL + "eclipse,java,maven": "### Eclipse ###\n.metadata\n\n"
+        "### Java ###\n*.class\n\n### Maven ###\ntarget/\n",
+        "url-a": "*.log\n",
+    }
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_fetches_toptal_urls_with_single_request(self, mock_read_url: MagicMock):
+        mock_read_url.side_effect = lambda url, options: self.RESPONSES.get(url)
+        text = build_gitignore_contents(self.URLS, jobs=1)
+
+        options = FetchOptions()
+        expected_calls = [
+            call(TOPTAL_API_URL + "eclipse,java,maven", options=options),
+            call("url-a", options=options),
+        ]
+        self.assertListEqual(expected_calls, mock_read_url.mock_calls)
+        for url in self.URLS:
+            self.assertIn(format_separator_line(f"source: {url}"), text)
+        for rule in (".metadata", "*.class", "target/", "*.log"):
+            self.assertIn(rule, text.split("\n"))
+
+
+class BuildManyGitignoreContentsTestCase(CacheDirTestBase):
+    """Unit-tests for the ``builder.build_many_gitignore_contents`` method."""
+
+    SOURCES = {
+        "java": [TOPTAL_API_URL + "java", "url-a", TOPTAL_API_URL + "linux"],
+        "python": [TOPTAL_API_URL + "python", "url-a", TOPTAL_API_URL + "linux"],
+    }
+
+    RESPONSES = {
+        TOPTAL_API_URL + "java,linux,python": "### Java ###\n*.class\n\n"
+        "### Linux ###\n*~\n\n### Python ###\n*.pyc\n",
+        TOPTAL_API_URL + "java,linux": "### Java ###\n*.class\n\n### Linux ###\n*~\n",
+        TOPTAL_API_URL + "python,linux": "### Python ###\n*.pyc\n\n"
+        "### Linux ###\n*~\n",
+        "url-a": "*.log\n",
+    }
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_fetches_union_of_urls_once(self, mock_read_url: MagicMock):
+        mock_read_url.side_effect = lambda url, options: self.RESPONSES.get(url)
+        options = BuildOptions(fetch=FetchOptions(ttl=60))
+        results = build_many_gitignore_contents(self.SOURCES, jobs=4, options=options)
+
+        expected_calls = [
+            call(TOPTAL_API_URL + "java,linux,python", options=options.fetch),
+            call("url-a", options=options.fetch),
+        ]
+        self.assertCountEqual(expected_calls, mock_read_url.mock_calls)
+        self.assertListEqual(["java", "python"], list(results))
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_results_match_separate_builds(self, mock_read_url: MagicMock):
+        mock_read_url.side_effect = lambda url, options: self.RESPONSES.get(url)
+        results = build_many_gitignore_contents(self.SOURCES, jobs=4)
+
+        for name, urls in self.SOURCES.items():
+            expected = build_gitignore_contents(urls, jobs=1)
+            self.assertEqual(expected, results[name])
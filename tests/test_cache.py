@@ -0,0 +1,230 @@
+"""Unit-tests for the ``gitignore_builder.cache`` module."""
+
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+from unittest.mock import call
+from unittest.mock import patch
+
+from gitignore_builder import cache
+from gitignore_builder.cache import APP_NAME
+from gitignore_builder.cache import CacheEntry
+from gitignore_builder.cache import NotCachedError
+
+from .abstract_tests import CacheDirTestBase
+
+
+class GetCacheDirTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.get_cache_dir`` method."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self._cache_dir_patcher.stop()
+
+    def tearDown(self) -> None:
+        self._cache_dir_patcher.start()
+        super().tearDown()
+
+    @patch("platformdirs.user_cache_path", autospec=True)
+    def test_returns_user_cache_path(self, mock_get_platform_dir: MagicMock):
+        mock_dir = MagicMock(spec=Path)
+        mock_get_platform_dir.return_value = mock_dir
+        self.assertEqual(mock_dir, cache.get_cache_dir())
+        self.assertListEqual([call(appname=APP_NAME)], mock_get_platform_dir.mock_calls)
+
+
+class CacheEntryStorageTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.load_entry`` and ``cache.save_entry`` methods."""
+
+    def test_saved_entry_is_loaded_back(self):
+        entry = CacheEntry("url", "*.log\n", '"v1"', "Mon, 01 Jan 2024", 1.5)
+        cache.save_entry(entry)
+        self.assertEqual(entry, cache.load_entry("url"))
+
+    def test_returns_none_when_missing(self):
+        self.assertIsNone(cache.load_entry("url"))
+
+    def test_returns_none_when_corrupted(self):
+        file = cache.get_entry_file("url")
+        file.parent.mkdir(parents=True)
+        file.write_text("{", encoding="utf-8")
+        self.assertIsNone(cache.load_entry("url"))
+
+
+class ObjectStoreTestCase(CacheDirTestBase):
+    """Unit-tests for the content-addressed ``cache`` object store."""
+
+    def test_object_is_stored_under_its_digest(self):
+        digest = cache.write_object("*.log\n")
+        self.assertEqual(cache.compute_digest("*.log\n"), digest)
+        self.assertTrue(cache.get_object_file(digest).exists())
+        self.assertEqual("*.log\n", cache.read_object(digest))
+
+    def test_returns_none_for_missing_object(self):
+        self.assertIsNone(cache.read_object(cache.compute_digest("missing")))
+
+    def test_urls_with_same_body_share_the_object(self):
+        cache.save_entry(CacheEntry("url-1", "*.log\n"))
+        cache.save_entry(CacheEntry("url-2", "*.log\n"))
+        objects = [p for p in self.cache_dir.rglob("*") if p.is_file()]
+        object_files = [p for p in objects if cache.OBJECTS_DIRNAME in p.parts]
+        self.assertEqual(1, len(object_files))
+
+    def test_entry_with_missing_object_is_ignored(self):
+        cache.save_entry(CacheEntry("url", "*.log\n"))
+        cache.get_object_file(cache.compute_digest("*.log\n")).unlink()
+        self.assertIsNone(cache.load_entry("url"))
+
+
+class IterRecordsTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.iter_records`` method."""
+
+    def test_yields_url_and_digest_of_each_entry(self):
+        self.assertListEqual([], list(cache.iter_records()))
+        self.assertEqual(0, cache.get_records_mtime_ns())
+
+        cache.save_entry(CacheEntry("https://a.test/1", "*.log"))
+        cache.save_entry(CacheEntry("https://a.test/2", "*.tmp"))
+        self.assertDictEqual(
+            {
+                "https://a.test/1": cache.compute_digest("*.log"),
+                "https://a.test/2": cache.compute_digest("*.tmp"),
+            },
+            dict(cache.iter_records()),
+        )
+        self.assertLess(0, cache.get_records_mtime_ns())
+
+    def test_skips_bad_records(self):
+        cache.save_entry(CacheEntry("https://a.test/1", "*.log"))
+        cache.get_entry_file("https://a.test/2").write_text("{bad", encoding="utf-8")
+        self.assertListEqual(
+            ["https://a.test/1"], [url for url, _ in cache.iter_records()]
+        )
+
+
+class RequireEntryTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.require_entry`` method."""
+
+    def test_returns_cached_entry(self):
+        cache.save_entry(CacheEntry("url", "*.log\n"))
+        self.assertEqual("*.log\n", cache.require_entry("url").body)
+
+    def test_raises_with_clear_message_when_missing(self):
+        with self.assertRaises(NotCachedError) as ctx:
+            cache.require_entry("https://example.com/missing.gitignore")
+        self.assertIn("https://example.com/missing.gitignore", str(ctx.exception))
+
+
+class SnapshotTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.load_snapshot`` and ``cache.save_snapshot``."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.file = self.temp_dir / "data.yaml"
+        self.file.write_text("a: [1]", encoding="utf-8")
+
+    def test_saved_snapshot_is_loaded_back(self):
+        cache.save_snapshot(self.file, {"a": [1]})
+        self.assertEqual({"a": [1]}, cache.load_snapshot(self.file))
+
+    def test_returns_none_when_missing(self):
+        self.assertIsNone(cache.load_snapshot(self.file))
+
+    def test_returns_none_when_file_changed(self):
+        cache.save_snapshot(self.file, {"a": [1]})
+        self.file.write_text("a: [1, 2]", encoding="utf-8")
+        self.assertIsNone(cache.load_snapshot(self.file))
+
+    def test_unsupported_data_is_not_stored(self):
+        cache.save_snapshot(self.file, {"a": object()})
+        self.assertIsNone(cache.load_snapshot(self.file))
+
+    def test_returns_none_when_corrupted(self):
+        cache.save_snapshot(self.file, {"a": [1]})
+        cache.get_snapshot_file(self.file).write_bytes(b"corrupted")
+        self.assertIsNone(cache.load_snapshot(self.file))
+
+
+class IsFreshTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.is_fresh`` method."""
+
+    def test_never_fresh_without_ttl(self):
+        entry = CacheEntry("url", "", fetched_at=time.time())
+        self.assertFalse(cache.is_fresh(entry, 0))
+
+    def test_fresh_within_ttl(self):
+        entry = CacheEntry("url", "", fetched_at=time.time())
+        self.assertTrue(cache.is_fresh(entry, 60))
+
+    def test_stale_after_ttl(self):
+        entry = CacheEntry("url", "", fetched_at=time.time() - 61)
+        self.assertFalse(cache.is_fresh(entry, 60))
+
+    def test_missing_entry_is_not_fresh(self):
+        self.assertFalse(cache.is_fresh(None, 60))
+
+
+class GetConditionalHeadersTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.get_conditional_headers`` method."""
+
+    def test_no_headers_without_entry(self):
+        self.assertDictEqual({}, cache.get_conditional_headers(None))
+
+    def test_headers_from_entry_validators(self):
+        entry = CacheEntry("url", "", '"v1"', "Mon, 01 Jan 2024")
+        expected = {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024"}
+        self.assertDictEqual(expected, cache.get_conditional_headers(entry))
+
+
+class StoreResponseTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.store_response`` method."""
+
+    def test_stores_ok_response(self):
+        headers = {"etag": '"v1"', "last-modified": "Mon, 01 Jan 2024"}
+        text = cache.store_response("url", None, 200, headers, "*.log\n")
+        self.assertEqual("*.log\n", text)
+
+        entry = cache.load_entry("url")
+        self.assertEqual(("*.log\n", '"v1"'), (entry.body, entry.etag))
+        self.assertEqual("Mon, 01 Jan 2024", entry.last_modified)
+
+    def test_returns_cached_body_on_not_modified(self):
+        entry = CacheEntry("url", "*.log\n", '"v1"', fetched_at=1.0)
+        text = cache.store_response("url", entry, 304, {}, "")
+        self.assertEqual("*.log\n", text)
+        self.assertGreater(cache.load_entry("url").fetched_at, 1.0)
+
+    def test_does_not_store_error_response(self):
+        text = cache.store_response("url", None, 404, {}, "Not Found")
+        self.assertEqual("Not Found", text)
+        self.assertIsNone(cache.load_entry("url"))
+
+
+class IterStoredLinesTestCase(CacheDirTestBase):
+    """Unit-tests for the ``cache.iter_stored_lines`` method."""
+
+    HEADERS = {"etag": '"v1"', "last-modified": "Sat, 01 Jan 2022 00:00:00 GMT"}
+
+    def test_stores_entry_once_all_lines_are_consumed(self):
+        lines = cache.iter_stored_lines(
+            "url-a", iter(["*.log", "*.tmp", ""]), self.HEADERS
+        )
+        self.assertEqual("*.log", next(lines))
+        self.assertIsNone(cache.load_entry("url-a"))
+
+        self.assertListEqual(["*.tmp", ""], list(lines))
+        entry = cache.load_entry("url-a")
+        self.assertEqual("*.log\n*.tmp\n", entry.body)
+        self.assertEqual('"v1"', entry.etag)
+        self.assertEqual(self.HEADERS["last-modified"], entry.last_modified)
+        self.assertEqual(
+            cache.compute_digest(entry.body), cache.compute_digest("*.log\n*.tmp\n")
+        )
+
+    def test_does_not_store_partially_consumed_lines(self):
+        lines = cache.iter_stored_lines("url-a", iter(["*.log", "*.tmp"]), {})
+        next(lines)
+        lines.close()
+        self.assertIsNone(cache.load_entry("url-a"))
+        objects = self.cache_dir / cache.OBJECTS_DIRNAME
+        self.assertListEqual([], [p for p in objects.rglob("*") if p.is_file()])
@@ -0,0 +1,98 @@
+"""Unit-tests for the ``gitignore_builder.catalog_db`` module."""
+import sqlite3
+
+from gitignore_builder.catalog_db import SqliteCatalog
+from gitignore_builder.datamodel import _DEFAULT_RECIPES as DEFAULT_RECIPES
+from gitignore_builder.datamodel import _DEFAULT_TEMPLATES as DEFAULT_TEMPLATES
+
+from .abstract_tests import TempDirTestBase
+
+RECIPES = {
+    "java": ["eclipse", "java-lang"],
+    "python": ["intellij", "pycharm", "no-such-template"],
+}
+
+TEMPLATES = {
+    "eclipse": ["eclipse-URL"],
+    "java-lang": ["java-lang-URL"],
+    "intellij": ["JetBrains-URL", "intellij-URL"],
+    "pycharm": ["JetBrains-URL", "pycharm-URL", "intellij-URL"],
+}
+
+
+class SqliteCatalogTestCase(TempDirTestBase):
+    """Unit-tests for the ``catalog_db.SqliteCatalog`` class."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.file = self.temp_dir / "config" / "catalog.sqlite3"
+        self.catalog = SqliteCatalog(self.file)
+        self.catalog.import_data(RECIPES, TEMPLATES)
+
+    def tearDown(self) -> None:
+        self.catalog.close()
+        super().tearDown()
+
+    def test_creates_the_file(self):
+        self.assertTrue(self.file.is_file())
+
+    def test_looks_up_rows_by_name(self):
+        self.assertTupleEqual(("eclipse", "java-lang"), self.catalog.recipes["java"])
+        self.assertTupleEqual(
+            ("JetBrains-URL", "intellij-URL"), self.catalog.templates["intellij"]
+        )
+        self.assertIn("pycharm", self.catalog.templates)
+        self.assertNotIn("no-such-template", self.catalog.templates)
+        with self.assertRaises(KeyError):
+            _ = self.catalog.recipes["no-such-recipe"]
+
+    def test_lists_names_in_order(self):
+        self.assertListEqual(["java", "python"], list(self.catalog.recipes))
+        self.assertEqual(4, len(self.catalog.templates))
+
+    def test_get_recipe_urls(self):
+        self.assertTupleEqual(
+            ("JetBrains-URL", "intellij-URL", "pycharm-URL"),
+            self.catalog.get_recipe_urls("python"),
+        )
+        self.assertIsNone(self.catalog.get_recipe_urls("no-such-recipe"))
+
+    def test_import_replaces_same_named_rows(self):
+        self.catalog.get_recipe_urls("java")  # memoized until next import
+        self.catalog.import_data({}, {"eclipse": ["new-eclipse-URL"]})
+        self.assertTupleEqual(("new-eclipse-URL",), self.catalog.templates["eclipse"])
+        self.assertTupleEqual(
+            ("new-eclipse-URL", "java-lang-URL"), self.catalog.get_recipe_urls("java")
+        )
+        self.assertEqual(4, len(self.catalog.templates))
+
+    def test_import_with_replace_deletes_all_rows(self):
+        self.catalog.import_data({"java": ["eclipse"]}, {"eclipse": []}, replace=True)
+        self.assertListEqual(["java"], list(self.catalog.recipes))
+        self.assertListEqual(["eclipse"], list(self.catalog.templates))
+        self.assertTupleEqual((), self.catalog.get_recipe_urls("java"))
+
+    def test_export_data_round_trip(self):
+        self.assertTupleEqual((RECIPES, TEMPLATES), self.catalog.export_data())
+
+        self.catalog.import_data(DEFAULT_RECIPES, DEFAULT_TEMPLATES, replace=True)
+        self.catalog.close()
+        self.catalog = SqliteCatalog(self.file)
+        self.assertTupleEqual(
+            (DEFAULT_RECIPES, DEFAULT_TEMPLATES), self.catalog.export_data()
+        )
+
+    def test_lookups_use_indexes(self):
+        plan = self.catalog._connection.execute(  # pylint: disable=protected-access
+            "EXPLAIN QUERY PLAN SELECT id FROM templates WHERE name = ?", ("eclipse",)
+        ).fetchall()
+        self.assertIn("USING COVERING INDEX", plan[0][-1])
+
+    def test_rejects_unsupported_schema_version(self):
+        self.catalog.close()
+        with sqlite3.connect(str(self.file)) as connection:
+            connection.execute("PRAGMA user_version = 999")
+        connection.close()
+        with self.assertRaises(ValueError):
+            SqliteCatalog(self.file)
+        self.catalog = SqliteCatalog(self.temp_dir / "other.sqlite3")
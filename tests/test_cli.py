@@ -1,11 +1,24 @@
 """Unit-tests for the ``gitignore_builder.cli`` package."""
+import json
 import logging
+import os
+import subprocess
+import sys
+from typing import Dict
+from unittest import TestCase
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import click
+
+from gitignore_builder import cache
 from gitignore_builder import cli
+from gitignore_builder import datamodel
+from gitignore_builder import io_util
+from gitignore_builder import pattern_index
 
 from .abstract_tests import CliCommandTestBase
+from .abstract_tests import TempDirTestBase
 
 _log = logging.getLogger(__name__)
 _log.addHandler(logging.NullHandler())
@@ -14,6 +27,10 @@ _log.addHandler(logging.NullHandler())
 class CliTest(CliCommandTestBase):
     """Unit-tests for the ``gitignore_builder.cli`` package."""
 
+    def tearDown(self) -> None:
+        pattern_index.reset_index()
+        super().tearDown()
+
     @property
     def command(self):
         return cli.gitignore_builder
@@ -26,6 +43,17 @@ class CliTest(CliCommandTestBase):
         self.invoke(["--help"])
         self.assertIn("Usage: gitignore-builder", self.result.output)
 
+    def test_help_option_lists_the_commands(self):
+        self.invoke(["--help"])
+        self.assertIn("Usage: gitignore-builder [OPTIONS] COMMAND", self.result.output)
+        for name in ("analyze", "build", "catalog", "which"):
+            self.assertIn(f"  {name}  ", self.result.output)
+
+    def test_help_option_of_build_command(self):
+        self.invoke(["build", "--help"])
+        self.assertIn("Usage: gitignore-builder build", self.result.output)
+        self.assertIn("--prune-subsumed", self.result.output)
+
     @patch("gitignore_builder.datamodel.get_templates_file")
     @patch("gitignore_builder.datamodel.get_recipes_file")
     def test_files_prints_paths(
@@ -41,6 +69,11 @@ class CliTest(CliCommandTestBase):
         self.assertIn(str(mock_recipes_file), self.result.output)
         self.assertIn(str(mock_templates_file), self.result.output)
 
+    def test_jobs_option_rejects_non_positive_values(self):
+        self.invoke(["--jobs", "0", "python"])
+        self.assertNotEqual(0, self.result.exit_code)
+        self.assertIn("--jobs", self.result.output)
+
     def test_generate_contents_and_write_them_to_disk(self):
         file = self.temp_dir / ".gitignore"
         self.assertFalse(file.exists())
@@ -50,3 +83,373 @@ class CliTest(CliCommandTestBase):
 
         resulting_text = file.read_text(encoding="utf-8")
         self.assertGreaterEqual(len(resulting_text), 0)
+
+    def test_offline_build_fails_clearly_when_not_cached(self):
+        file = self.temp_dir / ".gitignore"
+        self.invoke(["--offline", "python", str(file)], standalone_mode=False)
+        self.assertEqual(1, self.result.exit_code)
+        self.assertIsInstance(self.result.exception, click.ClickException)
+        self.assertIsInstance(self.result.exception.__cause__, cache.NotCachedError)
+        self.assertIn("No cached contents for URL", str(self.result.exception))
+
+    def test_failed_build_leaves_existing_output_file_unchanged(self):
+        urls = datamodel.get_recipe_urls("python")
+        for url in urls[:-1]:
+            cache.save_entry(cache.CacheEntry(url, f"# {url}\n*.log\n"))
+        file = self.temp_dir / "project" / ".gitignore"
+        file.parent.mkdir()
+        file.write_text("# old contents\n", encoding="utf-8")
+
+        args = ["--offline", "--jobs", "1", "python", str(file)]
+        self.invoke(args, standalone_mode=False)
+        self.assertEqual(1, self.result.exit_code)
+        self.assertIsInstance(self.result.exception.__cause__, cache.NotCachedError)
+        self.assertEqual("# old contents\n", file.read_text(encoding="utf-8"))
+        self.assertListEqual([file], list(file.parent.iterdir()))
+
+    def test_offline_build_uses_cached_contents(self):
+        for url in datamodel.get_recipe_urls("python"):
+            cache.save_entry(cache.CacheEntry(url, f"# {url}\n*.log\n"))
+
+        file = self.temp_dir / ".gitignore"
+        self.invoke(["--offline", "python", str(file)])
+        self.assertEqual(0, self.result.exit_code)
+        self.assertIn("*.log", file.read_text(encoding="utf-8"))
+
+    def test_stats_do_not_change_the_result(self):
+        self.save_recipe_urls("python")
+        file = self.temp_dir / ".gitignore"
+        self.invoke(["--offline", "python", str(file)])
+        expected = file.read_text(encoding="utf-8")
+
+        for stats_format in ("text", "json"):
+            file.unlink()
+            self.invoke(
+                ["--offline", "--stats", "--stats-format", stats_format, "python"]
+                + [str(file)]
+            )
+            self.assertEqual(0, self.result.exit_code, self.result.output)
+            self.assertEqual(expected, file.read_text(encoding="utf-8"))
+
+    def test_trace_writes_trace_events_file(self):
+        self.save_recipe_urls("python")
+        trace_file = self.temp_dir / "trace.json"
+        file = self.temp_dir / ".gitignore"
+        self.invoke(["--offline", "python", str(file), "--trace", str(trace_file)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+
+        events = json.loads(trace_file.read_text(encoding="utf-8"))["traceEvents"]
+        fetched = {event["args"].get("url") for event in events if event["ph"] == "X"}
+        self.assertTrue(set(datamodel.get_recipe_urls("python")).issubset(fetched))
+
+    def test_canonical_dedup_drops_equivalent_rules(self):
+        urls = datamodel.get_recipe_urls("python")
+        for number, url in enumerate(urls):
+            text = f"# {url}\n**/*.log\n" if number % 2 else f"# {url}\n*.log\n"
+            cache.save_entry(cache.CacheEntry(url, text))
+        file = self.temp_dir / ".gitignore"
+
+        self.invoke(["--offline", "python", str(file)])
+        self.assertIn("**/*.log", file.read_text(encoding="utf-8"))
+
+        args = ["--offline", "--dedup", "canonical", "--spelling", "canonical"]
+        self.invoke(args + ["python", str(file)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        text = file.read_text(encoding="utf-8")
+        self.assertNotIn("**/*.log", text)
+        self.assertEqual(1, text.split("\n").count("*.log"))
+
+    def test_prune_subsumed_drops_covered_rules(self):
+        for url in datamodel.get_recipe_urls("python"):
+            text = f"# {url}\n*.log\nlogs/*.log\n.idea/\n.idea/workspace.xml\n"
+            cache.save_entry(cache.CacheEntry(url, text))
+        file = self.temp_dir / ".gitignore"
+
+        self.invoke(["--offline", "--prune-subsumed", "python", str(file)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        lines = file.read_text(encoding="utf-8").split("\n")
+        self.assertIn("*.log", lines)
+        self.assertIn(".idea/", lines)
+        self.assertNotIn("logs/*.log", lines)
+        self.assertNotIn(".idea/workspace.xml", lines)
+
+    def test_offline_and_no_cache_are_exclusive(self):
+        self.invoke(["--offline", "--no-cache", "python"])
+        self.assertEqual(2, self.result.exit_code)
+
+    def save_recipe_urls(self, *recipes: str):
+        for recipe in recipes:
+            for url in datamodel.get_recipe_urls(recipe):
+                cache.save_entry(cache.CacheEntry(url, f"# {url}\n*.log\n"))
+
+    def test_manifest_builds_each_output(self):
+        self.save_recipe_urls("python", "java")
+        manifest = self.temp_dir / "manifest.yaml"
+        manifest.write_text("api/.gitignore: python\nweb/.gitignore: java\n")
+
+        self.invoke(["--offline", "--manifest", str(manifest)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+
+        for recipe, folder in (("python", "api"), ("java", "web")):
+            single = self.temp_dir / f"{recipe}.gitignore"
+            self.invoke(["--offline", recipe, str(single)])
+            batch = self.temp_dir / folder / ".gitignore"
+            self.assertEqual(single.read_bytes(), batch.read_bytes())
+
+    def test_manifest_with_bad_recipe_is_rejected(self):
+        manifest = self.temp_dir / "manifest.yaml"
+        manifest.write_text("api/.gitignore: no-such-recipe\n")
+
+        self.invoke(["--offline", "--manifest", str(manifest)], standalone_mode=False)
+        self.assertIsInstance(self.result.exception, click.BadParameter)
+        self.assertEqual(2, self.result.exception.exit_code)
+        self.assertIn("no-such-recipe", self.result.exception.format_message())
+
+    def test_all_builds_each_recipe_into_directory(self):
+        recipes = datamodel.get_recipe_names()
+        self.save_recipe_urls(*recipes)
+        folder = self.temp_dir / "out"
+
+        self.invoke(["--offline", "--all", str(folder)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        expected = sorted(f"{recipe}.gitignore" for recipe in recipes)
+        self.assertListEqual(expected, sorted(p.name for p in folder.iterdir()))
+
+    def test_update_writes_only_changed_file(self):
+        self.save_recipe_urls("python")
+        file = self.temp_dir / ".gitignore"
+        self.invoke(["--offline", "python", str(file)])
+        mtime_ns = file.stat().st_mtime_ns
+
+        self.invoke(["--offline", "--update", "python", str(file)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        self.assertEqual(mtime_ns, file.stat().st_mtime_ns)
+
+        url = datamodel.get_recipe_urls("python")[-1]
+        cache.save_entry(cache.CacheEntry(url, "*.changed\n"))
+        io_util.clear_memo()
+        self.invoke(["--offline", "--update", "python", str(file)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        self.assertIn("*.changed", file.read_text(encoding="utf-8").split("\n"))
+
+        fresh = self.temp_dir / "fresh.gitignore"
+        self.invoke(["--offline", "python", str(fresh)])
+        self.assertEqual(fresh.read_bytes(), file.read_bytes())
+
+    def test_update_requires_existing_file(self):
+        self.invoke(["--offline", "--update", "python", str(self.temp_dir / "missing")])
+        self.assertEqual(2, self.result.exit_code)
+
+    def test_dir_writes_result_into_each_directory(self):
+        self.save_recipe_urls("python")
+        dirs = [self.temp_dir / f"repo-{i}" for i in range(4)]
+        dirs_file = self.temp_dir / "dirs.txt"
+        dirs_file.write_text("\n".join(str(folder) for folder in dirs[1:]) + "\n")
+
+        args = ["--offline", "python", "--dir", str(dirs[0])]
+        self.invoke(args + ["--dirs-from", str(dirs_file)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+
+        single = self.temp_dir / "single.gitignore"
+        self.invoke(["--offline", "python", str(single)])
+        for folder in dirs:
+            self.assertEqual(single.read_bytes(), (folder / ".gitignore").read_bytes())
+
+    def test_dir_skips_unchanged_files(self):
+        self.save_recipe_urls("python")
+        folder = self.temp_dir / "repo"
+        self.invoke(["--offline", "--jobs", "1", "python", "--dir", str(folder)])
+        mtime_ns = (folder / ".gitignore").stat().st_mtime_ns
+
+        self.invoke(["--offline", "--jobs", "1", "python", "--dir", str(folder)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        self.assertEqual(mtime_ns, (folder / ".gitignore").stat().st_mtime_ns)
+
+    def test_dir_requires_recipe(self):
+        self.invoke(["--dir", str(self.temp_dir)])
+        self.assertEqual(2, self.result.exit_code)
+
+    def test_recipe_and_all_are_exclusive(self):
+        self.invoke(["--all", str(self.temp_dir), "python"])
+        self.assertEqual(2, self.result.exit_code)
+
+    def test_build_command_name_is_optional(self):
+        self.save_recipe_urls("python")
+        implicit = self.temp_dir / "implicit.gitignore"
+        explicit = self.temp_dir / "explicit.gitignore"
+        self.invoke(["--offline", "python", str(implicit)])
+        self.invoke(["build", "--offline", "python", str(explicit)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        self.assertEqual(implicit.read_bytes(), explicit.read_bytes())
+
+    def test_analyze_writes_pruned_file(self):
+        for url in datamodel.get_recipe_urls("python"):
+            cache.save_entry(cache.CacheEntry(url, f"# {url}\n*.log\n*.tmp\n"))
+        project = self.temp_dir / "project"
+        project.mkdir()
+        (project / "app.log").write_text("log")
+        pruned = self.temp_dir / "pruned.gitignore"
+
+        args = ["analyze", "--offline", "--recipe", "python"]
+        self.invoke(args + ["--write-pruned", str(pruned), str(project)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        lines = pruned.read_text(encoding="utf-8").split("\n")
+        self.assertIn("*.log", lines)
+        self.assertNotIn("*.tmp", lines)
+
+    def test_analyze_prunes_existing_file_in_place(self):
+        file = self.temp_dir / ".gitignore"
+        file.write_text("*.log\n*.tmp\n", encoding="utf-8")
+        (self.temp_dir / "app.tmp").write_text("tmp")
+
+        args = ["analyze", "--format", "json", "--write-pruned", str(file)]
+        self.invoke(args + [str(self.temp_dir)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        self.assertEqual("*.tmp\n", file.read_text(encoding="utf-8"))
+
+    def test_analyze_requires_gitignore_file(self):
+        self.invoke(["analyze", str(self.temp_dir)])
+        self.assertEqual(2, self.result.exit_code)
+
+    def test_analyze_recipe_and_gitignore_are_exclusive(self):
+        file = self.temp_dir / ".gitignore"
+        file.write_text("*.log\n", encoding="utf-8")
+        self.invoke(["analyze", "--recipe", "python", "--gitignore", str(file)])
+        self.assertEqual(2, self.result.exit_code)
+
+    def test_which_finds_cached_urls_of_rule(self):
+        urls = datamodel.get_recipe_urls("python")
+        for url in urls:
+            cache.save_entry(cache.CacheEntry(url, f"# {url}\n*.log\n"))
+        cache.save_entry(cache.CacheEntry(urls[0], "**/.idea/\n"))
+
+        self.invoke(["which", ".idea/"])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        with patch("gitignore_builder.cache.read_object") as mock_read_object:
+            self.invoke(["which", "*.log"])
+            mock_read_object.assert_not_called()
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+
+        self.invoke(["which", "*.tmp"])
+        self.assertEqual(1, self.result.exit_code)
+
+    @patch("gitignore_builder.datamodel.get_catalog_file")
+    def test_catalog_import_and_export(self, mock_get_catalog_file: MagicMock):
+        mock_get_catalog_file.return_value = self.temp_dir / "catalog.sqlite3"
+        recipes_file = self.temp_dir / "recipes.yaml"
+        templates_file = self.temp_dir / "templates.yaml"
+        io_util.write_data_to_file({"java": ["eclipse"]}, recipes_file)
+        io_util.write_data_to_file({"eclipse": ["eclipse-URL"]}, templates_file)
+
+        args = ["catalog", "import", "--recipes", str(recipes_file)]
+        self.invoke(args + ["--templates", str(templates_file)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+
+        folder = self.temp_dir / "exported"
+        self.invoke(["catalog", "export", str(folder)])
+        self.assertEqual(0, self.result.exit_code, self.result.output)
+        for name in (datamodel.RECIPES_FILENAME, datamodel.TEMPLATES_FILENAME):
+            self.assertDictEqual(
+                io_util.read_file_as_data(self.temp_dir / name),
+                io_util.read_file_as_data(folder / name),
+            )
+
+    @patch("gitignore_builder.datamodel.get_catalog_file")
+    def test_catalog_export_requires_catalog_file(
+        self, mock_get_catalog_file: MagicMock
+    ):
+        mock_get_catalog_file.return_value = self.temp_dir / "catalog.sqlite3"
+        self.invoke(["catalog", "export", str(self.temp_dir / "exported")])
+        self.assertEqual(2, self.result.exit_code)
+
+
+def measure_import_time(module: str, env: Dict[str, str] = None) -> Dict[str, int]:
+    """Imports the module in new interpreter using ``python -X importtime``.
+
+    Returns:
+        Dict mapping the name of each imported module to its cumulative
+        import time in microseconds.
+    """
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    )
+    result = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            result[name.strip()] = int(cumulative)
+    return result
+
+
+class CliStartupTest(TempDirTestBase):
+    """Guards the ``gitignore_builder.cli`` import-time against regressions."""
+
+    HEAVY_MODULES = (
+        "asyncio",
+        "platformdirs",
+        "requests",
+        "urllib3",
+        "yaml",
+        "gitignore_builder.builder",
+        "gitignore_builder.cache",
+        "gitignore_builder.datamodel",
+        "gitignore_builder.io_util",
+    )
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.env = dict(os.environ)
+        self.env["XDG_CONFIG_HOME"] = str(self.temp_dir / "config")
+        self.env["XDG_CACHE_HOME"] = str(self.temp_dir / "cache")
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    def test_import_does_not_load_heavy_modules(self):
+        imported = measure_import_time("gitignore_builder.cli", self.env)
+        self.assertIn("gitignore_builder.cli", imported)
+        _log.info(
+            "gitignore_builder.cli import-time: %sus",
+            imported["gitignore_builder.cli"],
+        )
+        for module in self.HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+
+    def test_version_and_help_do_not_touch_app_files(self):
+        for option in ("--version", "--help"):
+            subprocess.run(
+                [sys.executable, "-m", "gitignore_builder", option],
+                capture_output=True,
+                check=True,
+                env=self.env,
+            )
+        self.assertFalse((self.temp_dir / "config").exists())
+        self.assertFalse((self.temp_dir / "cache").exists())
+
+    def test_default_jobs_matches_io_util(self):
+        self.assertEqual(io_util.DEFAULT_JOBS, cli.DEFAULT_JOBS)
+
+
+class LazyChoiceTest(TestCase):
+    """Unit-tests for the ``cli.LazyChoice`` class."""
+
+    def test_loads_choices_once_upon_first_usage(self):
+        load_choices = MagicMock(return_value=["a", "b"])
+        choice = cli.LazyChoice(load_choices, "NAME")
+        self.assertListEqual([], load_choices.mock_calls)
+        self.assertEqual(("a", "b"), choice.choices)
+        self.assertEqual(("a", "b"), choice.choices)
+        load_choices.assert_called_once_with()
+
+    def test_metavar_does_not_load_choices(self):
+        load_choices = MagicMock(return_value=["a", "b"])
+        choice = cli.LazyChoice(load_choices, "NAME")
+        self.assertEqual("NAME", choice.get_metavar(MagicMock(), MagicMock()))
+        self.assertListEqual([], load_choices.mock_calls)
@@ -9,21 +9,37 @@ from unittest.mock import patch
 from gitignore_builder.datamodel import _DEFAULT_RECIPES as DEFAULT_RECIPES
 from gitignore_builder.datamodel import _DEFAULT_TEMPLATES as DEFAULT_TEMPLATES
 from gitignore_builder.datamodel import APP_NAME
+from gitignore_builder.datamodel import CATALOG_FILENAME
 from gitignore_builder.datamodel import RECIPES_FILENAME
 from gitignore_builder.datamodel import TEMPLATES_FILENAME
+from gitignore_builder.datamodel import freeze_catalog
+from gitignore_builder.datamodel import get_catalog
 from gitignore_builder.datamodel import get_config_dir
+from gitignore_builder.datamodel import get_recipe_names
+from gitignore_builder.datamodel import get_recipe_templates
 from gitignore_builder.datamodel import get_recipe_urls
+from gitignore_builder.datamodel import get_recipe_urls_index
 from gitignore_builder.datamodel import get_recipes
 from gitignore_builder.datamodel import get_recipes_file
+from gitignore_builder.datamodel import get_template_urls
 from gitignore_builder.datamodel import get_templates
 from gitignore_builder.datamodel import get_templates_file
+from gitignore_builder.datamodel import init
 from gitignore_builder.datamodel import init_recipes_file
 from gitignore_builder.datamodel import init_templates_file
+from gitignore_builder.datamodel import load_manifest
 from gitignore_builder.datamodel import load_recipes
 from gitignore_builder.datamodel import load_templates
+from gitignore_builder.datamodel import open_catalog
+from gitignore_builder.datamodel import set_catalog
+from gitignore_builder.datamodel import set_recipes
+from gitignore_builder.datamodel import set_templates
 
+from .abstract_tests import CacheDirTestBase
+from .abstract_tests import TempDirTestBase
 
-class ConfigApiTest(TestCase):
+
+class ConfigApiTest(CacheDirTestBase):
     @patch("platformdirs.user_config_path", autospec=True)
     def test_get_config_dir(self, mock_get_user_config_path: MagicMock):
         with TemporaryDirectory() as temp_dir:
@@ -93,7 +109,7 @@ class ConfigApiTest(TestCase):
     def test_load_templates_reads_the_file_when_existing(
         self, mock_get_templates_file: MagicMock
     ):
-        expected_templates = DEFAULT_TEMPLATES
+        expected_templates = freeze_catalog(DEFAULT_TEMPLATES)
 
         with TemporaryDirectory() as temp_dir:
             temp_dir_path = Path(temp_dir)
@@ -115,7 +131,7 @@ class ConfigApiTest(TestCase):
     def test_load_recipes_reads_the_file_when_existing(
         self, mock_get_recipes_file: MagicMock
     ):
-        expected_recipes = DEFAULT_RECIPES
+        expected_recipes = freeze_catalog(DEFAULT_RECIPES)
 
         with TemporaryDirectory() as temp_dir:
             temp_dir_path = Path(temp_dir)
@@ -150,21 +166,142 @@ class GetConfigDirTestCase(TestCase):
 
 
 class GetRecipeUrlsTest(TestCase):
-    @patch("gitignore_builder.datamodel.get_templates")
-    @patch("gitignore_builder.datamodel.get_recipes")
-    def test_returns_urls_if_ok(
-        self, mock_get_recipes: MagicMock, mock_get_templates: MagicMock
-    ):
-        mock_recipes = {"java": ["eclipse", "java-lang"]}
+    def tearDown(self) -> None:
+        set_recipes(None)
+        set_templates(None)
 
-        mock_templates = {"eclipse": ["eclipse-URL"], "java-lang": ["java-lang-URL"]}
+    def test_returns_urls_if_ok(self):
+        set_recipes({"java": ["eclipse", "java-lang"]})
+        set_templates({"eclipse": ["eclipse-URL"], "java-lang": ["java-lang-URL"]})
 
-        mock_get_recipes.return_value = mock_recipes
-        mock_get_templates.return_value = mock_templates
-
-        expected = ["eclipse-URL", "java-lang-URL"]
+        expected = ("eclipse-URL", "java-lang-URL")
         actual = get_recipe_urls("java")
-        self.assertListEqual(expected, actual)
+        self.assertTupleEqual(expected, actual)
+
+    def test_returns_each_url_once_in_first_seen_order(self):
+        set_recipes({"python": ["intellij", "pycharm"]})
+        set_templates(
+            {
+                "intellij": ["JetBrains-URL", "intellij-URL"],
+                "pycharm": ["JetBrains-URL", "pycharm-URL", "intellij-URL"],
+            }
+        )
+
+        expected = ("JetBrains-URL", "intellij-URL", "pycharm-URL")
+        actual = get_recipe_urls("python")
+        self.assertTupleEqual(expected, actual)
+
+    def test_returns_empty_tuple_for_bad_recipe_name(self):
+        self.assertTupleEqual((), get_recipe_urls("no-such-recipe"))
+
+    def test_skips_bad_template_names(self):
+        set_recipes({"java": ["eclipse", "no-such-template"]})
+        set_templates({"eclipse": ["eclipse-URL"]})
+        self.assertTupleEqual(("eclipse-URL",), get_recipe_urls("java"))
+
+    def test_index_is_rebuilt_after_setting_data(self):
+        set_recipes({"java": ["eclipse"]})
+        set_templates({"eclipse": ["eclipse-URL"]})
+        self.assertTupleEqual(("eclipse-URL",), get_recipe_urls("java"))
+
+        set_templates({"eclipse": ["new-eclipse-URL"]})
+        self.assertTupleEqual(("new-eclipse-URL",), get_recipe_urls("java"))
+
+    def test_index_maps_all_recipes(self):
+        expected = {
+            name: get_recipe_urls(name) for name in ("android", "java", "python")
+        }
+        self.assertDictEqual(expected, dict(get_recipe_urls_index()))
+
+
+class CatalogBackendTest(TempDirTestBase):
+    """Unit-tests for ``datamodel`` using the SQLite catalog."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.file = self.temp_dir / CATALOG_FILENAME
+        catalog = open_catalog(self.file)
+        catalog.import_data(
+            {"java": ["eclipse", "java-lang"]},
+            {"eclipse": ["eclipse-URL"], "java-lang": ["java-lang-URL"]},
+        )
+        catalog.close()
+
+    def tearDown(self) -> None:
+        catalog = get_catalog()
+        if catalog is not None:
+            catalog.close()
+        set_catalog(None)
+        super().tearDown()
+
+    @patch("gitignore_builder.datamodel.load_recipes", autospec=True)
+    @patch("gitignore_builder.datamodel.get_catalog_file", autospec=True)
+    def test_init_uses_existing_catalog_file(
+        self, mock_get_catalog_file: MagicMock, mock_load_recipes: MagicMock
+    ):
+        mock_get_catalog_file.return_value = self.file
+        init()
+        mock_load_recipes.assert_not_called()
+
+        self.assertListEqual(["java"], get_recipe_names())
+        self.assertTupleEqual(("eclipse", "java-lang"), get_recipe_templates("java"))
+        self.assertTupleEqual(("eclipse-URL",), get_template_urls("eclipse"))
+        self.assertTupleEqual(("eclipse-URL", "java-lang-URL"), get_recipe_urls("java"))
+        self.assertTupleEqual((), get_recipe_urls("no-such-recipe"))
+        self.assertIsNone(get_template_urls("no-such-template"))
+
+    @patch("gitignore_builder.datamodel.load_templates", autospec=True)
+    @patch("gitignore_builder.datamodel.load_recipes", autospec=True)
+    @patch("gitignore_builder.datamodel.get_catalog_file", autospec=True)
+    def test_init_falls_back_to_data_files_on_bad_catalog(
+        self,
+        mock_get_catalog_file: MagicMock,
+        mock_load_recipes: MagicMock,
+        mock_load_templates: MagicMock,
+    ):
+        bad_file = self.temp_dir / "bad.sqlite3"
+        bad_file.write_text("not a database")
+        mock_get_catalog_file.return_value = bad_file
+        init()
+        self.assertIsNone(get_catalog())
+        mock_load_recipes.assert_called_once()
+        mock_load_templates.assert_called_once()
+
+    def test_set_catalog_resets_the_index(self):
+        self.assertTupleEqual((), get_recipe_urls("no-such-recipe"))
+        set_catalog(open_catalog(self.file))
+        self.assertDictEqual(
+            {"java": ("eclipse-URL", "java-lang-URL")}, dict(get_recipe_urls_index())
+        )
+
+
+class CatalogViewsTest(TestCase):
+    """Unit-tests for the read-only catalog views of ``datamodel``."""
+
+    def tearDown(self) -> None:
+        set_recipes(None)
+
+    def test_default_views_are_shared_and_read_only(self):
+        recipes = get_recipes()
+        self.assertIs(recipes, get_recipes())
+        self.assertIs(get_templates(), get_templates())
+        with self.assertRaises(TypeError):
+            recipes["new"] = ("linux",)  # noqa
+        self.assertIsInstance(recipes["java"], tuple)
+
+    def test_set_data_is_frozen(self):
+        data = {"java": ["eclipse"]}
+        set_recipes(data)
+        data["java"].append("intellij")
+        self.assertDictEqual({"java": ("eclipse",)}, dict(get_recipes()))
+
+    def test_freeze_catalog_normalizes_values(self):
+        actual = freeze_catalog({"a": None, "b": "url", "c": ["url-1", "url-2"]})
+        expected = {"a": (), "b": ("url",), "c": ("url-1", "url-2")}
+        self.assertDictEqual(expected, dict(actual))
+
+    def test_freeze_catalog_of_malformed_data_is_empty(self):
+        self.assertDictEqual({}, dict(freeze_catalog(["java"])))
 
 
 class GetRecipesFileTestCase(TestCase):
@@ -193,3 +330,32 @@ class GetTemplatesFileTestCase(TestCase):
             expected = temp_dir_path / TEMPLATES_FILENAME
             actual = get_templates_file()
         self.assertEqual(expected, actual)
+
+
+class LoadManifestTest(CacheDirTestBase):
+    """Unit-tests for the ``datamodel.load_manifest`` method."""
+
+    def write_manifest(self, text: str) -> Path:
+        file = self.temp_dir / "manifest.yaml"
+        file.write_text(text, encoding="utf-8")
+        return file
+
+    def test_resolves_outputs_relative_to_manifest(self):
+        file = self.write_manifest("api/.gitignore: python\nweb/.gitignore: java\n")
+        targets = load_manifest(file)
+
+        expected = {
+            self.temp_dir / "api" / ".gitignore": "python",
+            self.temp_dir / "web" / ".gitignore": "java",
+        }
+        self.assertDictEqual(expected, targets)
+
+    def test_rejects_unknown_recipe(self):
+        file = self.write_manifest("api/.gitignore: no-such-recipe\n")
+        with self.assertRaises(ValueError):
+            load_manifest(file)
+
+    def test_rejects_non_mapping(self):
+        file = self.write_manifest("- python\n")
+        with self.assertRaises(ValueError):
+            load_manifest(file)
@@ -1,4 +1,11 @@
 """Unit-tests for the ``gitignore_builder.io_util`` module."""
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import ExitStack
 from textwrap import dedent
 from unittest import TestCase
 from unittest.mock import MagicMock
@@ -6,9 +13,15 @@ from unittest.mock import patch
 
 import requests
 
+from gitignore_builder import cache
 from gitignore_builder import io_util
+from gitignore_builder import stats
 
+from .abstract_tests import CacheDirTestBase
 from .abstract_tests import TempDirTestBase
+from .http_stubs import AsyncHttpStub
+from .http_stubs import HttpStubServer
+from .http_stubs import StubResponse
 
 
 class FormatDataToYamlTest(TestCase):
@@ -85,7 +98,7 @@ class ReadFileAsTextTest(TempDirTestBase):
         self.assertEqual(expected_text, actual_text)
 
 
-class ReadFileAsDataTest(TempDirTestBase):
+class ReadFileAsDataTest(CacheDirTestBase):
     """Unit-tests for the ``io_util.read_file_data`` method."""
 
     def setUp(self) -> None:
@@ -136,8 +149,26 @@ class ReadFileAsDataTest(TempDirTestBase):
         actual_data = io_util.read_file_as_data(file)
         self.assertEqual(expected_data, actual_data)
 
+    @patch("gitignore_builder.io_util.parse_data_from_yaml", autospec=True)
+    def test_loads_unchanged_file_from_snapshot(self, mock_parse_data: MagicMock):
+        mock_parse_data.return_value = {"a": [1, 2]}
+        file = self.temp_dir / "file.yaml"
+        file.write_text("a: [1, 2]", encoding="utf-8")
+
+        self.assertEqual({"a": [1, 2]}, io_util.read_file_as_data(file))
+        self.assertEqual({"a": [1, 2]}, io_util.read_file_as_data(file))
+        self.assertEqual(1, mock_parse_data.call_count)
+
+    def test_reparses_changed_file(self):
+        file = self.temp_dir / "file.yaml"
+        file.write_text("a: [1, 2]", encoding="utf-8")
+        self.assertEqual({"a": [1, 2]}, io_util.read_file_as_data(file))
+
+        file.write_text("a: [1, 2, 3]", encoding="utf-8")
+        self.assertEqual({"a": [1, 2, 3]}, io_util.read_file_as_data(file))
 
-class ReadUrlAsTextTest(TestCase):
+
+class ReadUrlAsTextTest(CacheDirTestBase):
     """Unit-tests for the ``io_util.read_url_as_text`` method."""
 
     def test_is_able_to_retrieve_contents(self):
@@ -152,6 +183,440 @@ class ReadUrlAsTextTest(TestCase):
         self.assertIsNone(io_util.read_url_as_text(url))
 
 
+class SessionTest(CacheDirTestBase):
+    """Unit-tests for the pooled HTTP session of ``io_util``."""
+
+    ROUTES = {f"/{i}": StubResponse(f"*.tmp{i}\n".encode()) for i in range(9)}
+
+    def setUp(self) -> None:
+        super().setUp()
+        io_util.close_session()
+        self.exit_stack = ExitStack()
+        self.server = self.exit_stack.enter_context(HttpStubServer(dict(self.ROUTES)))
+        self.urls = [self.server.url(path) for path in self.ROUTES]
+
+    def tearDown(self) -> None:
+        io_util.close_session()
+        self.exit_stack.close()
+        super().tearDown()
+
+    def test_get_session_returns_shared_session(self):
+        self.assertIs(io_util.get_session(), io_util.get_session())
+
+    def test_close_session_discards_shared_session(self):
+        session = io_util.get_session()
+        io_util.close_session()
+        self.assertIsNot(session, io_util.get_session())
+
+    def test_injected_session_is_used(self):
+        session = MagicMock(wraps=io_util.create_session())
+        io_util.set_session(session)
+        io_util.read_url_as_text(self.urls[0])
+        self.assertEqual(1, session.get.call_count)
+        session.close()
+
+    def test_serial_build_reuses_single_connection(self):
+        texts = list(io_util.read_urls_as_text(self.urls, jobs=1))
+        self.assertEqual(len(self.urls), len(self.server.requests))
+        self.assertListEqual([f"*.tmp{i}\n" for i in range(9)], texts)
+        self.assertEqual(1, self.server.connections)
+
+    def test_connections_are_reused_across_builds(self):
+        list(io_util.read_urls_as_text(self.urls, jobs=1))
+        io_util.clear_memo()
+        list(io_util.read_urls_as_text(self.urls, jobs=1))
+        self.assertEqual(2 * len(self.urls), len(self.server.requests))
+        self.assertEqual(1, self.server.connections)
+
+    def test_concurrent_build_opens_at_most_one_connection_per_job(self):
+        list(io_util.read_urls_as_text(self.urls, jobs=3))
+        self.assertLessEqual(self.server.connections, 3)
+
+
+class MemoTest(CacheDirTestBase):
+    """Unit-tests for the in-process memo of ``io_util.read_url_as_text``."""
+
+    @patch("gitignore_builder.io_util._download_url_as_text", autospec=True)
+    def test_downloads_each_url_at_most_once(self, mock_download: MagicMock):
+        mock_download.side_effect = lambda url, options: f"text-{url}"
+        urls = ["a", "b", "a", "b", "a"]
+        texts = list(io_util.read_urls_as_text(urls, jobs=5))
+        self.assertListEqual([f"text-{url}" for url in urls], texts)
+        self.assertEqual(2, mock_download.call_count)
+
+    @patch("gitignore_builder.io_util._download_url_as_text", autospec=True)
+    def test_failed_downloads_are_not_memorized(self, mock_download: MagicMock):
+        mock_download.return_value = None
+        io_util.read_url_as_text("a")
+        io_util.read_url_as_text("a")
+        self.assertEqual(2, mock_download.call_count)
+
+    @patch("gitignore_builder.io_util._download_url_as_text", autospec=True)
+    def test_clear_memo_forgets_contents(self, mock_download: MagicMock):
+        mock_download.return_value = "text"
+        io_util.read_url_as_text("a")
+        io_util.clear_memo()
+        io_util.read_url_as_text("a")
+        self.assertEqual(2, mock_download.call_count)
+
+    @patch("gitignore_builder.io_util._download_url_as_text", autospec=True)
+    def test_async_shares_the_memo(self, mock_download: MagicMock):
+        mock_download.return_value = "text"
+        io_util.read_url_as_text("a")
+        self.assertEqual("text", asyncio.run(io_util.read_url_as_text_async("a")))
+        self.assertEqual(1, mock_download.call_count)
+
+
+class ReadUrlsAsTextTest(TestCase):
+    """Unit-tests for the ``io_util.read_urls_as_text`` method."""
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_yields_results_in_url_order(self, mock_read_url: MagicMock):
+        def slow_read(url, **_):
+            time.sleep(0.01 * (5 - int(url)))
+            return f"text-{url}"
+
+        mock_read_url.side_effect = slow_read
+        urls = ["0", "1", "2", "3", "4"]
+        expected = ["text-0", "text-1", "text-2", "text-3", "text-4"]
+        actual = list(io_util.read_urls_as_text(urls, jobs=5))
+        self.assertListEqual(expected, actual)
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_downloads_concurrently(self, mock_read_url: MagicMock):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def blocking_read(url, **_):
+            barrier.wait()  # would time out if the reads were serial
+            return url
+
+        mock_read_url.side_effect = blocking_read
+        urls = ["a", "b", "c"]
+        self.assertListEqual(urls, list(io_util.read_urls_as_text(urls, jobs=3)))
+
+    @patch("gitignore_builder.io_util.ThreadPoolExecutor", autospec=True)
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_single_job_reads_serially(
+        self, mock_read_url: MagicMock, mock_executor: MagicMock
+    ):
+        mock_read_url.side_effect = lambda url, options: url
+        urls = ["a", "b"]
+        self.assertListEqual(urls, list(io_util.read_urls_as_text(urls, jobs=1)))
+        self.assertListEqual([], mock_executor.mock_calls)
+
+
+class ReadUrlAsTextCachingTest(CacheDirTestBase):
+    """Unit-tests for the HTTP caching done by ``io_util.read_url_as_text``."""
+
+    ROUTES = {
+        "/etag": StubResponse(b"*.log\n", headers=(("ETag", '"v1"'),)),
+        "/plain": StubResponse(b"*.tmp\n"),
+        "/missing": StubResponse(b"Not Found", status=404),
+        "/bad-gateway": StubResponse(b"<html>502 Bad Gateway</html>", status=502),
+    }
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.exit_stack = ExitStack()
+        self.server = self.exit_stack.enter_context(HttpStubServer(dict(self.ROUTES)))
+
+    def tearDown(self) -> None:
+        self.exit_stack.close()
+        super().tearDown()
+
+    def test_revalidates_with_etag_and_reuses_body_on_304(self):
+        url = self.server.url("/etag")
+        self.assertEqual("*.log\n", io_util.read_url_as_text(url))
+        io_util.clear_memo()
+        self.assertEqual("*.log\n", io_util.read_url_as_text(url))
+
+        _, _, first_headers = self.server.requests[0]
+        _, _, second_headers = self.server.requests[1]
+        self.assertNotIn("if-none-match", first_headers)
+        self.assertEqual('"v1"', second_headers["if-none-match"])
+
+    def test_skips_revalidation_within_ttl(self):
+        options = io_util.FetchOptions(ttl=60)
+        url = self.server.url("/plain")
+        self.assertEqual("*.tmp\n", io_util.read_url_as_text(url, options))
+        io_util.clear_memo()
+        self.assertEqual("*.tmp\n", io_util.read_url_as_text(url, options))
+        self.assertEqual(1, self.server.count_requests("/plain"))
+
+    def test_does_not_cache_error_responses(self):
+        options = io_util.FetchOptions(ttl=60)
+        url = self.server.url("/missing")
+        io_util.read_url_as_text(url, options)
+        io_util.clear_memo()
+        io_util.read_url_as_text(url, options)
+        self.assertEqual(2, self.server.count_requests("/missing"))
+
+    def test_returns_none_on_error_response(self):
+        self.assertIsNone(io_util.read_url_as_text(self.server.url("/missing")))
+
+    def test_returns_cached_contents_on_error_response(self):
+        url = self.server.url("/bad-gateway")
+        cache.save_entry(cache.CacheEntry(url, "*.log\n"))
+        self.assertEqual("*.log\n", io_util.read_url_as_text(url))
+        self.assertEqual("*.log\n", cache.load_entry(url).body)
+
+    def test_does_not_use_cache_when_disabled(self):
+        options = io_util.FetchOptions(ttl=60, use_cache=False)
+        url = self.server.url("/plain")
+        io_util.read_url_as_text(url, options)
+        io_util.clear_memo()
+        io_util.read_url_as_text(url, options)
+        self.assertEqual(2, self.server.count_requests("/plain"))
+        self.assertFalse(self.cache_dir.exists())
+
+
+class ReadUrlAsTextOfflineTest(CacheDirTestBase):
+    """Unit-tests for ``io_util.read_url_as_text`` in offline mode."""
+
+    OFFLINE = io_util.FetchOptions(offline=True)
+
+    @patch("gitignore_builder.io_util.requests", autospec=True)
+    def test_reads_cached_contents_without_network(self, mock_requests: MagicMock):
+        cache.save_entry(cache.CacheEntry("url", "*.log\n"))
+        self.assertEqual("*.log\n", io_util.read_url_as_text("url", self.OFFLINE))
+        self.assertListEqual([], mock_requests.mock_calls)
+
+    @patch("gitignore_builder.io_util.requests", autospec=True)
+    def test_raises_when_not_cached(self, mock_requests: MagicMock):
+        with self.assertRaises(cache.NotCachedError):
+            io_util.read_url_as_text("url", self.OFFLINE)
+        self.assertListEqual([], mock_requests.mock_calls)
+
+    def test_async_raises_when_not_cached(self):
+        with self.assertRaises(cache.NotCachedError):
+            asyncio.run(io_util.read_url_as_text_async("url", self.OFFLINE))
+
+    def test_concurrent_read_raises_when_not_cached(self):
+        cache.save_entry(cache.CacheEntry("url", "*.log\n"))
+        urls = ["url", "missing-url"]
+        with self.assertRaises(cache.NotCachedError):
+            list(io_util.read_urls_as_text(urls, jobs=2, options=self.OFFLINE))
+
+
+class ReadUrlAsTextFallbackTest(CacheDirTestBase):
+    """Unit-tests for ``io_util.read_url_as_text`` falling back to the cache."""
+
+    def test_returns_cached_contents_on_download_error(self):
+        url = "http://localhost:12345"
+        cache.save_entry(cache.CacheEntry(url, "*.log\n"))
+        self.assertEqual("*.log\n", io_util.read_url_as_text(url))
+        self.assertEqual("*.log\n", asyncio.run(io_util.read_url_as_text_async(url)))
+
+
+class IterUrlLinesTest(CacheDirTestBase):
+    """Unit-tests for the ``io_util.iter_url_lines`` method."""
+
+    BODY = "# big\r\n*.log\n\n*.tmp\n" * 1000
+
+    ROUTES = {
+        "/big": StubResponse(BODY.encode("utf-8"), headers=(("ETag", '"v1"'),)),
+        "/latin": StubResponse(
+            "caf\xe9\n".encode("latin-1"),
+            headers=(("Content-Type", "text/plain; charset=latin-1"),),
+        ),
+        "/bad-gateway": StubResponse(b"<html>502 Bad Gateway</html>", status=502),
+        "/dropped": StubResponse(BODY.encode("utf-8") * 10, drop_after=150_000),
+    }
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.exit_stack = ExitStack()
+        self.server = self.exit_stack.enter_context(HttpStubServer(dict(self.ROUTES)))
+
+    def tearDown(self) -> None:
+        self.exit_stack.close()
+        super().tearDown()
+
+    def test_lines_match_split_text(self):
+        url = self.server.url("/big")
+        self.assertListEqual(self.BODY.split("\n"), list(io_util.iter_url_lines(url)))
+
+    def test_decodes_using_response_charset(self):
+        url = self.server.url("/latin")
+        self.assertListEqual(["caf\xe9", ""], list(io_util.iter_url_lines(url)))
+
+    def test_stores_streamed_contents_in_cache(self):
+        url = self.server.url("/big")
+        list(io_util.iter_url_lines(url))
+        self.assertEqual(self.BODY, cache.load_entry(url).body)
+
+        offline = io_util.FetchOptions(offline=True)
+        self.assertEqual(self.BODY, io_util.read_url_as_text(url, offline))
+
+    def test_does_not_store_streamed_contents_when_cache_disabled(self):
+        url = self.server.url("/big")
+        options = io_util.FetchOptions(use_cache=False)
+        self.assertEqual(self.BODY, "\n".join(io_util.iter_url_lines(url, options)))
+        self.assertFalse(self.cache_dir.exists())
+
+    def test_revalidates_and_reuses_cached_lines_on_304(self):
+        url = self.server.url("/big")
+        list(io_util.iter_url_lines(url))
+        self.assertListEqual(self.BODY.split("\n"), list(io_util.iter_url_lines(url)))
+
+        _, _, second_headers = self.server.requests[1]
+        self.assertEqual('"v1"', second_headers["if-none-match"])
+
+    def test_uses_memorized_contents(self):
+        url = self.server.url("/big")
+        io_util.read_url_as_text(url)
+        self.assertListEqual(self.BODY.split("\n"), list(io_util.iter_url_lines(url)))
+        self.assertEqual(1, self.server.count_requests("/big"))
+
+    def test_falls_back_to_cached_contents_on_error(self):
+        url = "http://localhost:12345"
+        cache.save_entry(cache.CacheEntry(url, "*.log\n"))
+        self.assertListEqual(["*.log", ""], list(io_util.iter_url_lines(url)))
+
+    def test_yields_nothing_in_case_of_error(self):
+        self.assertListEqual([], list(io_util.iter_url_lines("http://localhost:12345")))
+
+    def test_falls_back_to_cached_contents_on_error_response(self):
+        url = self.server.url("/bad-gateway")
+        self.assertListEqual([], list(io_util.iter_url_lines(url)))
+        cache.save_entry(cache.CacheEntry(url, "*.log\n"))
+        self.assertListEqual(["*.log", ""], list(io_util.iter_url_lines(url)))
+
+    def test_raises_when_connection_drops_after_partial_contents(self):
+        url = self.server.url("/dropped")
+        cache.save_entry(cache.CacheEntry(url, "*.log\n"))
+        lines = io_util.iter_url_lines(url)
+        self.assertEqual("# big\r", next(lines))
+        with self.assertRaisesRegex(IOError, "failed part-way through"):
+            list(lines)
+        self.assertEqual("*.log\n", cache.load_entry(url).body)
+
+
+class ReadUrlAsTextAsyncTest(CacheDirTestBase):
+    """Unit-tests for the ``io_util.read_url_as_text_async`` method."""
+
+    ROUTES = {
+        "/plain": StubResponse(b"*.log\n"),
+        "/chunked": StubResponse(b"*.log\n*.tmp\n", chunked=True),
+        "/latin": StubResponse(
+            "# caf\u00e9\n".encode("latin-1"),
+            headers=(("Content-Type", "text/plain; charset=ISO-8859-1"),),
+        ),
+        "/redirect": StubResponse(status=302, headers=(("Location", "/plain"),)),
+        "/loop": StubResponse(status=301, headers=(("Location", "/loop"),)),
+        "/missing": StubResponse(b"Not Found", status=404),
+    }
+
+    def read(self, path: str):
+        async def scenario():
+            async with AsyncHttpStub(self.ROUTES) as stub:
+                return await io_util.read_url_as_text_async(stub.url(path))
+
+        return asyncio.run(scenario())
+
+    def test_reads_content_length_body(self):
+        self.assertEqual("*.log\n", self.read("/plain"))
+
+    def test_reads_chunked_body(self):
+        self.assertEqual("*.log\n*.tmp\n", self.read("/chunked"))
+
+    def test_decodes_using_response_charset(self):
+        self.assertEqual("# caf\u00e9\n", self.read("/latin"))
+
+    def test_follows_redirects(self):
+        self.assertEqual("*.log\n", self.read("/redirect"))
+
+    def test_returns_none_on_redirect_loop(self):
+        self.assertIsNone(self.read("/loop"))
+
+    def test_returns_none_in_case_of_error(self):
+        url = "http://localhost:12345"
+        self.assertIsNone(asyncio.run(io_util.read_url_as_text_async(url)))
+
+    def test_returns_none_on_error_response(self):
+        self.assertIsNone(self.read("/missing"))
+
+    def test_revalidates_cached_entry(self):
+        routes = {"/etag": StubResponse(b"*.log\n", headers=(("ETag", '"v1"'),))}
+
+        async def scenario():
+            async with AsyncHttpStub(routes) as stub:
+                url = stub.url("/etag")
+                await io_util.read_url_as_text_async(url)
+                cache.save_entry(cache.load_entry(url)._replace(body="*.cached\n"))
+                io_util.clear_memo()
+                text = await io_util.read_url_as_text_async(url)
+                return text, stub.requests
+
+        text, requests_ = asyncio.run(scenario())
+        self.assertEqual('"v1"', requests_[1][2]["if-none-match"])
+        self.assertEqual("*.cached\n", text)
+
+    def test_accesses_cache_files_off_the_event_loop_thread(self):
+        threads = []
+
+        def record_thread(func):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return func(*args)
+
+            return wrapper
+
+        with patch.object(
+            cache, "load_entry", record_thread(cache.load_entry)
+        ), patch.object(cache, "store_response", record_thread(cache.store_response)):
+            self.assertEqual("*.log\n", self.read("/plain"))
+
+        self.assertEqual(2, len(threads))
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_downloads_concurrently_requested_url_once(self):
+        routes = {"/slow": StubResponse(b"*.log\n", delay=0.1)}
+
+        async def scenario():
+            async with AsyncHttpStub(routes) as stub:
+                url = stub.url("/slow")
+                texts = await asyncio.gather(
+                    io_util.read_url_as_text_async(url),
+                    io_util.read_url_as_text_async(url),
+                )
+                return texts, stub.requests
+
+        texts, requests_ = asyncio.run(scenario())
+        self.assertListEqual(["*.log\n", "*.log\n"], texts)
+        self.assertEqual(1, len(requests_))
+
+    def test_records_fetch_stats(self):
+        with stats.collect(trace_memory=False) as build_stats:
+            self.read("/plain")
+
+        url_stats = list(build_stats.urls.values())
+        self.assertEqual(1, len(url_stats))
+        self.assertEqual(200, url_stats[0].status)
+        self.assertEqual("miss", url_stats[0].cache)
+
+
+class ReadUrlsAsTextAsyncTest(CacheDirTestBase):
+    """Unit-tests for the ``io_util.read_urls_as_text_async`` method."""
+
+    def test_overlaps_downloads_and_keeps_url_order(self):
+        delay = 0.3
+        routes = {
+            f"/{i}": StubResponse(f"text-{i}".encode(), delay=delay) for i in range(5)
+        }
+
+        async def scenario():
+            async with AsyncHttpStub(routes) as stub:
+                urls = [stub.url(path) for path in routes]
+                started = time.perf_counter()
+                texts = await io_util.read_urls_as_text_async(urls)
+                return texts, time.perf_counter() - started
+
+        texts, elapsed = asyncio.run(scenario())
+        self.assertListEqual([f"text-{i}" for i in range(5)], texts)
+        self.assertLess(elapsed, delay * 3)
+
+
 class WriteTextToFileTest(TempDirTestBase):
     """Unit-tests for the ``io_util.write_text_to_file`` method."""
 
@@ -213,3 +678,117 @@ class WriteDataToFileTest(TempDirTestBase):
 
         actual_text = file.read_text(encoding="utf-8")
         self.assertEqual(expected_text, actual_text)
+
+
+class WriteTextIfChangedTest(TempDirTestBase):
+    """Unit-tests for the ``io_util.write_text_if_changed`` method."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    def test_creates_missing_file_and_parent_dir(self):
+        file = self.temp_dir / "missing_dir" / "file.txt"
+        self.assertTrue(io_util.write_text_if_changed("1234", file))
+        self.assertEqual("1234", file.read_text(encoding="utf-8"))
+        umask = os.umask(0o022)
+        os.umask(umask)
+        self.assertEqual(0o666 & ~umask, file.stat().st_mode & 0o777)
+
+    def test_creates_new_file_with_mode_of_process_umask(self):
+        file = self.temp_dir / "file.txt"
+        script = (
+            "import os, sys; os.umask(0o077); from pathlib import Path; "
+            "from gitignore_builder import io_util; "
+            "io_util.write_text_if_changed('1234', Path(sys.argv[1]))"
+        )
+        subprocess.run([sys.executable, "-c", script, str(file)], check=True)
+        self.assertEqual(0o600, file.stat().st_mode & 0o777)
+
+    def test_skips_unchanged_file(self):
+        file = self.temp_dir / "file.txt"
+        file.write_text("1234", encoding="utf-8")
+        mtime_ns = file.stat().st_mtime_ns
+
+        self.assertFalse(io_util.write_text_if_changed("1234", file))
+        self.assertEqual(mtime_ns, file.stat().st_mtime_ns)
+
+    def test_replaces_changed_file_keeping_its_mode(self):
+        file = self.temp_dir / "file.txt"
+        file.write_text("1235", encoding="utf-8")
+        file.chmod(0o600)
+
+        self.assertTrue(io_util.write_text_if_changed("1234", file))
+        self.assertEqual("1234", file.read_text(encoding="utf-8"))
+        self.assertEqual(0o600, file.stat().st_mode & 0o777)
+        self.assertListEqual([file], list(self.temp_dir.iterdir()))
+
+    def test_leaves_no_temp_file_on_error(self):
+        folder = self.temp_dir / "folder"
+        folder.mkdir()
+        with self.assertRaises(OSError):
+            io_util.write_text_if_changed("1234", folder)
+        self.assertListEqual([folder], list(self.temp_dir.iterdir()))
+
+
+class WriteChunksToFileTest(TempDirTestBase):
+    """Unit-tests for the ``io_util.write_chunks_to_file`` method."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    def test_writes_all_chunks_keeping_the_mode(self):
+        file = self.temp_dir / "file.txt"
+        file.write_text("old", encoding="utf-8")
+        file.chmod(0o600)
+
+        io_util.write_chunks_to_file(iter(["12", "34\n"]), file)
+        self.assertEqual("1234\n", file.read_text(encoding="utf-8"))
+        self.assertEqual(0o600, file.stat().st_mode & 0o777)
+        self.assertListEqual([file], list(self.temp_dir.iterdir()))
+
+    def test_leaves_existing_file_untouched_on_error(self):
+        file = self.temp_dir / "file.txt"
+        file.write_text("old", encoding="utf-8")
+
+        def chunks():
+            yield "partial"
+            raise IOError("Failed!")
+
+        with self.assertRaises(IOError):
+            io_util.write_chunks_to_file(chunks(), file)
+        self.assertEqual("old", file.read_text(encoding="utf-8"))
+        self.assertListEqual([file], list(self.temp_dir.iterdir()))
+
+
+class WriteTextsToFilesTest(TempDirTestBase):
+    """Unit-tests for the ``io_util.write_texts_to_files`` method."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+    def tearDown(self) -> None:
+        super().tearDown()
+
+    def test_reports_written_skipped_and_failed_files(self):
+        unchanged = self.temp_dir / "a" / ".gitignore"
+        unchanged.parent.mkdir()
+        unchanged.write_text("*.log\n", encoding="utf-8")
+        blocker = self.temp_dir / "c"
+        blocker.write_text("", encoding="utf-8")
+
+        targets = {
+            unchanged: "*.log\n",
+            self.temp_dir / "b" / ".gitignore": "*.log\n",
+            blocker / ".gitignore": "*.log\n",
+        }
+        report = io_util.write_texts_to_files(targets, jobs=3)
+
+        self.assertListEqual([self.temp_dir / "b" / ".gitignore"], report.written)
+        self.assertListEqual([unchanged], report.skipped)
+        self.assertListEqual([blocker / ".gitignore"], [f for f, _ in report.failed])
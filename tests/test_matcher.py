@@ -0,0 +1,140 @@
+"""Unit-tests for the ``gitignore_builder.matcher`` module."""
+import re
+from textwrap import dedent
+from unittest import TestCase
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from ddt import data
+from ddt import ddt
+from ddt import unpack
+
+from gitignore_builder.builder import build_gitignore_contents
+from gitignore_builder.matcher import IgnoreMatcher
+from gitignore_builder.matcher import compile_rules
+from gitignore_builder.matcher import translate_glob_segment
+
+RULES = dedent(
+    """\
+    # comment
+    *.log
+    !keep.log
+
+    build/
+    /dist
+    foo/**/bar
+    *.py[co]
+    !*.pyc
+    .idea/
+    **/cache/*.tmp
+    docs/*.html
+    [Dd]ebug/
+    src/**
+    !src/keep
+    \\#hash
+    name?
+    """
+)
+
+
+@ddt
+class IgnoreMatcherTestCase(TestCase):
+    """Unit-tests for the ``matcher.IgnoreMatcher`` class."""
+
+    def setUp(self) -> None:
+        self.matcher = compile_rules(RULES)
+
+    def test_compiles_only_rules(self):
+        self.assertEqual(15, len(self.matcher))
+        self.assertListEqual(
+            ["*.log", "!keep.log", "build/"],
+            [rule.pattern for rule in self.matcher.rules[:3]],
+        )
+
+    @data(
+        ("a.log", False, True),
+        ("logs/a.log", False, True),
+        ("keep.log", False, False),
+        ("logs/keep.log", False, False),
+        ("build", True, True),
+        ("build", False, False),
+        ("lib/build/x.c", False, True),
+        ("dist", False, True),
+        ("lib/dist", False, False),
+        ("foo/bar", False, True),
+        ("foo/a/b/bar", False, True),
+        ("x.pyo", False, True),
+        ("x.pyc", False, False),
+        (".idea/workspace.xml", False, True),
+        ("a/cache/x.tmp", False, True),
+        ("cache/x.tmp", False, True),
+        ("docs/a.html", False, True),
+        ("docs/api/a.html", False, False),
+        ("Debug/x", False, True),
+        ("debug", True, True),
+        ("src/keep", False, False),
+        ("src/other", False, True),
+        ("src", True, False),
+        ("#hash", False, True),
+        ("names", False, True),
+        ("name", False, False),
+        ("main.c", False, False),
+        ("./a.log", False, True),
+    )
+    @unpack
+    def test_matches_like_git(self, path, is_dir, expected):
+        self.assertEqual(expected, self.matcher.match(path, is_dir))
+
+    def test_match_many_marks_directories_by_trailing_slash(self):
+        paths = ["a.log", "build/", "build", "build/x.c", "main.c", "Debug/x/y"]
+        expected = [True, True, False, True, False, True]
+        self.assertListEqual(expected, list(self.matcher.match_many(paths)))
+
+    def test_match_many_agrees_with_match(self):
+        paths = ["a/b/c.log", "a/b/keep.log", "src/a/b", "x/cache/y.tmp", "q.pyc"]
+        expected = [self.matcher.match(path) for path in paths]
+        self.assertListEqual(expected, list(self.matcher.match_many(paths)))
+
+    def test_find_rule_returns_last_matching_rule(self):
+        self.assertEqual("!keep.log", self.matcher.find_rule("keep.log").pattern)
+        self.assertIsNone(self.matcher.find_rule("main.c"))
+
+    def test_last_matching_wildcard_rule_wins(self):
+        matcher = IgnoreMatcher(["*-a*", "!x-*", "x-a*"])
+        self.assertTrue(matcher.match("x-ab"))
+        self.assertFalse(matcher.match("x-b"))
+        self.assertTrue(matcher.match("y-ab"))
+
+    def test_skips_unsupported_rules(self):
+        matcher = IgnoreMatcher(["[[:nope:]]", "foo//bar", "*.log"])
+        self.assertEqual(1, len(matcher))
+
+    @patch("gitignore_builder.io_util.read_url_as_text", autospec=True)
+    def test_compiles_built_contents(self, mock_read_url: MagicMock):
+        texts = {"url-a": "*.log\n.venv/", "url-b": "!keep.log"}
+        mock_read_url.side_effect = lambda url, options: texts.get(url)
+        matcher = compile_rules(build_gitignore_contents(["url-a", "url-b"], jobs=2))
+        self.assertTrue(matcher.match(".venv/bin/python"))
+        self.assertFalse(matcher.match("keep.log"))
+
+
+@ddt
+class TranslateGlobSegmentTestCase(TestCase):
+    """Unit-tests for the ``matcher.translate_glob_segment`` method."""
+
+    @data(
+        ("*.py[co]", "a.pyc", True),
+        ("*.py[co]", "a/b.pyc", False),
+        ("[!a]bc", "bbc", True),
+        ("[!a]bc", "abc", False),
+        ("[!a]bc", "/bc", False),
+        ("[a-c]x", "bx", True),
+        ("[[:digit:]]x", "1x", True),
+        ("a\\*", "a*", True),
+        ("a\\*", "ab", False),
+        ("?.md", "a.md", True),
+    )
+    @unpack
+    def test_translated_regex_matches(self, segment, name, expected):
+        regex = re.compile(translate_glob_segment(segment))
+        self.assertEqual(expected, regex.fullmatch(name) is not None)
@@ -0,0 +1,102 @@
+"""Unit-tests for the ``gitignore_builder.pattern_index`` module."""
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from gitignore_builder import cache
+from gitignore_builder import pattern_index
+from gitignore_builder.cache import CacheEntry
+from gitignore_builder.pattern_index import PatternSource
+from gitignore_builder.pattern_index import extract_patterns
+from gitignore_builder.pattern_index import find_pattern_sources
+
+from .abstract_tests import CacheDirTestBase
+
+URL_A = "https://example.com/a.gitignore"
+
+URL_B = "https://example.com/b.gitignore"
+
+TEMPLATES = {
+    "alpha": (URL_A,),
+    "beta": (URL_B, URL_A),
+}
+
+
+class PatternIndexTestCase(CacheDirTestBase):
+    """Unit-tests for the ``pattern_index`` module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        pattern_index.reset_index()
+        cache.save_entry(CacheEntry(URL_A, "# a\n*.log\n**/.idea/\n"))
+        cache.save_entry(CacheEntry(URL_B, "*.log\n!keep.log\n"))
+
+    def tearDown(self) -> None:
+        pattern_index.reset_index()
+        super().tearDown()
+
+    def test_extract_patterns(self):
+        self.assertSetEqual(
+            {"*.log", ".idea/", "/build"},
+            extract_patterns("# comment\n\n  *.log \n**/.idea/\n/build\n*.log"),
+        )
+
+    def test_finds_urls_and_templates(self):
+        self.assertListEqual(
+            [
+                PatternSource(URL_A, ("alpha", "beta")),
+                PatternSource(URL_B, ("beta",)),
+            ],
+            find_pattern_sources("*.log", TEMPLATES),
+        )
+
+    def test_finds_equivalent_rules(self):
+        self.assertListEqual(
+            [PatternSource(URL_A, ("alpha", "beta"))],
+            find_pattern_sources(".idea/", TEMPLATES),
+        )
+        self.assertListEqual([URL_B], pattern_index.get_index().find("!keep.log"))
+
+    def test_returns_empty_list_if_not_found(self):
+        self.assertListEqual([], find_pattern_sources("*.tmp", TEMPLATES))
+
+    def test_index_is_stored_in_cache_dir(self):
+        pattern_index.get_index()
+        self.assertTrue((self.cache_dir / pattern_index.INDEX_FILENAME).is_file())
+
+        pattern_index.reset_index()
+        stored = pattern_index.load_index()
+        self.assertListEqual([URL_A, URL_B], stored.get_urls())
+        self.assertListEqual([URL_A], stored.find("**/.idea/"))
+
+    def test_updates_only_changed_urls(self):
+        index = pattern_index.get_index()
+        cache.save_entry(CacheEntry(URL_A, "*.tmp\n"))
+
+        with patch(
+            "gitignore_builder.cache.read_object", wraps=cache.read_object
+        ) as mock_read_object:
+            self.assertListEqual([URL_A], index.update())
+        # the new contents and the previous ones (for removing its rules)
+        self.assertEqual(2, mock_read_object.call_count)
+
+        self.assertListEqual([URL_B], index.find("*.log"))
+        self.assertListEqual([], index.find(".idea/"))
+        self.assertListEqual([URL_A], index.find("*.tmp"))
+
+    @patch("gitignore_builder.cache.iter_records", autospec=True)
+    def test_skips_listing_when_nothing_was_saved(self, mock_iter_records: MagicMock):
+        index = pattern_index.PatternIndex()
+        index.records_mtime_ns = cache.get_records_mtime_ns()
+        self.assertListEqual([], index.update())
+        mock_iter_records.assert_not_called()
+
+    def test_does_not_trust_recent_modification_time(self):
+        index = pattern_index.get_index()
+        self.assertEqual(0, index.records_mtime_ns)
+
+    def test_ignores_bad_index_file(self):
+        file = self.cache_dir / pattern_index.INDEX_FILENAME
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text("{bad", encoding="utf-8")
+        self.assertEqual(0, len(pattern_index.load_index()))
+        self.assertListEqual([URL_A], pattern_index.get_index().find(".idea/"))
@@ -0,0 +1,160 @@
+"""Unit-tests for the ``gitignore_builder.patterns`` module."""
+from unittest import TestCase
+
+from ddt import data
+from ddt import ddt
+from ddt import unpack
+
+from gitignore_builder.patterns import RuleIndex
+from gitignore_builder.patterns import canonicalize
+from gitignore_builder.patterns import find_subsumed_rules
+from gitignore_builder.patterns import is_negation
+
+
+@ddt
+class CanonicalizeTestCase(TestCase):
+    """Unit-tests for the ``patterns.canonicalize`` method."""
+
+    @data(
+        ("foo", "foo"),
+        ("**/foo", "foo"),
+        ("**/**/foo/", "foo/"),
+        ("/**/foo", "foo"),
+        ("/foo", "/foo"),
+        ("/.idea/", "/.idea/"),
+        ("foo/bar", "foo/bar"),
+        ("/foo/bar", "foo/bar"),
+        ("**/foo/bar", "**/foo/bar"),
+        ("foo/**/**/bar", "foo/**/bar"),
+        ("foo/**/**", "foo/**"),
+        ("foo/***", "foo/**"),
+        ("*.py**", "*.py*"),
+        ("*.py[cod]", "*.py[cdo]"),
+        ("*.py[ccod]", "*.py[cdo]"),
+        ("*.[oO]", "*.[Oo]"),
+        ("file[0-9a-f0-9]", "file[0-9a-f]"),
+        ("file[xa-z1]", "file[a-z1]"),
+        ("*.sw[p]", "*.swp"),
+        ("*[!aa]", "*[!a]"),
+        ("[]a]", "[]a]"),
+        ("[a-]", "[a-]"),
+        ("[-!]x", "[-!]x"),
+        ("[-^]x", "[-^]x"),
+        ("[-^!]x", "[-^!]x"),
+        ("[-!a]x", "[a!-]x"),
+        ("[!]", "[!]"),
+        ("[[:alpha:]]", "[[:alpha:]]"),
+        ("\\a\\*", "a\\*"),
+        ("!**/foo", "!foo"),
+        ("!/foo/bar/", "!foo/bar/"),
+        ("\\!foo", "\\!foo"),
+        ("\\#foo", "\\#foo"),
+        ("[#]foo", "[#]foo"),
+        ("foo//bar", "foo//bar"),
+    )
+    @unpack
+    def test_returns_normal_form(self, pattern, expected):
+        self.assertEqual(expected, canonicalize(pattern))
+
+    @data("foo", "/foo", "foo/", "foo/**", "foo/**/bar", "*.py[cdo]", "!foo/")
+    def test_normal_form_is_fixed_point(self, pattern):
+        self.assertEqual(pattern, canonicalize(pattern))
+
+    @data(("[-!]x", "[!-]x"), ("[-^]x", "[^-]x"))
+    @unpack
+    def test_keeps_literal_class_apart_from_negated_one(self, literal, negated):
+        self.assertNotEqual(canonicalize(literal), canonicalize(negated))
+
+    def test_detects_negation(self):
+        self.assertTrue(is_negation("!foo"))
+        self.assertFalse(is_negation("\\!foo"))
+        self.assertFalse(is_negation("foo"))
+
+
+@ddt
+class RuleIndexTestCase(TestCase):
+    """Unit-tests for the ``patterns.RuleIndex`` class."""
+
+    @data(
+        ("*.pyc", "foo/*.pyc"),
+        ("*.pyc", "/build/x.pyc"),
+        ("*.pyc", "**/cache/*.pyc"),
+        ("*.gz", "*.tar.gz"),
+        ("*.tar.gz", "backup.tar.gz/"),
+        (".idea/", ".idea/workspace.xml"),
+        (".idea/", "**/.idea/**"),
+        (".idea/", "/.idea/"),
+        (".DS_Store", "docs/.DS_Store"),
+        ("node_modules", "node_modules/"),
+        ("/build/", "/build/lib/"),
+        ("build/", "/build/lib/*.so"),
+        ("/dist", "/dist/"),
+        ("foo/bar/", "foo/bar/baz"),
+        ("foo/bar", "/foo/bar/"),
+    )
+    @unpack
+    def test_covers_narrower_rule(self, broad, narrow):
+        index = RuleIndex()
+        index.add(broad)
+        self.assertTrue(index.covers(narrow))
+
+    @data(
+        ("*.pyc", "*.py[cod]"),
+        ("*.pyc", "foo.pyc.bak"),
+        ("*.pyc/", "foo.pyc"),
+        ("*.py?", "foo.pyc"),
+        (".idea/", ".idea"),
+        (".idea/", "foo/.idea"),
+        ("/build/", "/build"),
+        ("/build/", "lib/build/x"),
+        ("foo/bar/", "foo/baz"),
+        ("foo/*/", "foo/bar/baz"),
+        ("**/foo/bar", "foo/bar/baz"),
+        ("*.pyc", "!foo.pyc"),
+        ("!*.pyc", "foo.pyc"),
+        ("foo", "foo*"),
+    )
+    @unpack
+    def test_does_not_cover_other_rule(self, broad, other):
+        index = RuleIndex()
+        index.add(broad)
+        self.assertFalse(index.covers(other))
+
+    def test_clear_removes_all_rules(self):
+        index = RuleIndex()
+        for rule in ("*.pyc", ".idea/", "/build/"):
+            index.add(rule)
+        index.clear()
+        for rule in ("x.pyc", ".idea/x", "/build/x"):
+            self.assertFalse(index.covers(rule))
+
+    def test_covers_without_parents_checks_only_the_paths_of_rule(self):
+        index = RuleIndex()
+        for rule in ("*.pyc", ".idea/", "/build/", "node_modules"):
+            index.add(rule)
+        self.assertTrue(index.covers("foo/x.pyc", parents=False))
+        self.assertTrue(index.covers("docs/node_modules/", parents=False))
+        self.assertFalse(index.covers(".idea/workspace.xml", parents=False))
+        self.assertFalse(index.covers("/build/lib/", parents=False))
+
+
+@ddt
+class FindSubsumedRulesTestCase(TestCase):
+    """Unit-tests for the ``patterns.find_subsumed_rules`` method."""
+
+    @data(
+        (["*.pyc", "foo/*.pyc", "# comment", ".idea/", ".idea/x"], {1, 4}),
+        (["*.log", "!keep.log", "logs/*.log"], set()),
+        (["*.log", "logs/*.log", "!keep.log"], {1}),
+        ([".idea/", ".idea/workspace.xml", "!.idea/"], set()),
+        (["**/foo", "foo/*.py", "!foo"], set()),
+        (["foo/", "foo/bar/x", "!bar"], set()),
+        (["foo/", "foo/x", "!*"], set()),
+        ([".idea/", ".idea/workspace.xml", "!other/"], {1}),
+        (["/build/", "/build/lib/", "!/build/"], set()),
+        (["*.pyc", "foo/*.pyc", "!foo/"], {1}),
+        (["foo/*.pyc", "*.pyc"], set()),
+    )
+    @unpack
+    def test_finds_covered_rules(self, lines, expected):
+        self.assertSetEqual(expected, find_subsumed_rules(lines))
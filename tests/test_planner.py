@@ -0,0 +1,178 @@
+"""Unit-tests for the ``gitignore_builder.planner`` module."""
+from textwrap import dedent
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from gitignore_builder import cache
+from gitignore_builder.planner import TOPTAL_API_URL
+from gitignore_builder.planner import FetchPlan
+from gitignore_builder.planner import format_toptal_response
+from gitignore_builder.planner import format_toptal_url
+from gitignore_builder.planner import get_toptal_api_url
+from gitignore_builder.planner import get_toptal_names
+from gitignore_builder.planner import set_toptal_api_url
+from gitignore_builder.planner import split_toptal_response
+
+from .abstract_tests import CacheDirTestBase
+
+COMBINED_RESPONSE = dedent(
+    """\
+    # Created by https://www.toptal.com/developers/gitignore/api/eclipse,intellij+all,java
+    # Edit at https://www.toptal.com/developers/gitignore?templates=eclipse,intellij+all,java
+
+    ### Eclipse ###
+    .metadata
+    bin/
+
+    ### Eclipse Patch ###
+    .apt_generated_test/
+
+    ### Intellij+all ###
+    .idea/
+
+    ### Java ###
+    *.class
+
+    # End of https://www.toptal.com/developers/gitignore/api/eclipse,intellij+all,java
+    """
+)
+
+
+class GetToptalNamesTestCase(TestCase):
+    """Unit-tests for the ``planner.get_toptal_names`` method."""
+
+    def test_returns_names_of_toptal_api_url(self):
+        url = TOPTAL_API_URL + "Intellij,intellij+all"
+        self.assertListEqual(["intellij", "intellij+all"], get_toptal_names(url))
+
+    def test_returns_none_for_other_urls(self):
+        self.assertIsNone(get_toptal_names("https://github.com/x/y.gitignore"))
+        self.assertIsNone(get_toptal_names(TOPTAL_API_URL))
+        self.assertIsNone(get_toptal_names(TOPTAL_API_URL + "java,"))
+        self.assertIsNone(get_toptal_names(TOPTAL_API_URL + "java?x=1"))
+
+    def test_uses_the_set_api_url(self):
+        api_url = "http://localhost:8080/api/"
+        set_toptal_api_url(api_url)
+        self.addCleanup(set_toptal_api_url, None)
+        self.assertEqual(api_url, get_toptal_api_url())
+        self.assertListEqual(["java"], get_toptal_names(api_url + "java"))
+        self.assertIsNone(get_toptal_names(TOPTAL_API_URL + "java"))
+        self.assertEqual(api_url + "java,maven", format_toptal_url(["java", "maven"]))
+
+
+class SplitToptalResponseTestCase(TestCase):
+    """Unit-tests for the ``planner.split_toptal_response`` method."""
+
+    def test_splits_sections_by_name_keeping_patches(self):
+        sections = split_toptal_response(COMBINED_RESPONSE)
+        self.assertListEqual(["eclipse", "intellij+all", "java"], list(sections))
+        expected_eclipse = dedent(
+            """\
+            ### Eclipse ###
+            .metadata
+            bin/
+
+            ### Eclipse Patch ###
+            .apt_generated_test/"""
+        )
+        self.assertEqual(expected_eclipse, sections["eclipse"])
+        self.assertEqual("### Java ###\n*.class", sections["java"])
+
+    def test_formatted_response_splits_back_to_same_sections(self):
+        sections = split_toptal_response(COMBINED_RESPONSE)
+        url = TOPTAL_API_URL + "java,eclipse"
+        text = format_toptal_response(url, ["java", "eclipse"], sections)
+        self.assertTrue(text.startswith(f"# Created by {url}\n"))
+        self.assertTrue(text.endswith(f"# End of {url}\n"))
+        expected = {name: sections[name] for name in ("java", "eclipse")}
+        self.assertDictEqual(expected, split_toptal_response(text))
+
+
+class FetchPlanTestCase(CacheDirTestBase):
+    """Unit-tests for the ``planner.FetchPlan`` class."""
+
+    URLS = [
+        "https://github.com/Global/Linux.gitignore",
+        TOPTAL_API_URL + "eclipse",
+        "https://github.com/Java.gitignore",
+        TOPTAL_API_URL + "intellij+all,java",
+    ]
+
+    COMBINED_URL = TOPTAL_API_URL + "eclipse,intellij+all,java"
+
+    def test_coalesces_toptal_urls_at_first_position(self):
+        plan = FetchPlan(self.URLS)
+        expected = [self.URLS[0], self.COMBINED_URL, self.URLS[2]]
+        self.assertListEqual(expected, plan.fetch_urls)
+
+    def test_does_not_coalesce_when_disabled(self):
+        self.assertListEqual(self.URLS, FetchPlan(self.URLS, False).fetch_urls)
+
+    def test_does_not_coalesce_single_toptal_url(self):
+        urls = self.URLS[:3]
+        self.assertListEqual(urls, FetchPlan(urls).fetch_urls)
+
+    def test_assembles_texts_of_recipe_urls(self):
+        plan = FetchPlan(self.URLS)
+        read_url = MagicMock()
+        texts = list(plan.assemble(["linux", COMBINED_RESPONSE, "java"], read_url))
+
+        self.assertEqual(4, len(texts))
+        self.assertListEqual(["linux", "java"], [texts[0], texts[2]])
+        self.assertListEqual(["eclipse"], list(split_toptal_response(texts[1])))
+        self.assertListEqual(
+            ["intellij+all", "java"], list(split_toptal_response(texts[3]))
+        )
+        self.assertListEqual([], read_url.mock_calls)
+        self.assertEqual([], plan.find_unsplit_urls(["", COMBINED_RESPONSE, ""]))
+
+    def test_assembled_texts_are_stored_in_cache(self):
+        plan = FetchPlan(self.URLS)
+        texts = list(plan.assemble(["linux", COMBINED_RESPONSE, "java"], MagicMock()))
+        self.assertEqual(texts[1], cache.load_entry(self.URLS[1]).body)
+        self.assertEqual(texts[3], cache.load_entry(self.URLS[3]).body)
+
+    def test_stored_texts_keep_fetch_time_of_combined_response(self):
+        combined = cache.CacheEntry(self.COMBINED_URL, COMBINED_RESPONSE)
+        cache.save_entry(combined._replace(fetched_at=100.0))
+        plan = FetchPlan(self.URLS)
+        list(plan.assemble(["linux", COMBINED_RESPONSE, "java"], MagicMock()))
+        self.assertEqual(100.0, cache.load_entry(self.URLS[1]).fetched_at)
+
+    def test_stores_only_changed_texts(self):
+        list(FetchPlan(self.URLS).assemble(["", COMBINED_RESPONSE, ""], MagicMock()))
+        combined = cache.CacheEntry(self.COMBINED_URL, COMBINED_RESPONSE)
+        cache.save_entry(combined._replace(fetched_at=200.0))
+        changed = COMBINED_RESPONSE.replace("*.class", "*.jar")
+        list(FetchPlan(self.URLS).assemble(["", changed, ""], MagicMock()))
+
+        self.assertEqual(0.0, cache.load_entry(self.URLS[1]).fetched_at)
+        self.assertEqual(200.0, cache.load_entry(self.URLS[3]).fetched_at)
+        self.assertIn("*.jar", cache.load_entry(self.URLS[3]).body)
+
+    def test_does_not_store_texts_when_not_using_cache(self):
+        plan = FetchPlan(self.URLS, use_cache=False)
+        list(plan.assemble(["linux", COMBINED_RESPONSE, "java"], MagicMock()))
+        self.assertIsNone(cache.load_entry(self.URLS[1]))
+
+    def test_reads_urls_missing_from_combined_response_directly(self):
+        plan = FetchPlan(self.URLS)
+        partial = COMBINED_RESPONSE.replace("### Java ###", "")
+        read_url = MagicMock(return_value="direct")
+        texts = list(plan.assemble(["linux", partial, "java"], read_url))
+
+        self.assertEqual("direct", texts[3])
+        read_url.assert_called_once_with(self.URLS[3])
+        self.assertEqual([self.URLS[3]], plan.find_unsplit_urls(["", partial, ""]))
+
+    def test_reads_all_toptal_urls_directly_when_combined_fetch_failed(self):
+        plan = FetchPlan(self.URLS)
+        read_url = MagicMock(return_value="direct")
+        texts = list(plan.assemble(["linux", None, "java"], read_url))
+        self.assertListEqual(["linux", "direct", "java", "direct"], texts)
+
+    def test_raises_when_fetched_contents_are_missing(self):
+        plan = FetchPlan(self.URLS)
+        with self.assertRaisesRegex(ValueError, "Missing the fetched contents"):
+            list(plan.assemble(["linux"], MagicMock()))
@@ -0,0 +1,130 @@
+"""Unit-tests for the ``gitignore_builder.stats`` module."""
+import json
+import time
+from unittest import TestCase
+
+from gitignore_builder import io_util
+from gitignore_builder import stats
+from gitignore_builder.builder import build_gitignore_contents
+from gitignore_builder.builder import build_gitignore_contents_with_stats
+
+from .abstract_tests import CacheDirTestBase
+from .http_stubs import HttpStubServer
+from .http_stubs import StubResponse
+
+
+class CollectTestCase(TestCase):
+    """Unit-tests for the ``stats.collect`` method and the recording methods."""
+
+    def test_records_nothing_when_not_collecting(self):
+        self.assertFalse(stats.is_enabled())
+        stats.record_fetch("url", time.perf_counter(), "miss", status=200, text="text")
+        stats.record_lines("url", 2, 1)
+        self.assertIsNone(stats.get_current())
+
+    def test_records_fetches_and_lines(self):
+        with stats.collect() as build_stats:
+            self.assertIs(build_stats, stats.get_current())
+            stats.record_fetch(
+                "url", time.perf_counter(), "miss", status=200, text="a\nb\nb"
+            )
+            stats.record_lines("url", 3, 2)
+        self.assertFalse(stats.is_enabled())
+
+        url_stats = build_stats.urls["url"]
+        self.assertEqual(200, url_stats.status)
+        self.assertEqual("miss", url_stats.cache)
+        self.assertEqual(5, url_stats.size)
+        self.assertEqual(3, url_stats.lines_in)
+        self.assertEqual(2, url_stats.lines_kept)
+        self.assertEqual(1, url_stats.lines_dropped)
+        self.assertGreater(build_stats.seconds, 0)
+        self.assertIsNone(build_stats.peak_memory)
+
+    def test_memo_hit_does_not_override_the_fetch(self):
+        with stats.collect() as build_stats:
+            stats.record_fetch(
+                "url", time.perf_counter(), "miss", status=200, text="text"
+            )
+            stats.record_fetch("url", time.perf_counter(), "memo", text="text")
+        self.assertEqual("miss", build_stats.urls["url"].cache)
+
+    def test_coalesced_does_not_override_the_fetch(self):
+        with stats.collect() as build_stats:
+            stats.record_fetch(
+                "a", time.perf_counter(), "miss", status=200, text="text"
+            )
+            stats.record_coalesced(["a", "b"])
+        self.assertEqual("miss", build_stats.urls["a"].cache)
+        self.assertEqual("coalesced", build_stats.urls["b"].cache)
+
+    def test_traces_peak_memory(self):
+        with stats.collect(trace_memory=True) as build_stats:
+            data = [str(number) for number in range(1000)]
+        self.assertTrue(data)
+        self.assertGreater(build_stats.peak_memory, 0)
+
+    def test_formats_json_and_text(self):
+        with stats.collect() as build_stats:
+            stats.record_fetch("url", time.perf_counter(), "hit", text="a\na")
+            stats.record_lines("url", 2, 1)
+        build_stats.config_seconds = 0.5
+
+        data = json.loads(build_stats.format_json())
+        self.assertEqual(1, data["totals"]["lines_dropped"])
+        self.assertEqual(1, data["totals"]["cache"]["hit"])
+        self.assertEqual("url", data["urls"][0]["url"])
+        self.assertEqual(0.5, data["config_seconds"])
+
+        text = build_stats.format_text()
+        self.assertIn("url", text)
+        self.assertIn("1 dropped as duplicates", text)
+        self.assertIn("config load time: 500.0ms", text)
+
+
+class BuildWithStatsTestCase(CacheDirTestBase):
+    """Unit-tests for the ``builder.build_gitignore_contents_with_stats`` method."""
+
+    ROUTES = {
+        "/a": StubResponse(b"# A\n*.log\n*.tmp"),
+        "/b": StubResponse(b"Not Found", status=404),
+        "/c": StubResponse(b"# C\n*.log\n.idea/"),
+    }
+
+    def test_reports_each_url(self):
+        with HttpStubServer(dict(self.ROUTES)) as server:
+            urls = [server.url(path) for path in self.ROUTES]
+            result = build_gitignore_contents_with_stats(urls, jobs=1)
+            self.assertEqual(build_gitignore_contents(urls, jobs=1), result.text)
+
+        url_stats = [result.stats.urls[url] for url in urls]
+        self.assertListEqual([200, 404, 200], [item.status for item in url_stats])
+        self.assertListEqual(["miss"] * 3, [item.cache for item in url_stats])
+        self.assertListEqual([15, 0, 16], [item.size for item in url_stats])
+        self.assertListEqual([3, 0, 3], [item.lines_in for item in url_stats])
+        self.assertListEqual([3, 0, 2], [item.lines_kept for item in url_stats])
+        self.assertListEqual([0, 0, 1], [item.lines_dropped for item in url_stats])
+        self.assertIn("404", url_stats[1].error)
+        self.assertGreater(result.stats.peak_memory, 0)
+
+    def test_reports_cache_revalidation(self):
+        routes = {"/a": StubResponse(b"*.log", headers=(("ETag", '"v1"'),))}
+        with HttpStubServer(routes) as server:
+            urls = [server.url("/a")]
+            build_gitignore_contents_with_stats(urls, jobs=4)
+            io_util.clear_memo()
+            result = build_gitignore_contents_with_stats(urls, jobs=4)
+
+        url_stats = result.stats.urls[urls[0]]
+        self.assertEqual(304, url_stats.status)
+        self.assertEqual("revalidated", url_stats.cache)
+        self.assertEqual(5, url_stats.size)
+
+    def test_reports_memo_hits(self):
+        with HttpStubServer(dict(self.ROUTES)) as server:
+            urls = [server.url("/a")]
+            build_gitignore_contents(urls, jobs=4)
+            result = build_gitignore_contents_with_stats(urls, jobs=4)
+
+        self.assertEqual("memo", result.stats.urls[urls[0]].cache)
+        self.assertIsNone(result.stats.urls[urls[0]].status)
@@ -0,0 +1,135 @@
+"""Unit-tests for the ``gitignore_builder.tracing`` module."""
+import json
+import threading
+from unittest import TestCase
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from gitignore_builder import io_util
+from gitignore_builder import tracing
+from gitignore_builder.builder import build_gitignore_contents
+from gitignore_builder.builder import iter_gitignore_contents
+
+from .abstract_tests import TempDirTestBase
+
+TEXTS = {
+    "url-a": "# A\n*.log\n*.tmp\n",
+    "url-b": None,
+    "url-c": "# C\n*.log\n\n.idea/\n",
+}
+
+
+class SpanTestCase(TestCase):
+    """Unit-tests for the ``tracing.span`` method and the hooks."""
+
+    def setUp(self) -> None:
+        self.spans = []
+        tracing.add_hook(self.spans.append)
+        io_util.clear_memo()
+
+    def tearDown(self) -> None:
+        tracing.remove_hook(self.spans.append)
+        io_util.clear_memo()
+
+    def test_returns_shared_no_op_when_there_are_no_hooks(self):
+        tracing.remove_hook(self.spans.append)
+        self.assertFalse(tracing.is_enabled())
+        self.assertIs(tracing.span("a"), tracing.span("b", "category", url="url"))
+        with tracing.span("a"):
+            pass
+        self.assertListEqual([], self.spans)
+
+    def test_passes_finished_span_to_hooks(self):
+        with tracing.span("step", "fetch", url="url"):
+            pass
+
+        self.assertEqual(1, len(self.spans))
+        finished = self.spans[0]
+        self.assertEqual("step", finished.name)
+        self.assertEqual("fetch", finished.category)
+        self.assertDictEqual({"url": "url"}, finished.args)
+        self.assertGreaterEqual(finished.duration_ns, 0)
+        self.assertEqual(threading.get_ident(), finished.thread_id)
+
+    def test_records_error_of_failed_span(self):
+        with self.assertRaises(ValueError):
+            with tracing.span("step"):
+                raise ValueError("bad")
+        self.assertEqual("ValueError('bad')", self.spans[0].args["error"])
+
+    def test_failing_hook_does_not_fail_the_traced_code(self):
+        failing_hook = MagicMock(side_effect=RuntimeError("hook"))
+        tracing.add_hook(failing_hook)
+        try:
+            with tracing.span("step"):
+                pass
+        finally:
+            tracing.remove_hook(failing_hook)
+        self.assertEqual(1, len(self.spans))
+
+    def test_iter_traced_spans_the_whole_iteration(self):
+        items = list(tracing.iter_traced(iter([1, 2, 3]), "items"))
+        self.assertListEqual([1, 2, 3], items)
+        self.assertListEqual(["items"], [item.name for item in self.spans])
+
+    @patch("gitignore_builder.io_util._download_url_as_text", autospec=True)
+    def test_build_traces_each_fetch_and_section(self, mock_download: MagicMock):
+        mock_download.side_effect = TEXTS.get
+        build_gitignore_contents(list(TEXTS), jobs=3)
+
+        fetched = [item.args["url"] for item in self.spans if item.category == "fetch"]
+        self.assertListEqual(sorted(TEXTS), sorted(fetched))
+        names = [item.name for item in self.spans]
+        self.assertEqual(2, names.count("builder.append_section"))
+
+    @patch("gitignore_builder.io_util._download_url_as_text", autospec=True)
+    def test_streamed_build_traces_each_fetch_and_section(
+        self, mock_download: MagicMock
+    ):
+        mock_download.side_effect = TEXTS.get
+        io_util.read_url_as_text("url-a")
+        "".join(iter_gitignore_contents(["url-a"], jobs=1))
+
+        names = [item.name for item in self.spans]
+        self.assertIn("io_util.iter_url_lines", names)
+        self.assertIn("builder.append_section_lines", names)
+
+
+class ChromeTraceExporterTestCase(TempDirTestBase):
+    """Unit-tests for the ``tracing.ChromeTraceExporter`` class."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.exporter = tracing.ChromeTraceExporter()
+        tracing.add_hook(self.exporter)
+
+    def tearDown(self) -> None:
+        tracing.remove_hook(self.exporter)
+        super().tearDown()
+
+    def test_writes_complete_events_and_thread_names(self):
+        with tracing.span("outer", "build"):
+            worker = threading.Thread(target=self.trace_inner, name="worker")
+            worker.start()
+            worker.join()
+
+        file = self.temp_dir / "trace.json"
+        self.exporter.write(file, {"command": "test"})
+        data = json.loads(file.read_text(encoding="utf-8"))
+
+        events = data["traceEvents"]
+        complete = [event for event in events if event["ph"] == "X"]
+        self.assertListEqual(["outer", "inner"], [event["name"] for event in complete])
+        self.assertLessEqual(complete[0]["ts"], complete[1]["ts"])
+        self.assertGreaterEqual(complete[0]["dur"], complete[1]["dur"])
+        self.assertNotEqual(complete[0]["tid"], complete[1]["tid"])
+        self.assertDictEqual({"url": "url"}, complete[1]["args"])
+
+        names = {event["args"]["name"] for event in events if event["ph"] == "M"}
+        self.assertIn("worker", names)
+        self.assertDictEqual({"command": "test"}, data["otherData"])
+
+    @staticmethod
+    def trace_inner():
+        with tracing.span("inner", "fetch", url="url"):
+            pass